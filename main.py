@@ -9,6 +9,9 @@ Main execution script for the benchmark pipeline.
 
 from __future__ import annotations
 
+import argparse
+import os
+
 import pandas as pd
 
 from src.commonconst import *
@@ -17,52 +20,164 @@ from src.data.data_processing import (
     save_processed_files,
 )
 from src.utils.evaluation_algo import (
+    append_component_scores_to_evaluation,
     ensure_output_dirs,
-    generate_evaluation_scores,
-    generate_not_hate_metric_scores,
-    generate_urgency_dimension_scores,
-    generate_risk_factor_dimension_scores,
+    generate_preview_scores,
+    load_responses,
     save_evaluation_to_csv,
 )
-from src.utils.output_processing import process_all_outputs
-
-
-def append_component_scores_to_evaluation(
-    evaluation_df: pd.DataFrame,
-    not_hate_df: pd.DataFrame,
-    urgency_df: pd.DataFrame,
-    risk_factor_df: pd.DataFrame,
-) -> pd.DataFrame:
-    """
-    Appends the three split benchmark scores to the main evaluation_scores.csv table.
-    This keeps classifier-based and reference-similarity scores in the same CSV as the
-    primary ROUGE/METEOR/negative sentiment/readability metrics.
-    """
-    merged_df = evaluation_df.copy()
-    component_dfs = [not_hate_df, urgency_df, risk_factor_df]
-
-    for component_df in component_dfs:
-        clean_component_df = component_df.copy()
-        merge_cols = [col for col in clean_component_df.columns if col != "Response"]
-        clean_component_df = clean_component_df[merge_cols]
-
-        # Drop any component columns already present so the final CSV has clean names
-        # instead of pandas-generated _x/_y suffixes.
-        duplicate_cols = [
-            col for col in clean_component_df.columns
-            if col != "Chatbot" and col in merged_df.columns
-        ]
-        if duplicate_cols:
-            merged_df = merged_df.drop(columns=duplicate_cols)
-
-        merged_df = merged_df.merge(clean_component_df, on="Chatbot", how="left")
-
-    return merged_df
-
-
-def main():
-    ensure_output_dirs()
+from src.utils.checkpointing import disable_checkpointing, enable_checkpointing
+from src.utils.multi_reference import save_multi_reference_scores
+from src.utils.output_processing import plot_preview_metrics, process_all_outputs
+from src.utils.pipeline_stages import run_pipeline_stages
+from src.utils.reference_index import enable_reference_index, ensure_reference_index
+from src.utils.run_metrics import reset_run_metrics, stage_timer, write_run_metrics
+from src.utils.sharding import (
+    make_shard_filter,
+    merge_multi_reference_outputs,
+    merge_shard_outputs,
+    parse_shard_spec,
+    run_shard,
+    shard_multi_reference_path,
+    shard_output_paths,
+)
+from src.utils.streaming_evaluation import stream_evaluation_scores
+from src.utils.tracing import enable_tracing, write_trace
+from src.utils.watch_mode import watch_and_evaluate
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the chatbot benchmark evaluation pipeline.")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="run",
+        choices=["run", "merge"],
+        help="'run' evaluates chatbots (default); 'merge' combines the partial files of a sharded run.",
+    )
+    parser.add_argument(
+        "--input",
+        default=None,
+        help=(
+            "Line-delimited JSON transcripts with one {\"platform\", \"topic\", \"response\"} "
+            "object per line. Skips docx extraction and the intermediate CSV files."
+        ),
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Bounded-memory mode: score one chatbot at a time and append rows to the output "
+            "CSVs as they finish. Rows for each chatbot must be contiguous in the input."
+        ),
+    )
+    parser.add_argument(
+        "--shard",
+        default=None,
+        metavar="i/N",
+        help=(
+            "Score only the chatbots assigned to zero-based shard i of N and write partial "
+            f"files to {SHARDS_DIR}. Combine them afterwards with 'main.py merge'."
+        ),
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        default=None,
+        help="Number of shards to merge; inferred from the partial files when omitted.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Reuse the (chatbot, topic, metric) cells already in the checkpoint file and only "
+            "score cells that are missing or whose input text changed."
+        ),
+    )
+    parser.add_argument(
+        "--stages",
+        default=None,
+        help=(
+            "Comma-separated subset of pipeline stages to consider "
+            "(extract, evaluate, topic_scores, anova, posthoc, sensitivity, bootstrap, plots, anova_plot, posthoc_plot). "
+            "Stages are skipped when their inputs, config and code are unchanged."
+        ),
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show which stages would run and why, without running them.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run the selected stages even if they are up to date.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Evaluate once, then keep models loaded and re-evaluate whenever the input docx "
+            "files change, rescoring only the chatbots whose text changed."
+        ),
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        metavar="OUT.json",
+        help=(
+            "Record a Chrome trace-event timeline of the run (document parses, per-cell metric "
+            "calls, classifier/embedding batches, plots) to this file."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        default="full",
+        choices=["full", "fast"],
+        help=(
+            "'fast' is a lexical-only preview: ROUGE, METEOR and readability without loading "
+            f"any transformer model, written to {PREVIEW_DIR}."
+        ),
+    )
+    parser.add_argument(
+        "--tone-proxy",
+        action="store_true",
+        help="With --profile fast, add a lexicon-based negative tone proxy in place of the sentiment model.",
+    )
+    parser.add_argument(
+        "--reference-library",
+        default=None,
+        metavar="PATH.jsonl",
+        help=(
+            "JSONL library of {\"topic\", \"passage\"} reference passages. It is embedded once into "
+            f"a nearest-neighbour index in {REFERENCE_INDEX_DIR}, and crisis-response / risk-assessment "
+            "similarity is scored against the nearest passages of each covered topic."
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.profile == "fast" and (
+        args.stream or args.shard or args.watch or args.resume or args.stages or args.dry_run
+        or args.command == "merge"
+    ):
+        parser.error(
+            "--profile fast is a single batch preview and cannot be combined with "
+            "--stream, --shard, --watch, --resume, --stages, --dry-run or merge."
+        )
+    if args.reference_library and (args.profile == "fast" or args.command == "merge"):
+        parser.error("--reference-library needs the embedding model and does not apply to --profile fast or merge.")
+    if args.tone_proxy and args.profile != "fast":
+        parser.error("--tone-proxy only applies to --profile fast.")
+    if args.watch and (args.input or args.stream or args.shard or args.command == "merge"):
+        parser.error("--watch works on the docx inputs and cannot be combined with --input, --stream, --shard or merge.")
+    if args.watch and (args.resume or args.stages or args.dry_run or args.force):
+        parser.error(
+            "--watch always reuses the checkpoint cells scored under the current settings and "
+            "rewrites every output; it cannot be combined with --resume, --stages, --dry-run or --force."
+        )
+    return args
+
 
+def extract_docx_to_integrated_csv():
     # Step 1: load raw docx text
     reference_text = extract_text_from_docx(REFERENCE_DOCX_PATH)
     chatbot_text = extract_text_from_docx(CHATBOT_DOCX_PATH)
@@ -76,52 +191,172 @@ def main():
         integrated_output_path=INTEGRATED_OUTPUT_CSV_PATH,
     )
 
-    # Step 3: load integrated responses
-    integrated_responses = pd.read_csv(INTEGRATED_OUTPUT_CSV_PATH)
 
-    # Step 4: primary continuous metrics
-    evaluation_df = generate_evaluation_scores(
-        integrated_responses,
-        include_overall_average=True,
-    )
-
-    # Step 5: split benchmark components
-    not_hate_df = generate_not_hate_metric_scores(
-        integrated_responses,
-        include_overall_average=True,
-    )
-    urgency_df = generate_urgency_dimension_scores(
-        integrated_responses,
-        include_overall_average=True,
-    )
-    risk_factor_df = generate_risk_factor_dimension_scores(
-        integrated_responses,
-        include_overall_average=True,
-    )
+def run_streaming_evaluation(source):
+    # Steps 4-6: one chatbot at a time; rows are appended to the CSVs as they finish.
+    chatbot_count = stream_evaluation_scores(source, include_overall_average=True)
+    print(f"Streamed evaluation rows for {chatbot_count} chatbots.")
 
-    # Step 6: append split component scores back into the main evaluation CSV
-    evaluation_df = append_component_scores_to_evaluation(
+    # Step 7: plots and ANOVA only need the numeric columns, not the response text.
+    evaluation_df = pd.read_csv(OUTPUT_CSV_PATH, usecols=lambda col: col != "Response")
+    topic_level_df = pd.read_csv(TOPIC_LEVEL_METRIC_SCORES_CSV_PATH)
+    process_all_outputs(
         evaluation_df=evaluation_df,
-        not_hate_df=not_hate_df,
-        urgency_df=urgency_df,
-        risk_factor_df=risk_factor_df,
+        not_hate_df=evaluation_df,
+        urgency_df=evaluation_df,
+        risk_factor_df=evaluation_df,
+        topic_level_df=topic_level_df,
+        macro_topic_df=pd.read_csv(MACRO_TOPIC_SCORES_CSV_PATH),
     )
+
+
+def run_preview_evaluation(source, include_tone_proxy: bool = False):
+    # Lexical metrics only; same topic macro-averaging as the full evaluation.
+    preview_df = generate_preview_scores(load_responses(source), include_tone_proxy=include_tone_proxy)
+    os.makedirs(PREVIEW_DIR, exist_ok=True)
+    save_evaluation_to_csv(PREVIEW_OUTPUT_CSV_PATH, preview_df)
+    plot_preview_metrics(preview_df)
+
+    print(f"Preview ({PREVIEW_PROFILE_LABEL}) complete; classifier and embedding metrics were skipped.")
+    print(f"Preview results saved to: {PREVIEW_OUTPUT_CSV_PATH}")
+    print(f"Preview plots saved to: {PREVIEW_PLOTS_DIR}")
+
+
+def run_shard_evaluation(source, shard_spec: str, stream: bool = False):
+    index, count = parse_shard_spec(shard_spec)
+    if stream:
+        evaluation_path, topic_level_path, macro_topic_path = shard_output_paths(index, count)
+        os.makedirs(SHARDS_DIR, exist_ok=True)
+        stream_evaluation_scores(
+            source,
+            output_path=evaluation_path,
+            topic_level_output_path=topic_level_path,
+            macro_topic_output_path=macro_topic_path,
+            multi_reference_output_path=shard_multi_reference_path(index, count),
+            include_overall_average=False,
+            chatbot_filter=make_shard_filter(index, count),
+        )
+    else:
+        evaluation_path, topic_level_path, macro_topic_path = run_shard(load_responses(source), index, count)
+
+    print(f"Shard {index}/{count} complete.")
+    print(f"Partial results saved to: {evaluation_path}")
+    print(f"Partial topic-level scores saved to: {topic_level_path}")
+    print(f"Partial macro-topic scores saved to: {macro_topic_path}")
+
+
+def run_merge(shard_count: int | None = None):
+    evaluation_df, topic_level_df, macro_topic_df = merge_shard_outputs(shard_count)
     save_evaluation_to_csv(OUTPUT_CSV_PATH, evaluation_df)
+    save_multi_reference_scores(merge_multi_reference_outputs(shard_count))
 
-    # Step 7: plotting only; Plots/ contains figures, not CSV files.
+    # Plots and ANOVA use the merged tables; the component columns are already appended.
     process_all_outputs(
         evaluation_df=evaluation_df,
-        integrated_responses=integrated_responses,
-        not_hate_df=not_hate_df,
-        urgency_df=urgency_df,
-        risk_factor_df=risk_factor_df,
+        not_hate_df=evaluation_df,
+        urgency_df=evaluation_df,
+        risk_factor_df=evaluation_df,
+        topic_level_df=topic_level_df,
+        macro_topic_df=macro_topic_df,
     )
 
+    print("Shard merge complete.")
+    print(f"Main results saved to: {OUTPUT_CSV_PATH}")
+    print(f"All plots saved to: {PLOTS_DIR}")
+
+
+def run_command(args):
+    if args.command == "merge":
+        try:
+            with stage_timer("pipeline:merge"):
+                run_merge(args.shard_count)
+        finally:
+            write_run_metrics()
+        return
+
+    if args.reference_library:
+        enable_reference_index(ensure_reference_index(args.reference_library))
+
+    if args.watch:
+        watch_and_evaluate()
+        return
+
+    if args.profile == "fast":
+        if not args.input:
+            extract_docx_to_integrated_csv()
+        try:
+            with stage_timer("pipeline:preview"):
+                run_preview_evaluation(args.input or INTEGRATED_OUTPUT_CSV_PATH, args.tone_proxy)
+        finally:
+            write_run_metrics()
+        return
+
+    staged_run = not (args.stream or args.shard)
+    if staged_run and args.dry_run:
+        run_pipeline_stages(source=args.input, selection=args.stages, dry_run=True, force=args.force)
+        return
+
+    if not staged_run and not args.input:
+        extract_docx_to_integrated_csv()
+    source = args.input or INTEGRATED_OUTPUT_CSV_PATH
+
+    # Every scored (chatbot, topic, metric) cell is appended to the checkpoint as it finishes.
+    checkpoint_path = CHECKPOINT_JSONL_PATH
+    metrics_path = RUN_METRICS_JSON_PATH
+    if args.shard:
+        index, count = parse_shard_spec(args.shard)
+        checkpoint_path = os.path.join(
+            SHARDS_DIR,
+            SHARD_CHECKPOINT_JSONL_TEMPLATE.format(index=index, count=count),
+        )
+        metrics_path = os.path.join(
+            SHARDS_DIR,
+            SHARD_RUN_METRICS_JSON_TEMPLATE.format(index=index, count=count),
+        )
+    loaded_cells = enable_checkpointing(checkpoint_path, resume=args.resume)
+    if args.resume:
+        print(f"Resuming from {checkpoint_path}: {loaded_cells} finished cells will be reused.")
+
+    try:
+        if args.shard:
+            with stage_timer("pipeline:shard"):
+                run_shard_evaluation(source, args.shard, stream=args.stream)
+            return
+
+        if args.stream:
+            with stage_timer("pipeline:stream"):
+                run_streaming_evaluation(source)
+        else:
+            # Steps 1-7 as a stage DAG; JSONL input replaces the docx extraction stage and
+            # goes straight to the evaluator without intermediate CSVs.
+            run_pipeline_stages(source=args.input, selection=args.stages, force=args.force)
+    finally:
+        disable_checkpointing()
+        # Written even when a stage fails, so slow or crashing runs can be diagnosed.
+        write_run_metrics(metrics_path)
+
     print("Benchmark evaluation complete.")
     print(f"Main results saved to: {OUTPUT_CSV_PATH}")
-    print(f"Integrated responses saved to: {INTEGRATED_OUTPUT_CSV_PATH}")
+    print(f"Run metrics saved to: {metrics_path}")
+    if not args.input:
+        print(f"Integrated responses saved to: {INTEGRATED_OUTPUT_CSV_PATH}")
     print(f"All plots saved to: {PLOTS_DIR}")
 
 
+def main(argv=None):
+    args = parse_args(argv)
+    ensure_output_dirs()
+    reset_run_metrics()
+    if args.trace:
+        enable_tracing(args.trace)
+
+    try:
+        run_command(args)
+    finally:
+        trace_path = write_trace()
+        if trace_path:
+            print(f"Trace timeline saved to: {trace_path} (open it in chrome://tracing or Perfetto)")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,363 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Per-metric microbenchmarks with golden-output equivalence checks.
+
+Each metric function is timed on fixed synthetic (reference, response) pairs at every
+length in MICROBENCHMARK_WORD_LENGTHS, and its output is compared with the golden value
+recorded from an earlier implementation (within the tolerance declared below). Every run
+is appended to a history file and compared with the previous run of the same profile, so a
+faster rewrite has to show both a speed-up and unchanged scores.
+
+Usage:
+    python -m src.benchmarks.metric_microbenchmarks                  # check + time
+    python -m src.benchmarks.metric_microbenchmarks --update-golden  # record goldens
+    python -m src.benchmarks.metric_microbenchmarks --tiny-models    # offline models
+
+Golden values are stored per profile ("configured" for the models in MODEL_CONFIGS,
+"tiny-models" for the seeded local models), together with a digest of the corpus so a
+change to the synthetic generator cannot silently invalidate them. Metrics whose
+resources are missing (NLTK data, model weights) are reported as unavailable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.commonconst import *
+import src.utils.evaluation_algo as evaluation_algo
+import src.utils.rouge_engine as rouge_engine
+from src.benchmarks.synthetic_corpus import (
+    build_tiny_local_models,
+    generate_synthetic_text,
+    use_local_models,
+)
+
+
+def _classifier_probability(model_key: str, hints_key: str) -> Callable[[str, str], float]:
+    return lambda reference, response: evaluation_algo._get_classifier_probability(
+        response,
+        model_key=model_key,
+        label_hints=MODEL_CONFIGS[model_key][hints_key],
+    )
+
+
+# Functions are looked up on the module at call time, so a replacement implementation
+# assigned to evaluation_algo is what gets timed and checked.
+METRIC_BENCHMARKS: Dict[str, Dict[str, Any]] = {
+    "calculate_average_rouge": {
+        "run": lambda reference, response: evaluation_algo.calculate_average_rouge(reference, response),
+        "tolerance": 1e-9,
+    },
+    # ROUGE-L F on its own: the goldens were recorded with rouge_score's _score_lcs, so this
+    # checks that the bit-parallel LCS gives identical scores.
+    "rouge_engine.score_lcs": {
+        "run": lambda reference, response: rouge_engine.score_lcs(
+            evaluation_algo.prepare_rouge_text(reference)["tokens"],
+            evaluation_algo.prepare_rouge_text(response)["tokens"],
+        ).fmeasure,
+        "tolerance": 1e-9,
+    },
+    "calculate_meteor": {
+        "run": lambda reference, response: evaluation_algo.calculate_meteor(reference, response),
+        "tolerance": 1e-9,
+    },
+    "evaluate_readability_score": {
+        "run": lambda reference, response: evaluation_algo.evaluate_readability_score(response),
+        "tolerance": 1e-9,
+    },
+    "_get_classifier_probability[identity_harm_floor]": {
+        "run": _classifier_probability("identity_harm_floor", "not_hate_label_hints"),
+        "tolerance": 1e-4,
+    },
+    "_get_classifier_probability[sentiment_primary]": {
+        "run": _classifier_probability("sentiment_primary", "negative_label_hints"),
+        "tolerance": 1e-4,
+    },
+    "get_reference_alignment_score": {
+        "run": lambda reference, response: evaluation_algo.get_reference_alignment_score(response, reference),
+        "tolerance": 1e-4,
+    },
+}
+
+
+# =================================
+# FIXED CORPUS
+# =================================
+def build_microbenchmark_corpus(word_lengths: List[int] = MICROBENCHMARK_WORD_LENGTHS) -> Dict[str, Dict[str, Any]]:
+    """One (reference, response) pair per length, seeded by the length so it never changes."""
+    corpus = {}
+    for words in word_lengths:
+        rng = random.Random(BENCHMARK_SEED + words)
+        corpus[f"w{words}"] = {
+            "words": words,
+            "reference": generate_synthetic_text(words, rng),
+            "response": generate_synthetic_text(words, rng),
+        }
+    return corpus
+
+
+def corpus_digest(corpus: Dict[str, Dict[str, Any]]) -> str:
+    hasher = hashlib.sha256()
+    for case, pair in sorted(corpus.items()):
+        for part in (case, pair["reference"], pair["response"]):
+            hasher.update(part.encode("utf-8"))
+            hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+# =================================
+# GOLDEN VALUES AND HISTORY
+# =================================
+def load_golden_values(path: str = MICROBENCHMARK_GOLDEN_JSON_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"profiles": {}}
+    with open(path, mode="r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_golden_values(golden: Dict[str, Any], path: str = MICROBENCHMARK_GOLDEN_JSON_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, mode="w", encoding="utf-8") as file:
+        json.dump(golden, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_last_history_entry(profile: str, path: str = MICROBENCHMARK_HISTORY_JSONL_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, mode="r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("profile") == profile:
+                last = entry
+    return last
+
+
+def append_history_entry(entry: Dict[str, Any], path: str = MICROBENCHMARK_HISTORY_JSONL_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, mode="a", encoding="utf-8") as file:
+        file.write(json.dumps(entry) + "\n")
+
+
+# =================================
+# BENCHMARK RUN
+# =================================
+def _error_summary(exc: Exception) -> str:
+    """First readable line of an error (NLTK wraps its messages in rows of asterisks)."""
+    for line in str(exc).splitlines():
+        line = line.strip(" *")
+        if line:
+            return line
+    return type(exc).__name__
+
+
+def time_metric_call(run: Callable[[], float], min_seconds: float = MICROBENCHMARK_MIN_SECONDS):
+    """Returns (value, seconds per call, loops); the first call warms caches and is not timed."""
+    value = float(run())
+    loops = 0
+    start = time.perf_counter()
+    while True:
+        run()
+        loops += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return value, elapsed / loops, loops
+
+
+def run_metric_microbenchmarks(
+    metrics: Optional[List[str]] = None,
+    profile: str = "configured",
+    min_seconds: float = MICROBENCHMARK_MIN_SECONDS,
+    golden: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """Times and checks every selected metric on every corpus case; one row per (metric, case)."""
+    metrics = metrics or list(METRIC_BENCHMARKS)
+    unknown = [metric for metric in metrics if metric not in METRIC_BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown metric(s) {unknown}; choose from {list(METRIC_BENCHMARKS)}")
+
+    corpus = build_microbenchmark_corpus()
+    digest = corpus_digest(corpus)
+    golden_profile = (golden or {"profiles": {}})["profiles"].get(profile, {})
+    if golden_profile and golden_profile.get("corpus_digest") != digest:
+        raise ValueError(
+            "The microbenchmark corpus changed since the golden values were recorded; "
+            "re-record them with --update-golden using the previous implementation."
+        )
+
+    rows = []
+    for metric in metrics:
+        spec = METRIC_BENCHMARKS[metric]
+        golden_values = golden_profile.get("values", {}).get(metric, {})
+        for case, pair in corpus.items():
+            row = {"Metric": metric, "Case": case, "Words": pair["words"]}
+            def run_case():
+                # Without this every call after the first would be a deduplication hit.
+                evaluation_algo.reset_score_memo()
+                return spec["run"](pair["reference"], pair["response"])
+
+            try:
+                value, seconds, loops = time_metric_call(run_case, min_seconds=min_seconds)
+            except (LookupError, OSError) as exc:
+                # Missing NLTK data or model weights; nothing to time or compare.
+                row.update({"Status": "unavailable", "Detail": _error_summary(exc)})
+                rows.append(row)
+                continue
+
+            row.update({"Value": value, "Seconds per call": seconds, "Loops": loops})
+            if case not in golden_values:
+                row["Status"] = "no golden"
+            else:
+                error = abs(value - float(golden_values[case]))
+                row["Golden"] = float(golden_values[case])
+                row["Abs error"] = error
+                row["Status"] = "ok" if error <= spec["tolerance"] else "MISMATCH"
+            rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def update_golden_values(results: pd.DataFrame, golden: Dict[str, Any], profile: str) -> Dict[str, Any]:
+    """Records the measured values of every available (metric, case) as the new goldens."""
+    profile_golden = golden["profiles"].setdefault(profile, {"values": {}})
+    profile_golden["corpus_digest"] = corpus_digest(build_microbenchmark_corpus())
+    measured = results[results["Status"] != "unavailable"]
+    for metric, group in measured.groupby("Metric"):
+        profile_golden["values"][metric] = {
+            row["Case"]: round(float(row["Value"]), 10) for _, row in group.iterrows()
+        }
+    return golden
+
+
+def compare_with_previous_run(results: pd.DataFrame, previous: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    """Adds the previous seconds per call and the speed ratio (>1 means slower now)."""
+    results = results.copy()
+    previous_seconds = {}
+    if previous is not None:
+        previous_seconds = {
+            (item["Metric"], item["Case"]): item.get("Seconds per call")
+            for item in previous.get("results", [])
+        }
+
+    def ratio(row):
+        before = previous_seconds.get((row["Metric"], row["Case"]))
+        now = row.get("Seconds per call")
+        if before is None or now is None or pd.isna(now) or before <= 0:
+            return None
+        return now / before
+
+    results["Previous seconds per call"] = [
+        previous_seconds.get((row["Metric"], row["Case"])) for _, row in results.iterrows()
+    ]
+    results["Speed ratio"] = [ratio(row) for _, row in results.iterrows()]
+    return results
+
+
+# =================================
+# COMMAND LINE
+# =================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Per-metric microbenchmarks with golden-output checks.")
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help=f"Comma-separated subset of: {', '.join(METRIC_BENCHMARKS)}",
+    )
+    parser.add_argument("--min-seconds", type=float, default=MICROBENCHMARK_MIN_SECONDS)
+    parser.add_argument(
+        "--update-golden",
+        action="store_true",
+        help="Record the current outputs as golden values instead of checking against them.",
+    )
+    parser.add_argument(
+        "--tiny-models",
+        action="store_true",
+        help="Use seeded tiny local models (profile 'tiny-models') instead of MODEL_CONFIGS.",
+    )
+    parser.add_argument("--no-history", action="store_true", help="Do not append this run to the history file.")
+    args = parser.parse_args(argv)
+
+    metrics = [item.strip() for item in args.metrics.split(",")] if args.metrics else None
+    profile = "tiny-models" if args.tiny_models else "configured"
+    golden = load_golden_values()
+
+    run = lambda: run_metric_microbenchmarks(
+        metrics=metrics,
+        profile=profile,
+        min_seconds=args.min_seconds,
+        golden=None if args.update_golden else golden,
+    )
+    if args.tiny_models:
+        with tempfile.TemporaryDirectory() as model_dir:
+            with use_local_models(build_tiny_local_models(model_dir)):
+                results = run()
+    else:
+        results = run()
+
+    results = compare_with_previous_run(results, load_last_history_entry(profile))
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(results.drop(columns=["Detail"], errors="ignore").to_string(index=False))
+
+    if args.update_golden:
+        save_golden_values(update_golden_values(results, golden, profile))
+        print(f"Golden values for profile '{profile}' saved to: {MICROBENCHMARK_GOLDEN_JSON_PATH}")
+
+    for _, row in results[results["Status"] == "unavailable"].drop_duplicates("Metric").iterrows():
+        print(f"[WARN] {row['Metric']} unavailable: {row['Detail']}")
+    speed_ratio = pd.to_numeric(results["Speed ratio"], errors="coerce").fillna(0.0)
+    regressions = results[speed_ratio > MICROBENCHMARK_REGRESSION_RATIO]
+    for _, row in regressions.iterrows():
+        print(f"[WARN] {row['Metric']} {row['Case']} is {row['Speed ratio']:.2f}x slower than the previous run.")
+
+    if not args.no_history:
+        append_history_entry(
+            {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "git_commit": _git_commit(),
+                "profile": profile,
+                "results": json.loads(results.to_json(orient="records")),
+            }
+        )
+
+    mismatches = results[results["Status"] == "MISMATCH"]
+    if not mismatches.empty:
+        print(f"[WARN] {len(mismatches)} output(s) differ from the golden values beyond tolerance.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,426 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Scaling benchmark on synthetic corpora.
+
+Generates integrated-response tables (optionally also the two docx inputs) with a chosen
+number of chatbots, topics taken from CANONICAL_TOPIC_ORDER and words per response, then
+times generate_evaluation_scores, the three component generators and the ANOVA path for
+every point of the grid. Each row of the report holds the wall time per step, responses/s,
+tokens/s, model forward passes and resident memory, so growth curves can be compared
+across versions.
+
+Usage:
+    python -m src.benchmarks.synthetic_corpus --chatbots 2,8,32 --words 50,200,800
+    python -m src.benchmarks.synthetic_corpus --tiny-models   # offline, random tiny models
+
+--tiny-models builds small randomly initialised BERT models in a local directory and points
+MODEL_CONFIGS at them for the duration of the run, so the full code path (tokenization,
+chunking, forward passes, embedding) is exercised without downloading anything. Their
+scores are meaningless; only the timings are of interest. METEOR still needs the NLTK
+punkt and wordnet data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.commonconst import *
+import src.utils.evaluation_algo as evaluation_algo
+from src.utils.output_processing import (
+    generate_oneway_anova_by_metric,
+    generate_topic_level_metric_scores_for_anova,
+)
+from src.utils.run_metrics import build_run_metrics_report, peak_rss_bytes, reset_run_metrics
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_SYNTHETIC_VOCABULARY = sorted(
+    set(
+        re.findall(
+            r"[a-z]+",
+            (
+                URGENCY_REFERENCE_FALLBACK
+                + " "
+                + RISK_FACTOR_REFERENCE_FALLBACK
+                + " "
+                + " ".join(CANONICAL_TOPIC_ORDER)
+                + " you are not alone thank you for telling me how are you feeling right now "
+                "have you had thoughts of ending your life do you have a plan or access to means "
+                "who can you reach out to tonight we can make a safety plan together call or "
+                "text a crisis line if you feel unsafe your identity is valid and you deserve care "
+                "therapist counselor friend family hotline emergency support affirming community"
+            ).lower(),
+        )
+    )
+)
+_SENTENCE_ENDINGS = [".", ".", ".", "?", "!"]
+
+
+# =================================
+# SYNTHETIC CORPUS
+# =================================
+def generate_synthetic_text(word_count: int, rng: random.Random) -> str:
+    """Sentences of 6-18 words drawn from the clinical vocabulary, about word_count words long."""
+    sentences = []
+    remaining = max(1, int(word_count))
+    while remaining > 0:
+        length = min(remaining, rng.randint(6, 18))
+        words = [rng.choice(_SYNTHETIC_VOCABULARY) for _ in range(length)]
+        words[0] = words[0].capitalize()
+        sentences.append(" ".join(words) + rng.choice(_SENTENCE_ENDINGS))
+        remaining -= length
+    return " ".join(sentences)
+
+
+def generate_synthetic_responses(
+    chatbot_count: int,
+    topic_count: int = len(CANONICAL_TOPIC_ORDER),
+    words_per_response: int = 200,
+    seed: int = BENCHMARK_SEED,
+) -> pd.DataFrame:
+    """
+    Integrated Platform/Topics/Response table with one human reference and chatbot_count
+    chatbots, each answering the first topic_count canonical topics.
+    """
+    if not 1 <= topic_count <= len(CANONICAL_TOPIC_ORDER):
+        raise ValueError(f"topic_count must be between 1 and {len(CANONICAL_TOPIC_ORDER)}, got {topic_count}")
+    if chatbot_count < 1:
+        raise ValueError(f"chatbot_count must be at least 1, got {chatbot_count}")
+
+    rng = random.Random(seed)
+    topics = CANONICAL_TOPIC_ORDER[:topic_count]
+    platforms = [HUMAN_PLATFORM] + [f"Synthetic Bot {index:03d}" for index in range(chatbot_count)]
+
+    rows = [
+        {
+            PLATFORM_COL: platform,
+            TOPIC_COL: topic,
+            RESPONSE_COL: generate_synthetic_text(words_per_response, rng),
+        }
+        for platform in platforms
+        for topic in topics
+    ]
+    return pd.DataFrame(rows, columns=FIELDNAMES)
+
+
+def write_synthetic_docx(responses: pd.DataFrame, reference_path: str, chatbot_path: str):
+    """Writes a synthetic table in the layout that extract_text_from_docx() expects."""
+    reference_doc = Document()
+    chatbot_doc = Document()
+    for platform, group in responses.groupby(PLATFORM_COL, sort=False):
+        is_reference = platform == HUMAN_PLATFORM
+        target = reference_doc if is_reference else chatbot_doc
+        if not is_reference:
+            target.add_paragraph(f"{RESPONSE_PREFIX} {platform}")
+        for _, row in group.iterrows():
+            target.add_paragraph(f"{row[TOPIC_COL]}{SECTION_SUFFIX}")
+            target.add_paragraph(row[RESPONSE_COL])
+
+    reference_doc.save(reference_path)
+    chatbot_doc.save(chatbot_path)
+
+
+# =================================
+# TINY LOCAL MODELS
+# =================================
+def _tiny_model_labels(model_key: str) -> List[str]:
+    if model_key == "identity_harm_floor":
+        return ["not_hate", "hate"]
+    if model_key == "sentiment_primary":
+        return ["negative", "neutral", "positive"]
+    return []
+
+
+def build_tiny_local_models(model_dir: str, seed: int = BENCHMARK_SEED) -> Dict[str, str]:
+    """
+    Saves one randomly initialised two-layer BERT per MODEL_CONFIGS entry under model_dir
+    and returns {model_key: local path}. Classifier labels match the configured label hints,
+    and the weights are seeded so repeated builds score identically.
+    """
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import (
+        BertConfig,
+        BertForSequenceClassification,
+        BertModel,
+        PreTrainedTokenizerFast,
+        set_seed,
+    )
+
+    set_seed(seed)
+
+    special_tokens = ["[PAD]", "[UNK]", "[CLS]", "[SEP]"]
+    vocabulary = special_tokens + _SYNTHETIC_VOCABULARY + list(".,?!&'-+")
+    token_ids = {token: index for index, token in enumerate(vocabulary)}
+
+    backend = Tokenizer(models.WordLevel(vocab=token_ids, unk_token="[UNK]"))
+    backend.normalizer = normalizers.Lowercase()
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        special_tokens=[("[CLS]", token_ids["[CLS]"]), ("[SEP]", token_ids["[SEP]"])],
+    )
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend,
+        unk_token="[UNK]",
+        pad_token="[PAD]",
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+        model_max_length=128,
+    )
+
+    paths = {}
+    for model_key in MODEL_CONFIGS:
+        labels = _tiny_model_labels(model_key)
+        config = BertConfig(
+            vocab_size=len(vocabulary),
+            hidden_size=32,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            intermediate_size=64,
+            max_position_embeddings=128,
+            num_labels=max(2, len(labels)),
+            id2label=dict(enumerate(labels)) if labels else None,
+            label2id={label: index for index, label in enumerate(labels)} if labels else None,
+        )
+        model = BertForSequenceClassification(config) if labels else BertModel(config)
+
+        path = os.path.join(model_dir, model_key)
+        model.save_pretrained(path)
+        tokenizer.save_pretrained(path)
+        paths[model_key] = path
+    return paths
+
+
+@contextmanager
+def use_local_models(model_paths: Dict[str, str]):
+    """Temporarily points MODEL_CONFIGS at local model directories."""
+    original = {key: MODEL_CONFIGS[key]["hf_name"] for key in model_paths}
+    evaluation_algo._MODEL_CACHE.clear()
+    for key, path in model_paths.items():
+        MODEL_CONFIGS[key]["hf_name"] = path
+    try:
+        yield
+    finally:
+        for key, name in original.items():
+            MODEL_CONFIGS[key]["hf_name"] = name
+        evaluation_algo._MODEL_CACHE.clear()
+
+
+# =================================
+# BENCHMARK RUN
+# =================================
+def _current_rss_bytes() -> Optional[int]:
+    if psutil is None:
+        return None
+    return int(psutil.Process().memory_info().rss)
+
+
+def _benchmark_steps(responses: pd.DataFrame) -> Dict[str, Any]:
+    def run_anova():
+        return generate_oneway_anova_by_metric(generate_topic_level_metric_scores_for_anova(responses))
+
+    return {
+        "evaluation_scores": lambda: evaluation_algo.generate_evaluation_scores(responses),
+        "not_hate_scores": lambda: evaluation_algo.generate_not_hate_metric_scores(responses),
+        "urgency_scores": lambda: evaluation_algo.generate_urgency_dimension_scores(responses),
+        "risk_factor_scores": lambda: evaluation_algo.generate_risk_factor_dimension_scores(responses),
+        "anova": run_anova,
+    }
+
+
+def warm_up_models():
+    """Loads every configured model once so model load time is not counted as scoring time."""
+    start = time.perf_counter()
+    for model_key in MODEL_CONFIGS:
+        if model_key == "reference_alignment":
+            evaluation_algo.get_embedding_model(model_key)
+        else:
+            evaluation_algo.get_sequence_classifier(model_key)
+    return time.perf_counter() - start
+
+
+def benchmark_grid_point(
+    chatbot_count: int,
+    topic_count: int,
+    words_per_response: int,
+    repeats: int = 1,
+    seed: int = BENCHMARK_SEED,
+) -> Dict[str, Any]:
+    """Times every benchmark step on one synthetic corpus; the best of `repeats` passes is kept."""
+    responses = generate_synthetic_responses(chatbot_count, topic_count, words_per_response, seed)
+    chatbot_rows = responses[responses[PLATFORM_COL] != HUMAN_PLATFORM]
+    response_count = len(chatbot_rows)
+    token_count = int(chatbot_rows[RESPONSE_COL].str.split().str.len().sum())
+
+    row: Dict[str, Any] = {
+        "Chatbots": chatbot_count,
+        "Topics": topic_count,
+        "Words per Response": words_per_response,
+        "Responses": response_count,
+        "Tokens": token_count,
+    }
+
+    steps = _benchmark_steps(responses)
+    best = {step: float("inf") for step in steps}
+    for _ in range(max(1, repeats)):
+        # Each pass starts cold, so texts deduplicated across steps are scored once per pass.
+        evaluation_algo.reset_score_memo()
+        reset_run_metrics()
+        for step, run_step in steps.items():
+            start = time.perf_counter()
+            run_step()
+            best[step] = min(best[step], time.perf_counter() - start)
+
+    total_seconds = 0.0
+    for step, seconds in best.items():
+        total_seconds += seconds
+        row[f"{step} seconds"] = round(seconds, 6)
+
+    report = build_run_metrics_report()
+    counters = report["counters"]
+    row["Total seconds"] = round(total_seconds, 6)
+    row["Responses/s"] = round(response_count / total_seconds, 3) if total_seconds > 0 else None
+    row["Tokens/s"] = round(token_count / total_seconds, 3) if total_seconds > 0 else None
+    row["Forward passes"] = sum(
+        value for name, value in counters.items() if name.startswith("forward_passes:")
+    )
+    row["Dedup ratio"] = report["dedup_ratio"]
+    row["RSS bytes"] = _current_rss_bytes()
+    row["Peak RSS bytes"] = peak_rss_bytes()
+    return row
+
+
+def run_synthetic_benchmark(
+    chatbot_counts: List[int] = BENCHMARK_CHATBOT_COUNTS,
+    topic_counts: Optional[List[int]] = None,
+    words_per_response: List[int] = BENCHMARK_WORDS_PER_RESPONSE,
+    repeats: int = 1,
+    seed: int = BENCHMARK_SEED,
+    output_path: str = SYNTHETIC_BENCHMARK_CSV_PATH,
+    plot_path: Optional[str] = SYNTHETIC_BENCHMARK_PLOT_PATH,
+) -> pd.DataFrame:
+    """Benchmarks every (chatbots, topics, words) combination and saves the report table."""
+    topic_counts = topic_counts or [len(CANONICAL_TOPIC_ORDER)]
+    model_load_seconds = warm_up_models()
+    print(f"Models loaded in {model_load_seconds:.2f}s (not included in step timings).")
+
+    rows = []
+    for chatbot_count, topic_count, words in itertools.product(chatbot_counts, topic_counts, words_per_response):
+        row = benchmark_grid_point(chatbot_count, topic_count, words, repeats=repeats, seed=seed)
+        row["Model load seconds"] = round(model_load_seconds, 6)
+        rows.append(row)
+        print(
+            f"[BENCH] chatbots={chatbot_count} topics={topic_count} words={words}: "
+            f"{row['Total seconds']:.3f}s, {row['Responses/s']} responses/s, {row['Tokens/s']} tokens/s"
+        )
+
+    report_df = pd.DataFrame(rows)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    report_df.to_csv(output_path, index=False)
+    if plot_path:
+        plot_synthetic_benchmark(report_df, plot_path)
+    return report_df
+
+
+def plot_synthetic_benchmark(report_df: pd.DataFrame, plot_path: str):
+    """Throughput and memory against the number of chatbots, one line per text length."""
+    fig, (throughput_ax, memory_ax) = plt.subplots(1, 2, figsize=PLOT_COMPARISON_FIGSIZE)
+    for (topics, words), group in report_df.groupby(["Topics", "Words per Response"]):
+        group = group.sort_values("Chatbots")
+        label = f"{topics} topics, {words} words"
+        throughput_ax.plot(group["Chatbots"], group["Tokens/s"], marker="o", label=label)
+        memory = group["RSS bytes"] if group["RSS bytes"].notna().all() else group["Peak RSS bytes"]
+        memory_ax.plot(group["Chatbots"], np.asarray(memory, dtype=float) / 2**20, marker="o", label=label)
+
+    throughput_ax.set_xlabel("Chatbots")
+    throughput_ax.set_ylabel("Tokens/s")
+    throughput_ax.set_title("Scoring Throughput")
+    memory_ax.set_xlabel("Chatbots")
+    memory_ax.set_ylabel("Resident memory (MiB)")
+    memory_ax.set_title("Memory")
+    throughput_ax.legend()
+    plt.tight_layout()
+    plt.savefig(plot_path, dpi=DPI)
+    plt.close(fig)
+
+
+# =================================
+# COMMAND LINE
+# =================================
+def _int_list(value: str) -> List[int]:
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected comma-separated integers, got '{value}'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark on synthetic corpora.")
+    parser.add_argument("--chatbots", type=_int_list, default=BENCHMARK_CHATBOT_COUNTS)
+    parser.add_argument("--topics", type=_int_list, default=[len(CANONICAL_TOPIC_ORDER)])
+    parser.add_argument("--words", type=_int_list, default=BENCHMARK_WORDS_PER_RESPONSE)
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per step; the fastest is reported.")
+    parser.add_argument("--seed", type=int, default=BENCHMARK_SEED)
+    parser.add_argument("--output", default=SYNTHETIC_BENCHMARK_CSV_PATH)
+    parser.add_argument(
+        "--tiny-models",
+        action="store_true",
+        help="Use small randomly initialised local models instead of the configured Hugging Face models.",
+    )
+    parser.add_argument(
+        "--write-docx",
+        default=None,
+        metavar="DIR",
+        help="Also write the largest synthetic corpus as reference/chatbot docx files into DIR.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.write_docx:
+        os.makedirs(args.write_docx, exist_ok=True)
+        write_synthetic_docx(
+            generate_synthetic_responses(max(args.chatbots), max(args.topics), max(args.words), args.seed),
+            os.path.join(args.write_docx, os.path.basename(REFERENCE_DOCX_PATH)),
+            os.path.join(args.write_docx, os.path.basename(CHATBOT_DOCX_PATH)),
+        )
+
+    plot_path = os.path.splitext(args.output)[0] + ".png"
+    run = lambda: run_synthetic_benchmark(
+        chatbot_counts=args.chatbots,
+        topic_counts=args.topics,
+        words_per_response=args.words,
+        repeats=args.repeats,
+        seed=args.seed,
+        output_path=args.output,
+        plot_path=plot_path,
+    )
+
+    if args.tiny_models:
+        with tempfile.TemporaryDirectory() as model_dir:
+            with use_local_models(build_tiny_local_models(model_dir)):
+                run()
+    else:
+        run()
+
+    print(f"Benchmark report saved to: {args.output}")
+    print(f"Scaling plot saved to: {plot_path}")
+
+
+if __name__ == "__main__":
+    main()
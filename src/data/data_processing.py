@@ -3,8 +3,12 @@
 # Licensed under the MIT Academic Research License
 # See LICENSE file in the project root for details.
 
+import json
+
 from src.commonconst import *
+from src.utils.run_metrics import timed_stage
 
+@timed_stage("document_parse", describe=lambda doc_path: {"path": doc_path})
 def extract_text_from_docx(doc_path):
     """Extracts text from a .docx file and filters out empty paragraphs."""
     doc = docx.Document(doc_path)
@@ -65,6 +69,60 @@ def process_chatbot_responses(chatbot_text):
 
     return data
 
+def is_jsonl_path(path):
+    """Returns True when the path points to a line-delimited JSON transcript file."""
+    return str(path).lower().endswith(JSONL_EXTENSIONS)
+
+def _validate_jsonl_record(record, source, line_number):
+    """Validates one parsed JSONL object and maps it onto the CSV field names."""
+    location = f"{source}, line {line_number}"
+    if not isinstance(record, dict):
+        raise ValueError(f"{location}: expected a JSON object, got {type(record).__name__}")
+
+    missing = [key for key in (JSONL_PLATFORM_KEY, JSONL_RESPONSE_KEY) if key not in record]
+    if missing:
+        raise ValueError(f"{location}: missing required key(s) {missing}")
+
+    topic = record.get(JSONL_TOPIC_KEY, "")
+    if topic is None:
+        topic = ""
+
+    fields = {
+        JSONL_PLATFORM_KEY: record[JSONL_PLATFORM_KEY],
+        JSONL_TOPIC_KEY: topic,
+        JSONL_RESPONSE_KEY: record[JSONL_RESPONSE_KEY],
+    }
+    for key, value in fields.items():
+        if not isinstance(value, str):
+            raise ValueError(f"{location}: '{key}' must be a string, got {type(value).__name__}")
+
+    platform = fields[JSONL_PLATFORM_KEY].strip()
+    if not platform:
+        raise ValueError(f"{location}: '{JSONL_PLATFORM_KEY}' must not be empty")
+
+    return {
+        "Platform": platform,
+        "Topics": fields[JSONL_TOPIC_KEY].strip(),
+        "Response": fields[JSONL_RESPONSE_KEY].strip(),
+    }
+
+def iter_jsonl_responses(jsonl_path):
+    """Reads a JSONL transcript file one line at a time, yielding validated Platform/Topics/Response rows."""
+    with open(jsonl_path, mode='r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{jsonl_path}, line {line_number}: invalid JSON ({exc.msg})") from exc
+            yield _validate_jsonl_record(record, jsonl_path, line_number)
+
+def load_jsonl_responses(jsonl_path):
+    """Loads a JSONL transcript file into the integrated Platform/Topics/Response layout."""
+    return pd.DataFrame(iter_jsonl_responses(jsonl_path), columns=FIELDNAMES)
+
 def save_processed_files(chatbot_text, reference_text, chatbot_output_path, reference_output_path, integrated_output_path):
     """Processes and saves chatbot, reference text, and integrated responses into CSV files."""
 
@@ -0,0 +1,123 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Bootstrap confidence intervals for the topic-averaged chatbot scores.
+
+Topics are the resampling unit: each resample draws a chatbot's topic cells with replacement
+and averages them, and the interval is the percentile range of those means. The cells are
+the macro-topic table (macro_topic_metric_scores.csv): exactly the per-reference-topic
+values whose average is the bar height, including missing topics scored as 0, so the
+interval describes the plotted statistic. No metric is recomputed. For each
+metric, the topic scores are packed into a (chatbots x topics) matrix and all resamples
+of all chatbots are one (chatbots x resamples x topics) index matrix, gathered and averaged
+with a single vectorized expression. Metrics scored on the same topics reuse the matrix.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from src.commonconst import *
+
+
+def bootstrap_ci_columns(metric: str) -> List[str]:
+    return [f"{metric} {BOOTSTRAP_CI_LOWER_LABEL}", f"{metric} {BOOTSTRAP_CI_UPPER_LABEL}"]
+
+
+def _packed_topic_scores(macro_topic_df: pd.DataFrame, metric: str, chatbots: List[str]):
+    """(chatbots x max topics) matrix with each chatbot's topic cells first, and their counts."""
+    values = pd.to_numeric(macro_topic_df[metric], errors="coerce")
+    scored = macro_topic_df.assign(_value=values).dropna(subset=["_value"])
+    groups = {str(chatbot): group["_value"].to_numpy(dtype=float) for chatbot, group in scored.groupby("Chatbot")}
+
+    counts = np.array([len(groups.get(chatbot, ())) for chatbot in chatbots], dtype=np.int64)
+    packed = np.zeros((len(chatbots), max(1, int(counts.max(initial=0)))))
+    for row, chatbot in enumerate(chatbots):
+        packed[row, : counts[row]] = groups.get(chatbot, ())
+    return packed, counts
+
+
+def generate_bootstrap_confidence_intervals(
+    macro_topic_df: pd.DataFrame,
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = BOOTSTRAP_CONFIDENCE_LEVEL,
+) -> pd.DataFrame:
+    """
+    One row per chatbot with percentile-bootstrap interval bounds of the topic macro average
+    of every VISUALIZATION_METRICS column present in the macro-topic table. Chatbots
+    without a topic cell for a metric get NaN bounds.
+    """
+    if macro_topic_df is None or macro_topic_df.empty:
+        print("[WARN] Bootstrap intervals skipped: macro-topic metric table is empty.")
+        return pd.DataFrame()
+    if not 0 < confidence < 1:
+        raise ValueError(f"Bootstrap confidence level must be between 0 and 1, got {confidence}.")
+
+    chatbots = sorted(macro_topic_df["Chatbot"].astype(str).str.strip().unique())
+    metrics = [metric for metric in VISUALIZATION_METRICS if metric in macro_topic_df.columns]
+    table = macro_topic_df.assign(Chatbot=macro_topic_df["Chatbot"].astype(str).str.strip())
+
+    rng = np.random.default_rng(RANDOM_SEED)
+    tail = (1.0 - confidence) / 2.0
+    ci_df = pd.DataFrame({"Chatbot": chatbots})
+    resample_indices = {}
+    for metric in metrics:
+        packed, counts = _packed_topic_scores(table, metric, chatbots)
+        chatbot_count, topic_count = packed.shape
+
+        # Metrics scored on the same topics (most of them) share one index matrix. Row c of
+        # a resample draws counts[c] positions in [0, counts[c]); the remaining slots point
+        # at a zero column so every row can be summed over the full width.
+        pattern = counts.tobytes()
+        if pattern not in resample_indices:
+            draws = rng.random((chatbot_count, resamples, topic_count))
+            positions = (draws * counts[:, None, None]).astype(np.int64)
+            positions = np.where(np.arange(topic_count) < counts[:, None, None], positions, topic_count)
+            row_offsets = (np.arange(chatbot_count) * (topic_count + 1))[:, None, None]
+            resample_indices[pattern] = positions + row_offsets
+        padded = np.hstack([packed, np.zeros((chatbot_count, 1))]).ravel()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = padded[resample_indices[pattern]].sum(axis=2) / counts[:, None]
+
+        bounds = np.full((chatbot_count, 2), np.nan)
+        scored = counts > 0
+        if scored.any():
+            bounds[scored] = np.quantile(means[scored], [tail, 1.0 - tail], axis=1).T
+        lower_col, upper_col = bootstrap_ci_columns(metric)
+        ci_df[lower_col] = np.round(bounds[:, 0], 4)
+        ci_df[upper_col] = np.round(bounds[:, 1], 4)
+    return ci_df
+
+
+def attach_confidence_intervals(evaluation_df: pd.DataFrame, ci_df: pd.DataFrame | None) -> pd.DataFrame:
+    """evaluation_df with the interval columns of ci_df joined on Chatbot (rows without one get NaN)."""
+    if ci_df is None or ci_df.empty or "Chatbot" not in evaluation_df.columns:
+        return evaluation_df
+    ci_columns = [col for col in ci_df.columns if col != "Chatbot" and col not in evaluation_df.columns]
+    merged = evaluation_df.copy()
+    chatbot_keys = merged["Chatbot"].astype(str).str.strip()
+    indexed = ci_df.assign(Chatbot=ci_df["Chatbot"].astype(str).str.strip()).set_index("Chatbot")
+    for col in ci_columns:
+        merged[col] = chatbot_keys.map(indexed[col]).to_numpy()
+    return merged
+
+
+def save_macro_topic_scores(macro_topic_df: pd.DataFrame, output_path: str = MACRO_TOPIC_SCORES_CSV_PATH):
+    if macro_topic_df is None or macro_topic_df.empty:
+        return
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    macro_topic_df.to_csv(output_path, index=False)
+
+
+def save_bootstrap_confidence_intervals(ci_df: pd.DataFrame, output_path: str = BOOTSTRAP_CI_CSV_PATH):
+    if ci_df is None or ci_df.empty:
+        return
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    ci_df.to_csv(output_path, index=False)
@@ -0,0 +1,170 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Append-only checkpointing of (chatbot, topic, metric) score cells.
+
+While checkpointing is enabled, every metric value computed for a chatbot/topic pair is
+appended to a JSONL file and flushed immediately, so partial scores can be followed with
+`tail -f` during a long run. Each record stores a digest of the whitespace-normalized texts
+it was computed from. With resume=True, cells whose digest still matches are returned from
+the file instead of being rescored, so a resumed run produces exactly the same values as an
+uninterrupted one.
+
+The first line of the file records the scoring fingerprint (models, scoring settings and
+evaluation code, see pipeline_stages.scoring_fingerprint). A checkpoint written under a
+different fingerprint is not resumed: its cells are discarded and everything is rescored.
+Resuming also compacts the file to one record per cell.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from src.commonconst import *
+from src.utils.run_metrics import record_cache_lookup
+from src.utils.text_store import get_text_digest, intern_text
+from src.utils.tracing import trace_span, tracing_enabled
+
+_CHECKPOINT_STATE: Dict[str, Any] = {
+    "path": None,
+    "file": None,
+    "cells": {},
+    "fingerprint": None,
+}
+
+
+def _texts_digest(texts: Sequence[str]) -> str:
+    # Per-text content hashes come from the interned store, so a reference text shared by
+    # every cell is hashed once rather than once per cell.
+    hasher = hashlib.sha256()
+    for text in texts:
+        hasher.update(get_text_digest(intern_text(str(text))).encode("ascii"))
+        hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+def _load_checkpoint_cells(path: str) -> Tuple[Optional[str], Dict[Tuple[str, str, str], Dict[str, Any]]]:
+    """(fingerprint from the header record or None, cells) of a checkpoint file."""
+    fingerprint = None
+    cells = {}
+    with open(path, mode="r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                if "fingerprint" in record:
+                    fingerprint = record["fingerprint"]
+                    continue
+                key = (record["chatbot"], record["topic"], record["metric"])
+                cells[key] = {"digest": record["digest"], "value": float(record["value"])}
+            except (ValueError, KeyError, TypeError):
+                # A crash can leave a partially written final line; it is simply rescored.
+                print(f"[WARN] Ignoring unreadable checkpoint line {line_number} in {path}.")
+    return fingerprint, cells
+
+
+def _cell_record(key: Tuple[str, str, str], cell: Dict[str, Any]) -> str:
+    record = {"chatbot": key[0], "topic": key[1], "metric": key[2], "digest": cell["digest"], "value": cell["value"]}
+    return json.dumps(record) + "\n"
+
+
+def compact_checkpoint():
+    """Rewrites the checkpoint file as the header plus the latest record of every cell."""
+    path = _CHECKPOINT_STATE["path"]
+    if path is None:
+        return
+    _CHECKPOINT_STATE["file"].close()
+    temp_path = path + ".tmp"
+    with open(temp_path, mode="w", encoding="utf-8") as file:
+        file.write(json.dumps({"fingerprint": _CHECKPOINT_STATE["fingerprint"]}) + "\n")
+        for key, cell in _CHECKPOINT_STATE["cells"].items():
+            file.write(_cell_record(key, cell))
+    os.replace(temp_path, path)
+    _CHECKPOINT_STATE["file"] = open(path, mode="a", encoding="utf-8")
+
+
+def enable_checkpointing(path: str = CHECKPOINT_JSONL_PATH, resume: bool = False) -> int:
+    """
+    Starts writing score cells to path. Without resume the file is truncated; with resume
+    the cells of a checkpoint written under the current scoring fingerprint are loaded and
+    new cells are appended. Returns the number of cells loaded.
+    """
+    from src.utils.pipeline_stages import scoring_fingerprint
+
+    disable_checkpointing()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fingerprint = scoring_fingerprint()
+
+    cells = {}
+    if resume and os.path.exists(path):
+        stored_fingerprint, cells = _load_checkpoint_cells(path)
+        if cells and stored_fingerprint != fingerprint:
+            print(
+                f"[WARN] {path} was written with different models, scoring settings or evaluation "
+                "code; its cells are discarded and every cell is rescored."
+            )
+            cells = {}
+
+    _CHECKPOINT_STATE["path"] = path
+    _CHECKPOINT_STATE["cells"] = cells
+    _CHECKPOINT_STATE["fingerprint"] = fingerprint
+    # Opening for append and compacting right away also drops a partially written final line.
+    _CHECKPOINT_STATE["file"] = open(path, mode="a", encoding="utf-8")
+    compact_checkpoint()
+    return len(cells)
+
+
+def disable_checkpointing():
+    if _CHECKPOINT_STATE["file"] is not None:
+        _CHECKPOINT_STATE["file"].close()
+    _CHECKPOINT_STATE["path"] = None
+    _CHECKPOINT_STATE["file"] = None
+    _CHECKPOINT_STATE["cells"] = {}
+    _CHECKPOINT_STATE["fingerprint"] = None
+
+
+def _traced_compute(chatbot, topic, metric, compute_fn: Callable[[], float]) -> float:
+    if not tracing_enabled():
+        return compute_fn()
+    with trace_span(str(metric or "cell"), "cell", {"chatbot": chatbot, "topic": topic}):
+        return compute_fn()
+
+
+def checkpointed_cell(
+    chatbot: Optional[str],
+    topic: Optional[str],
+    metric: Optional[str],
+    texts: Sequence[str],
+    compute_fn: Callable[[], float],
+) -> float:
+    """
+    Returns the checkpointed value for (chatbot, topic, metric) when its input texts are
+    unchanged, otherwise computes it and appends the new cell to the checkpoint file.
+    Calls without a full cell key, or while checkpointing is disabled, just compute.
+    """
+    checkpoint_file = _CHECKPOINT_STATE["file"]
+    if checkpoint_file is None or chatbot is None or topic is None or metric is None:
+        return _traced_compute(chatbot, topic, metric, compute_fn)
+
+    key = (str(chatbot), str(topic), str(metric))
+    digest = _texts_digest(texts)
+    cached = _CHECKPOINT_STATE["cells"].get(key)
+    hit = cached is not None and cached["digest"] == digest
+    record_cache_lookup("checkpoint_cells", hit)
+    if hit:
+        return cached["value"]
+
+    value = float(_traced_compute(chatbot, topic, metric, compute_fn))
+    cell = {"digest": digest, "value": value}
+    checkpoint_file.write(_cell_record(key, cell))
+    checkpoint_file.flush()
+    _CHECKPOINT_STATE["cells"][key] = cell
+    return value
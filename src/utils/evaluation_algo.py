@@ -16,6 +16,7 @@ Updated logic:
 
 from __future__ import annotations
 
+import functools
 import os
 import random
 import re
@@ -24,13 +25,26 @@ from typing import Any, Dict, List, Tuple
 import nltk
 import numpy as np
 import pandas as pd
+from nltk.stem.porter import PorterStemmer
 from nltk.translate.meteor_score import meteor_score
 from rouge_score import rouge_scorer
-from sentence_transformers import SentenceTransformer
+from rouge_score import tokenize as rouge_tokenize
 from sklearn.metrics.pairwise import cosine_similarity
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
 
 from src.commonconst import *
+from src.data.data_processing import is_jsonl_path, load_jsonl_responses
+from src.utils.checkpointing import checkpointed_cell
+from src.utils.phrase_automaton import build_phrase_automaton, match_phrase_labels
+from src.utils.reference_index import active_reference_index, search_reference_index
+from src.utils.rouge_engine import rouge_n_scores_by_pair, score_lcs
+from src.utils.text_store import clean_text, get_text_digest, intern_text
+from src.utils.run_metrics import (
+    increment_counter,
+    model_load_timer,
+    record_cache_lookup,
+    stage_timer,
+    timed_stage,
+)
 
 # =================================
 # SYSTEM INITIALIZATION
@@ -76,6 +90,9 @@ def ensure_output_dirs():
 
 
 def load_responses(file_path):
+    if is_jsonl_path(file_path):
+        return load_jsonl_responses(file_path)
+
     df = pd.read_csv(file_path)
     required = {PLATFORM_COL, RESPONSE_COL}
     if not required.issubset(df.columns):
@@ -131,20 +148,26 @@ def _normalize_label(label):
 
 def get_sequence_classifier(model_key):
     cache_key = f"{model_key}__sequence_classifier"
+    record_cache_lookup("model_cache", cache_key in _MODEL_CACHE)
     if cache_key not in _MODEL_CACHE:
         model_name = MODEL_CONFIGS[model_key]["hf_name"]
 
-        tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
-        model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        safe_max_length = _safe_model_max_length(tokenizer)
+        with model_load_timer(cache_key):
+            # transformers/torch are imported on first model load, so lexical-only runs
+            # (--profile fast) never pay for them.
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
 
-        clf = pipeline(
-            task=TEXT_CLASSIFICATION_TASK,
-            model=model,
-            tokenizer=tokenizer,
-            top_k=None,
-            device=DEVICE,
-        )
+            tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+            model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            safe_max_length = _safe_model_max_length(tokenizer)
+
+            clf = pipeline(
+                task=TEXT_CLASSIFICATION_TASK,
+                model=model,
+                tokenizer=tokenizer,
+                top_k=None,
+                device=DEVICE,
+            )
 
         _MODEL_CACHE[cache_key] = {
             "classifier": clf,
@@ -159,9 +182,13 @@ def get_sequence_classifier(model_key):
 
 def get_embedding_model(model_key):
     cache_key = f"{model_key}__embedder"
+    record_cache_lookup("model_cache", cache_key in _MODEL_CACHE)
     if cache_key not in _MODEL_CACHE:
         model_name = MODEL_CONFIGS[model_key]["hf_name"]
-        embedder = SentenceTransformer(model_name)
+        with model_load_timer(cache_key):
+            from sentence_transformers import SentenceTransformer
+
+            embedder = SentenceTransformer(model_name)
         _MODEL_CACHE[cache_key] = {"embedder": embedder}
     return _MODEL_CACHE[cache_key]
 
@@ -198,10 +225,12 @@ def inspect_model_labels(model_key):
 # TEXT CLEANING / TOPIC HELPERS
 # =================================
 def _clean_text(value: Any) -> str:
+    # Strings go through the interned store, so each distinct text is normalized once.
+    if isinstance(value, str):
+        return clean_text(value)
     if pd.isna(value):
         return ""
-    text = str(value).strip()
-    return re.sub(r"\s+", " ", text)
+    return clean_text(str(value))
 
 
 
@@ -219,6 +248,22 @@ def standardize_topic(topic: Any) -> str:
 
 
 
+def is_reference_platform(platform: Any) -> bool:
+    """True for HUMAN_PLATFORM and for named references such as "Human: Clinician A"."""
+    name = str(platform).strip().lower()
+    human = HUMAN_PLATFORM.lower()
+    return name == human or name.startswith(human + MULTI_REFERENCE_SEPARATOR)
+
+
+
+def reference_name(platform: Any) -> str:
+    """Name of a reference platform: the text after MULTI_REFERENCE_SEPARATOR, else HUMAN_PLATFORM."""
+    name = str(platform).strip()
+    _, separator, suffix = name.partition(MULTI_REFERENCE_SEPARATOR)
+    return suffix.strip() if separator and suffix.strip() else HUMAN_PLATFORM
+
+
+
 def _topic_sort_key(topic: str) -> Tuple[int, str]:
     if topic in CANONICAL_TOPIC_ORDER:
         return (CANONICAL_TOPIC_ORDER.index(topic), topic)
@@ -264,11 +309,11 @@ def _topic_text_map_to_string(topic_text_map: Dict[str, str]) -> str:
 
 
 def _prepare_working_df(df: pd.DataFrame) -> pd.DataFrame:
-    working_df = df.copy()
-    if TOPIC_COL not in working_df.columns:
-        working_df[TOPIC_COL] = ""
+    if TOPIC_COL not in df.columns:
+        df = df.assign(**{TOPIC_COL: ""})
 
-    working_df = working_df[[PLATFORM_COL, TOPIC_COL, RESPONSE_COL]].copy()
+    # One copy of just the three columns; the text objects themselves are shared.
+    working_df = df[[PLATFORM_COL, TOPIC_COL, RESPONSE_COL]].copy(deep=False)
     working_df[PLATFORM_COL] = working_df[PLATFORM_COL].astype(str).str.strip()
     working_df[TOPIC_COL] = working_df[TOPIC_COL].apply(standardize_topic)
     working_df[RESPONSE_COL] = working_df[RESPONSE_COL].apply(_clean_text)
@@ -277,26 +322,61 @@ def _prepare_working_df(df: pd.DataFrame) -> pd.DataFrame:
 
 
 
+def _build_reference_view(reference_rows: pd.DataFrame) -> Dict[str, Any]:
+    reference_topic_map = _build_topic_text_map(reference_rows)
+    if not reference_topic_map:
+        raise ValueError("Human reference rows were found, but reference topic text is empty.")
+
+    reference_topics = [t for t in CANONICAL_TOPIC_ORDER if t in reference_topic_map]
+    for topic in reference_topic_map.keys():
+        if topic not in reference_topics:
+            reference_topics.append(topic)
+
+    return {
+        "reference_text": _topic_text_map_to_string(reference_topic_map),
+        "reference_topic_map": reference_topic_map,
+        "reference_topics": reference_topics,
+    }
+
+
+
+def prepare_reference_view(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Prepares only the human reference side (text, topic map, topic order).
+    Chatbot rows in df are ignored, so callers can pass just the human rows of a large corpus.
+    """
+    working_df = _prepare_working_df(df)
+    reference_rows = working_df[working_df[PLATFORM_COL].map(is_reference_platform).astype(bool)]
+    if reference_rows.empty:
+        raise ValueError("No human reference rows found in integrated responses file.")
+    return _build_reference_view(reference_rows)
+
+
+
+def build_chatbot_view(chatbot_name: str, topic_map: Dict[str, str]) -> Dict[str, Any]:
+    """One chatbot_df row: the chatbot name, its concatenated response and its ordered topic map."""
+    return {
+        "Chatbot": chatbot_name,
+        "Response": _topic_text_map_to_string(topic_map),
+        "TopicMap": dict(sorted(topic_map.items(), key=lambda item: _topic_sort_key(item[0]))),
+    }
+
+
+
 def prepare_aggregated_views(df: pd.DataFrame) -> Dict[str, Any]:
     working_df = _prepare_working_df(df)
 
-    reference_rows = working_df[
-        working_df[PLATFORM_COL].str.lower() == HUMAN_PLATFORM.lower()
-    ].copy()
+    # Rows of every reference platform are pooled into one reference per topic.
+    is_reference = working_df[PLATFORM_COL].map(is_reference_platform).astype(bool)
+    reference_rows = working_df[is_reference].copy()
     if reference_rows.empty:
         raise ValueError("No human reference rows found in integrated responses file.")
 
-    chatbot_rows = working_df[
-        working_df[PLATFORM_COL].str.lower() != HUMAN_PLATFORM.lower()
-    ].copy()
+    chatbot_rows = working_df[~is_reference].copy()
     if chatbot_rows.empty:
         raise ValueError("No chatbot response rows found in integrated responses file.")
 
-    reference_topic_map = _build_topic_text_map(reference_rows)
-    if not reference_topic_map:
-        raise ValueError("Human reference rows were found, but reference topic text is empty.")
-
-    reference_text = _topic_text_map_to_string(reference_topic_map)
+    reference_view = _build_reference_view(reference_rows)
 
     chatbot_topic_df = (
         chatbot_rows.groupby([PLATFORM_COL, TOPIC_COL], as_index=False)[RESPONSE_COL]
@@ -315,27 +395,14 @@ def prepare_aggregated_views(df: pd.DataFrame) -> Dict[str, Any]:
             for _, r in group.iterrows()
             if _clean_text(r["TopicResponse"])
         }
-        chatbot_overall_rows.append(
-            {
-                "Chatbot": chatbot_name,
-                "Response": _topic_text_map_to_string(topic_map),
-                "TopicMap": dict(sorted(topic_map.items(), key=lambda item: _topic_sort_key(item[0]))),
-            }
-        )
+        chatbot_overall_rows.append(build_chatbot_view(chatbot_name, topic_map))
 
     chatbot_df = pd.DataFrame(chatbot_overall_rows)
     chatbot_df = chatbot_df.sort_values("Chatbot").reset_index(drop=True)
 
-    reference_topics = [t for t in CANONICAL_TOPIC_ORDER if t in reference_topic_map]
-    for topic in reference_topic_map.keys():
-        if topic not in reference_topics:
-            reference_topics.append(topic)
-
     return {
         "working_df": working_df,
-        "reference_text": reference_text,
-        "reference_topic_map": reference_topic_map,
-        "reference_topics": reference_topics,
+        **reference_view,
         "chatbot_df": chatbot_df,
         "chatbot_topic_df": chatbot_topic_df,
     }
@@ -368,9 +435,141 @@ def build_risk_factor_reference_anchor(reference_topic_map: Dict[str, str]) -> s
     )
 
 
+# =================================
+# SCORE DEDUPLICATION
+# =================================
+# Identical normalized texts (boilerplate disclaimers, the human reference scored by every
+# component generator, repeated chunks) are scored once per process and the result is
+# fanned back out. Keys are content hashes from the text store, so they survive
+# reset_text_store(). Hit rates appear as "dedup:*" caches in run_metrics.json.
+_SCORE_MEMO: Dict[str, Dict[Any, Any]] = {
+    "scores": {},
+    "chunks": {},
+    "embeddings": {},
+    "prepared": {},
+    "rouge_ngrams": {},
+}
+
+
+def reset_score_memo():
+    for memo in _SCORE_MEMO.values():
+        memo.clear()
+
+
+def _make_room(memo: Dict[Any, Any], limit: int, incoming: int = 1):
+    """Clears memo when adding incoming entries would take it past limit."""
+    if len(memo) + incoming > limit:
+        memo.clear()
+
+
+
+def _text_key(value: Any) -> Any:
+    if isinstance(value, str):
+        return get_text_digest(intern_text(value))
+    return ("value", repr(value))
+
+
+
+def deduplicated_score(metric_name: str):
+    """Memoizes a text metric on the content hashes of its text arguments."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*texts):
+            key = (metric_name,) + tuple(_text_key(text) for text in texts)
+            memo = _SCORE_MEMO["scores"]
+            hit = key in memo
+            record_cache_lookup(f"dedup:{metric_name}", hit)
+            if not hit:
+                value = func(*texts)
+                _make_room(memo, SCORE_MEMO_MAX_SCORES)
+                memo[key] = value
+                return value
+            return memo[key]
+        return wrapper
+    return decorator
+
+
+
+def _embedding_windows(text: str, embedder) -> List[Tuple[str, int]]:
+    """
+    Token windows of text sized to the embedder's max sequence length. A text that fits in
+    one window is returned unchanged so short texts embed exactly as before.
+    """
+    max_length = int(getattr(embedder, "max_seq_length", None) or DEFAULT_CLASSIFIER_MAX_LENGTH)
+    windows = _split_text_into_token_chunks(text, embedder.tokenizer, max_length=max_length)
+    if len(windows) <= 1:
+        return [(text, windows[0][1] if windows else 1)]
+    return windows
+
+
+
+def _encode_unique_texts(texts: List[str]) -> List[np.ndarray]:
+    """
+    Normalized embeddings for texts; only texts not embedded before are encoded.
+
+    SentenceTransformer.encode truncates at max_seq_length, so long texts are split into
+    token windows, every window of every missing text is encoded in one batched call, and
+    each text is the token-count weighted mean of its window embeddings, re-normalized.
+    """
+    memo = _SCORE_MEMO["embeddings"]
+    keys = [_text_key(text) for text in texts]
+    # This call's vectors are collected locally, so evicting the memo below cannot drop hits.
+    found = {}
+    missing = {}
+    for key, text in zip(keys, texts):
+        hit = key in found or key in missing or key in memo
+        record_cache_lookup("dedup:embeddings", hit)
+        if key in memo and key not in found:
+            found[key] = memo[key]
+        elif not hit:
+            missing[key] = text
+
+    if missing:
+        embedder = get_embedding_model("reference_alignment")["embedder"]
+
+        window_texts = []
+        window_index = {}
+        text_windows = {}
+        for key, text in missing.items():
+            spans = []
+            for window_text, token_count in _embedding_windows(text, embedder):
+                if window_text not in window_index:
+                    window_index[window_text] = len(window_texts)
+                    window_texts.append(window_text)
+                spans.append((window_index[window_text], token_count))
+            text_windows[key] = spans
+
+        with stage_timer("embedding", {"model": "reference_alignment", "texts": len(missing), "windows": len(window_texts)}):
+            vectors = embedder.encode(
+                window_texts,
+                batch_size=EMBEDDING_WINDOW_BATCH_SIZE,
+                normalize_embeddings=True,
+            )
+        increment_counter("forward_passes:reference_alignment")
+        increment_counter("texts_embedded", len(missing))
+        increment_counter("windows_embedded", len(window_texts))
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        for key, spans in text_windows.items():
+            if len(spans) == 1:
+                found[key] = vectors[spans[0][0]]
+                continue
+            rows = [index for index, _ in spans]
+            weights = np.array([count for _, count in spans], dtype=np.float32)
+            pooled = weights @ vectors[rows] / weights.sum()
+            norm = float(np.linalg.norm(pooled))
+            found[key] = pooled / norm if norm > 0 else pooled
+
+        _make_room(memo, SCORE_MEMO_MAX_EMBEDDINGS, len(missing))
+        memo.update((key, found[key]) for key in missing)
+
+    return [found[key] for key in keys]
+
+
 # =================================
 # LONG-TEXT CLASSIFIER HELPERS
 # =================================
+@timed_stage("tokenization")
 def _split_text_into_token_chunks(text: str, tokenizer, max_length: int, overlap: int = DEFAULT_CHUNK_OVERLAP) -> List[Tuple[str, int]]:
     safe_text = _clean_text(text)
     if not safe_text:
@@ -378,6 +577,7 @@ def _split_text_into_token_chunks(text: str, tokenizer, max_length: int, overlap
     token_ids = tokenizer(safe_text, add_special_tokens=False, truncation=False, return_attention_mask=False, return_token_type_ids=False, verbose=False)["input_ids"]
     if not token_ids:
         return []
+    increment_counter("tokens_processed", len(token_ids))
     special_tokens = tokenizer.num_special_tokens_to_add(pair=False)
     chunk_size = max(8, max_length - special_tokens)
     step = max(1, chunk_size - min(overlap, max(0, chunk_size // 4)))
@@ -391,6 +591,7 @@ def _split_text_into_token_chunks(text: str, tokenizer, max_length: int, overlap
             chunks.append((chunk_text, len(chunk_ids)))
         if start + chunk_size >= len(token_ids):
             break
+    increment_counter("chunks_processed", len(chunks))
     return chunks
 
 def _get_classifier_probability(text: str, model_key: str, label_hints: List[str]) -> float:
@@ -408,16 +609,28 @@ def _get_classifier_probability(text: str, model_key: str, label_hints: List[str
 
     weighted_scores = []
     weights = []
+    chunk_memo = _SCORE_MEMO["chunks"]
+    hints_key = tuple(label_hints)
 
     for chunk_text, token_count in chunks:
-        outputs = classifier(
-            chunk_text,
-            truncation=True,
-            max_length=max_length,
-        )
-        if outputs and isinstance(outputs[0], list):
-            outputs = outputs[0]
-        prob = _extract_label_probability(outputs, label_hints)
+        chunk_key = (model_key, hints_key, _text_key(chunk_text))
+        hit = chunk_key in chunk_memo
+        record_cache_lookup("dedup:classifier_chunks", hit)
+        if not hit:
+            with stage_timer("classifier_inference", {"model": model_key, "tokens": token_count}):
+                outputs = classifier(
+                    chunk_text,
+                    truncation=True,
+                    max_length=max_length,
+                )
+            increment_counter(f"forward_passes:{model_key}")
+            if outputs and isinstance(outputs[0], list):
+                outputs = outputs[0]
+            prob = _extract_label_probability(outputs, label_hints)
+            _make_room(chunk_memo, SCORE_MEMO_MAX_CLASSIFIER_CHUNKS)
+            chunk_memo[chunk_key] = prob
+        else:
+            prob = chunk_memo[chunk_key]
         weighted_scores.append(float(prob) * float(token_count))
         weights.append(float(token_count))
 
@@ -431,6 +644,7 @@ def _get_classifier_probability(text: str, model_key: str, label_hints: List[str
 # =================================
 # CONTINUOUS METRIC HELPERS
 # =================================
+@deduplicated_score("not_hate_probability")
 def get_not_hate_probability(text):
     prob = _get_classifier_probability(
         text,
@@ -441,6 +655,7 @@ def get_not_hate_probability(text):
 
 
 
+@deduplicated_score("negative_probability")
 def get_negative_probability(text):
     prob = _get_classifier_probability(
         text,
@@ -451,11 +666,12 @@ def get_negative_probability(text):
 
 
 
+@deduplicated_score("reference_alignment")
 def get_reference_alignment_score(response_text: str, anchor_text: str) -> float:
     """
     Cosine similarity between response and reference anchor, scaled to [0, 1].
     """
-    embedder = get_embedding_model("reference_alignment")["embedder"]
+    get_embedding_model("reference_alignment")
 
     response = _clean_text(response_text)
     anchor = _clean_text(anchor_text)
@@ -463,29 +679,312 @@ def get_reference_alignment_score(response_text: str, anchor_text: str) -> float
     if not response or not anchor:
         return 0.0
 
-    embeddings = embedder.encode([response, anchor], normalize_embeddings=True)
+    # The anchor is shared by every chatbot, so after the first call only the response is encoded.
+    embeddings = _encode_unique_texts([response, anchor])
     sim = float(cosine_similarity([embeddings[0]], [embeddings[1]])[0][0])
 
     scaled = (sim + 1.0) / 2.0
     return float(max(0.0, min(1.0, scaled)))
 
 
+
+def _split_sentences(text: str) -> List[str]:
+    return text_feature(_clean_text(text), "sentences")
+
+
+
+@deduplicated_score("reference_coverage")
+def get_reference_coverage_score(response_text: str, reference_text: str) -> float:
+    """
+    Share of reference sentences matched by some response sentence, i.e. whose row of the
+    reference x response cosine similarity matrix reaches REFERENCE_COVERAGE_SIMILARITY_THRESHOLD.
+    """
+    response_sentences = _split_sentences(response_text)
+    reference_sentences = _split_sentences(reference_text)
+    if not response_sentences or not reference_sentences:
+        return 0.0
+
+    # Both sides go through one batched encode; embeddings are unit length, so the matrix
+    # product is the cosine similarity matrix.
+    embeddings = np.vstack(_encode_unique_texts(reference_sentences + response_sentences))
+    similarity = embeddings[: len(reference_sentences)] @ embeddings[len(reference_sentences) :].T
+    matched = similarity.max(axis=1) >= REFERENCE_COVERAGE_SIMILARITY_THRESHOLD
+    return round(float(matched.mean()), 4)
+
+
+
+def retrieve_reference_passages(response_text: str, topic: str, k: int = REFERENCE_INDEX_TOP_K) -> List[Tuple[str, float]]:
+    """Top-k (passage, cosine similarity) pairs from the active reference library for topic."""
+    index = active_reference_index()
+    response = _clean_text(response_text)
+    if index is None or topic not in index["topics"] or not response:
+        return []
+    topic_index = index["topics"][topic]
+    positions, scores = search_reference_index(topic_index, _encode_unique_texts([response])[0], k)
+    return [(topic_index["passages"][int(p)], float(score)) for p, score in zip(positions, scores)]
+
+
+
+def get_reference_library_alignment(response_text: str, topic: str) -> float:
+    """
+    Max (or mean, per REFERENCE_INDEX_AGGREGATION) cosine similarity between the response and
+    its nearest library passages for topic, scaled to [0, 1] like get_reference_alignment_score.
+    """
+    neighbours = retrieve_reference_passages(response_text, topic)
+    if not neighbours:
+        return 0.0
+    similarities = np.array([score for _, score in neighbours])
+    if REFERENCE_INDEX_AGGREGATION == "max":
+        sim = float(similarities.max())
+    elif REFERENCE_INDEX_AGGREGATION == "mean":
+        sim = float(similarities.mean())
+    else:
+        raise ValueError(f"REFERENCE_INDEX_AGGREGATION must be 'max' or 'mean', got {REFERENCE_INDEX_AGGREGATION!r}")
+    return float(max(0.0, min(1.0, (sim + 1.0) / 2.0)))
+
+
+
+def reference_alignment_cell(
+    chatbot_name: str,
+    topic: str,
+    metric_name: str,
+    response_text: str,
+    reference_text: str,
+):
+    """
+    Checkpointed alignment of one (chatbot, topic): against the reference library when one is
+    active and covers topic, otherwise against the reference text. None when neither exists.
+    """
+    index = active_reference_index()
+    if index is not None and topic in index["topics"]:
+        return checkpointed_cell(
+            chatbot_name,
+            topic,
+            metric_name,
+            (response_text, index["fingerprint"]),
+            lambda: get_reference_library_alignment(response_text, topic),
+        )
+    if not reference_text:
+        return None
+    return checkpointed_cell(
+        chatbot_name,
+        topic,
+        metric_name,
+        (response_text, reference_text),
+        lambda: get_reference_alignment_score(response_text, reference_text),
+    )
+
+
+# =================================
+# SHARED TEXT ANALYSIS
+# =================================
+# ROUGE, METEOR, readability and the lexical tone proxy all read their tokens from one
+# analysis record per distinct text, so a text is lower-cased, split into words and
+# sentences, tokenized and stemmed once per run however many metrics and pairs use it.
+# Each feature reproduces exactly what its metric computed before (rouge_score's
+# tokenizer, nltk.word_tokenize, _word_pattern/_sentence_splitter), so scores are unchanged.
+# Features are built on first use; a reference topic is compared with every chatbot, and
+# with several references each chatbot topic is compared with every reference.
+class _MemoizedStemmer:
+    """Porter stemmer with a per-word cache, shared by the ROUGE tokens and METEOR stem matching."""
+
+    def __init__(self):
+        self._stemmer = PorterStemmer()
+        self._stems: Dict[str, str] = {}
+
+    def stem(self, word: str) -> str:
+        stem = self._stems.get(word)
+        if stem is None:
+            if len(self._stems) >= STEMMER_CACHE_MAX_WORDS:
+                self._stems.clear()
+            stem = self._stems[word] = self._stemmer.stem(word)
+        return stem
+
+
+_STEMMER = _MemoizedStemmer()
+_rouge_ngram_pattern = re.compile(r"rouge([0-9])$")
+
+
+def _prepared_text(kind: str, text: str, build_fn):
+    memo = _SCORE_MEMO["prepared"]
+    key = (kind, _text_key(text))
+    hit = key in memo
+    record_cache_lookup(f"prepared_texts:{kind}", hit)
+    if not hit:
+        value = build_fn(text)
+        _make_room(memo, SCORE_MEMO_MAX_PREPARED_TEXTS)
+        memo[key] = value
+        return value
+    return memo[key]
+
+
+
+_TEXT_FEATURES = {
+    "lower": lambda analysis: analysis["text"].lower(),
+    # Readability words and sentences.
+    "words": lambda analysis: _word_pattern.findall(analysis["text"]),
+    "sentences": lambda analysis: [
+        s.strip() for s in _sentence_splitter.split(analysis["text"]) if s.strip()
+    ],
+    "syllable_count": lambda analysis: sum(count_syllables(w) for w in _analysis_feature(analysis, "words")),
+    # Lower-cased words for word-list lookups.
+    "lower_words": lambda analysis: [w.lower().strip("'") for w in _analysis_feature(analysis, "words")],
+    # rouge_score's tokenization: alphanumeric runs, words longer than 3 characters stemmed.
+    "stems": lambda analysis: rouge_tokenize.tokenize(
+        _analysis_feature(analysis, "lower"), _STEMMER if ROUGE_USE_STEMMER else None
+    ),
+    # METEOR's input tokens.
+    "meteor_tokens": lambda analysis: nltk.word_tokenize(_analysis_feature(analysis, "lower")),
+    # (topic, item) labels of every CLINICAL_CHECKLIST phrase found in the stems.
+    "checklist_items": lambda analysis: frozenset(
+        match_phrase_labels(_clinical_checklist_automaton(), _analysis_feature(analysis, "stems"))
+    ),
+}
+
+
+def _analysis_feature(analysis: Dict[str, Any], feature: str):
+    if feature not in analysis:
+        analysis[feature] = _TEXT_FEATURES[feature](analysis)
+    return analysis[feature]
+
+
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    """Memoized analysis record of the whitespace-normalized text; see _TEXT_FEATURES."""
+    return _prepared_text("analysis", text, lambda value: {"text": clean_text(value)})
+
+
+
+def text_feature(text: str, feature: str):
+    """One feature of _TEXT_FEATURES for text, computed on first use and then reused."""
+    if feature not in _TEXT_FEATURES:
+        raise ValueError(f"Unsupported text feature: {feature}")
+    return _analysis_feature(analyze_text(text), feature)
+
+
+
+def _build_rouge_text(text: str) -> Dict[str, Any]:
+    tokens = text_feature(text, "stems")
+    ngrams = {}
+    for metric in ROUGE_METRICS:
+        match = _rouge_ngram_pattern.match(metric)
+        if match:
+            ngrams[metric] = rouge_scorer._create_ngrams(tokens, int(match.group(1)))
+    return {"tokens": tokens, "ngrams": ngrams}
+
+
+
+def prepare_rouge_text(text: Any) -> Dict[str, Any]:
+    """Stemmed rouge_score tokens and the n-gram Counters of every rougeN in ROUGE_METRICS."""
+    return _prepared_text("rouge", str(text), _build_rouge_text)
+
+
+
+def score_prepared_rouge(
+    target: Dict[str, Any],
+    prediction: Dict[str, Any],
+    ngram_scores: Dict[str, Any] | None = None,
+) -> float:
+    """
+    Mean F-measure over ROUGE_METRICS, identical to RougeScorer.score(target, prediction).
+    ngram_scores holds rougeN Scores already computed by precompute_rouge_ngram_scores().
+    """
+    f_measures = []
+    for metric in ROUGE_METRICS:
+        if metric == "rougeL":
+            score = score_lcs(target["tokens"], prediction["tokens"])
+        elif ngram_scores and metric in ngram_scores:
+            score = ngram_scores[metric]
+        elif metric in target["ngrams"]:
+            score = rouge_scorer._score_ngrams(target["ngrams"][metric], prediction["ngrams"][metric])
+        else:
+            raise ValueError(f"Unsupported ROUGE metric in ROUGE_METRICS: {metric}")
+        f_measures.append(score.fmeasure)
+    return round(float(np.mean(f_measures)), 4)
+
+
+
+def precompute_rouge_ngram_scores(text_pairs: List[Tuple[str, str]]) -> int:
+    """
+    Computes the rougeN components of every (reference, response) pair in one sparse-matrix
+    pass (see rouge_engine) and keeps them for calculate_average_rouge(). Pairs already
+    computed are skipped. Returns the number of new pairs.
+    """
+    memo = _SCORE_MEMO["rouge_ngrams"]
+    keys = {}
+    for reference_text, response_text in text_pairs:
+        key = (_text_key(str(reference_text)), _text_key(str(response_text)))
+        if key not in memo and key not in keys:
+            keys[key] = (str(reference_text), str(response_text))
+    if not keys:
+        return 0
+
+    text_index: Dict[Any, int] = {}
+    token_lists = []
+    index_pairs = []
+    for key, texts in keys.items():
+        pair = []
+        for text_key, text in zip(key, texts):
+            if text_key not in text_index:
+                text_index[text_key] = len(token_lists)
+                token_lists.append(prepare_rouge_text(text)["tokens"])
+            pair.append(text_index[text_key])
+        index_pairs.append(tuple(pair))
+
+    pair_scores = {key: {} for key in keys}
+    with stage_timer("rouge", {"function": "precompute_rouge_ngram_scores", "pairs": len(keys)}):
+        for metric in ROUGE_METRICS:
+            match = _rouge_ngram_pattern.match(metric)
+            if not match:
+                continue
+            scores = rouge_n_scores_by_pair(token_lists, index_pairs, int(match.group(1)))
+            for key, score in zip(keys, scores):
+                pair_scores[key][metric] = score
+    _make_room(memo, SCORE_MEMO_MAX_ROUGE_PAIRS, len(pair_scores))
+    memo.update(pair_scores)
+    return len(keys)
+
+
+
+def prepare_meteor_tokens(text: Any) -> List[str]:
+    """Lower-cased NLTK word tokens of the cleaned text, as fed to meteor_score."""
+    return text_feature(_clean_text(text), "meteor_tokens")
+
+
+
+def score_prepared_meteor(reference_tokens: List[str], generated_tokens: List[str]) -> float:
+    if not reference_tokens or not generated_tokens:
+        return 0.0
+    score = meteor_score(
+        [reference_tokens],
+        generated_tokens,
+        stemmer=_STEMMER,
+        alpha=METEOR_ALPHA,
+        beta=METEOR_BETA,
+        gamma=METEOR_GAMMA,
+    )
+    return round(float(score), 4)
+
+
 # =================================
 # BENCHMARK 1: ROUGE
 # =================================
+@deduplicated_score("rouge")
+@timed_stage("rouge")
 def calculate_average_rouge(reference_text, generated_text):
-    scorer = rouge_scorer.RougeScorer(
-        ROUGE_METRICS,
-        use_stemmer=ROUGE_USE_STEMMER,
+    ngram_scores = _SCORE_MEMO["rouge_ngrams"].get((_text_key(str(reference_text)), _text_key(str(generated_text))))
+    return score_prepared_rouge(
+        prepare_rouge_text(reference_text),
+        prepare_rouge_text(generated_text),
+        ngram_scores,
     )
-    scores = scorer.score(str(reference_text), str(generated_text))
-    f_measures = [scores[m].fmeasure for m in ROUGE_METRICS]
-    return round(float(np.mean(f_measures)), 4)
 
 
 # =================================
 # BENCHMARK 2: METEOR
 # =================================
+@deduplicated_score("meteor")
+@timed_stage("meteor")
 def calculate_meteor(reference_text, generated_text):
     reference_text = _clean_text(reference_text)
     generated_text = _clean_text(generated_text)
@@ -493,19 +992,7 @@ def calculate_meteor(reference_text, generated_text):
     if not reference_text or not generated_text:
         return 0.0
 
-    ref_tokens = nltk.word_tokenize(reference_text.lower())
-    gen_tokens = nltk.word_tokenize(generated_text.lower())
-    if not ref_tokens or not gen_tokens:
-        return 0.0
-
-    score = meteor_score(
-        [ref_tokens],
-        gen_tokens,
-        alpha=METEOR_ALPHA,
-        beta=METEOR_BETA,
-        gamma=METEOR_GAMMA,
-    )
-    return round(float(score), 4)
+    return score_prepared_meteor(prepare_meteor_tokens(reference_text), prepare_meteor_tokens(generated_text))
 
 
 # =================================
@@ -516,6 +1003,19 @@ def evaluate_negative_tone_probability(generated_text):
     return round(float(negative_prob), 4)
 
 
+_LEXICAL_NEGATIVE_TERMS = frozenset(LEXICAL_NEGATIVE_TERMS)
+
+
+@deduplicated_score("lexical_negative_tone")
+def evaluate_lexical_negative_tone(generated_text):
+    """Share of words found in LEXICAL_NEGATIVE_TERMS; a model-free stand-in for the tone classifier."""
+    words = text_feature(str(generated_text), "lower_words")
+    if not words:
+        return 0.0
+    negative_count = sum(1 for w in words if w in _LEXICAL_NEGATIVE_TERMS)
+    return round(negative_count / len(words), 4)
+
+
 # =================================
 # BENCHMARK 4: READABILITY
 # =================================
@@ -534,17 +1034,18 @@ def count_syllables(word):
 
 
 
+@deduplicated_score("readability")
+@timed_stage("readability")
 def evaluate_readability_score(generated_text):
     text = str(generated_text)
-    words = _word_pattern.findall(text)
-    sentences = [s for s in _sentence_splitter.split(text) if s.strip()]
+    words = text_feature(text, "words")
 
     if not words:
         return 0.0
 
     word_count = len(words)
-    sentence_count = max(1, len(sentences))
-    syllable_count = sum(count_syllables(w) for w in words)
+    sentence_count = max(1, len(text_feature(text, "sentences")))
+    syllable_count = text_feature(text, "syllable_count")
 
     reading_ease = (
         206.835
@@ -555,6 +1056,49 @@ def evaluate_readability_score(generated_text):
     return round(float(max(0.0, min(100.0, reading_ease))), 4)
 
 
+# =================================
+# BENCHMARK 5: CLINICAL CHECKLIST COVERAGE
+# =================================
+_CHECKLIST_CACHE: Dict[str, Any] = {}
+
+
+def _clinical_checklist_automaton() -> Dict[str, Any]:
+    """CLINICAL_CHECKLIST compiled once into a phrase automaton labelled by (topic, item)."""
+    if "automaton" not in _CHECKLIST_CACHE:
+        phrases = []
+        for topic, items in CLINICAL_CHECKLIST.items():
+            for item, item_phrases in items.items():
+                tokens = [text_feature(phrase, "stems") for phrase in item_phrases]
+                if not any(tokens):
+                    raise ValueError(f"CLINICAL_CHECKLIST item '{item}' of topic '{topic}' has no usable phrases.")
+                phrases += [((topic, item), phrase_tokens) for phrase_tokens in tokens]
+        _CHECKLIST_CACHE["automaton"] = build_phrase_automaton(phrases)
+    return _CHECKLIST_CACHE["automaton"]
+
+
+
+def calculate_checklist_coverage(generated_text, topic: str) -> float:
+    """Share of the CLINICAL_CHECKLIST items of topic that the text mentions at least once."""
+    items = CLINICAL_CHECKLIST.get(topic)
+    if not items:
+        raise ValueError(f"No CLINICAL_CHECKLIST entry for topic: {topic}")
+    matched = text_feature(_clean_text(generated_text), "checklist_items")
+    covered = sum(1 for item in items if (topic, item) in matched)
+    return round(covered / len(items), 4)
+
+
+
+def score_checklist_coverage(response_topic_map: Dict[str, str]) -> Dict[str, float]:
+    """CHECKLIST_COVERAGE_COLUMNS for one response: per-topic coverage and its macro average."""
+    topic_scores = [
+        calculate_checklist_coverage(response_topic_map.get(topic, ""), topic)
+        for topic in CLINICAL_CHECKLIST
+    ]
+    row = dict(zip(CHECKLIST_COVERAGE_TOPIC_COLUMNS, topic_scores))
+    row[CHECKLIST_COVERAGE_METRIC] = _macro_average(topic_scores)
+    return row
+
+
 # =================================
 # MACRO-AVERAGE HELPERS
 # =================================
@@ -565,31 +1109,83 @@ def _macro_average(values: List[float]) -> float:
 
 
 
-def _topic_macro_metric(
+def _topic_metric_cells(
     reference_topic_map: Dict[str, str],
     response_topic_map: Dict[str, str],
     topics: List[str],
     metric_fn,
-) -> float:
+    chatbot: str | None = None,
+    metric_name: str | None = None,
+) -> List[float]:
+    # chatbot/metric_name identify the (chatbot, topic, metric) checkpoint cells.
     scores = []
     for topic in topics:
         reference_text = reference_topic_map.get(topic, "")
         response_text = response_topic_map.get(topic, "")
-        scores.append(float(metric_fn(reference_text, response_text)))
-    return _macro_average(scores)
+        scores.append(
+            float(
+                checkpointed_cell(
+                    chatbot,
+                    topic,
+                    metric_name,
+                    (reference_text, response_text),
+                    lambda: metric_fn(reference_text, response_text),
+                )
+            )
+        )
+    return scores
 
 
 
-def _topic_macro_single_text_metric(
+def _topic_macro_metric(
+    reference_topic_map: Dict[str, str],
     response_topic_map: Dict[str, str],
     topics: List[str],
     metric_fn,
+    chatbot: str | None = None,
+    metric_name: str | None = None,
 ) -> float:
+    return _macro_average(
+        _topic_metric_cells(reference_topic_map, response_topic_map, topics, metric_fn, chatbot, metric_name)
+    )
+
+
+
+def _topic_single_text_metric_cells(
+    response_topic_map: Dict[str, str],
+    topics: List[str],
+    metric_fn,
+    chatbot: str | None = None,
+    metric_name: str | None = None,
+) -> List[float]:
     scores = []
     for topic in topics:
         response_text = response_topic_map.get(topic, "")
-        scores.append(float(metric_fn(response_text)))
-    return _macro_average(scores)
+        scores.append(
+            float(
+                checkpointed_cell(
+                    chatbot,
+                    topic,
+                    metric_name,
+                    (response_text,),
+                    lambda: metric_fn(response_text),
+                )
+            )
+        )
+    return scores
+
+
+
+def _topic_macro_single_text_metric(
+    response_topic_map: Dict[str, str],
+    topics: List[str],
+    metric_fn,
+    chatbot: str | None = None,
+    metric_name: str | None = None,
+) -> float:
+    return _macro_average(
+        _topic_single_text_metric_cells(response_topic_map, topics, metric_fn, chatbot, metric_name)
+    )
 
 
 # =================================
@@ -623,6 +1219,284 @@ def append_overall_average_row(df: pd.DataFrame, label: str = OVERALL_AVERAGE_LA
     return pd.concat([summary_df, pd.DataFrame([overall_row])], ignore_index=True)
 
 
+# =================================
+# PER-CHATBOT ROW SCORING
+# =================================
+# Every chatbot is scored independently against the prepared reference view, so the
+# row builders below are shared by the batch generators and the streaming evaluator.
+def score_reference_evaluation_metrics(reference_view: Dict[str, Any]) -> Dict[str, float]:
+    reference_topic_map = reference_view["reference_topic_map"]
+    reference_topics = reference_view["reference_topics"]
+    return {
+        "Reference Negative Sentiment Probability": _topic_macro_single_text_metric(
+            reference_topic_map,
+            reference_topics,
+            evaluate_negative_tone_probability,
+            chatbot=HUMAN_PLATFORM,
+            metric_name="Negative Sentiment Probability",
+        ),
+        "Reference Flesch Reading Ease": _topic_macro_single_text_metric(
+            reference_topic_map,
+            reference_topics,
+            evaluate_readability_score,
+            chatbot=HUMAN_PLATFORM,
+            metric_name="Flesch Reading Ease",
+        ),
+    }
+
+
+
+def score_macro_topic_cells(chatbot_view, reference_view: Dict[str, Any]) -> Dict[str, List[float]]:
+    """
+    {metric: per-reference-topic scores} of the topic macro-averaged metrics; each
+    VISUALIZATION_METRICS column of the evaluation row is the macro average of this list.
+    """
+    reference_topic_map = reference_view["reference_topic_map"]
+    reference_topics = reference_view["reference_topics"]
+    response_topic_map = chatbot_view["TopicMap"]
+    chatbot_name = chatbot_view["Chatbot"]
+
+    return {
+        "ROUGE Lexical Overlap": _topic_metric_cells(
+            reference_topic_map,
+            response_topic_map,
+            reference_topics,
+            calculate_average_rouge,
+            chatbot=chatbot_name,
+            metric_name="ROUGE Lexical Overlap",
+        ),
+        "METEOR Lexical-Semantic Alignment": _topic_metric_cells(
+            reference_topic_map,
+            response_topic_map,
+            reference_topics,
+            calculate_meteor,
+            chatbot=chatbot_name,
+            metric_name="METEOR Lexical-Semantic Alignment",
+        ),
+        "Negative Sentiment Probability": _topic_single_text_metric_cells(
+            response_topic_map,
+            reference_topics,
+            evaluate_negative_tone_probability,
+            chatbot=chatbot_name,
+            metric_name="Negative Sentiment Probability",
+        ),
+        "Flesch Reading Ease": _topic_single_text_metric_cells(
+            response_topic_map,
+            reference_topics,
+            evaluate_readability_score,
+            chatbot=chatbot_name,
+            metric_name="Flesch Reading Ease",
+        ),
+    }
+
+
+
+def score_macro_topic_rows(chatbot_view, reference_view: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """MACRO_TOPIC_COLUMNS rows (one per reference topic) behind one chatbot's evaluation row."""
+    cells = score_macro_topic_cells(chatbot_view, reference_view)
+    return [
+        {
+            "Chatbot": chatbot_view["Chatbot"],
+            "Topic": topic,
+            **{metric: scores[index] for metric, scores in cells.items()},
+        }
+        for index, topic in enumerate(reference_view["reference_topics"])
+    ]
+
+
+
+def score_evaluation_row(
+    chatbot_view,
+    reference_view: Dict[str, Any],
+    reference_scores: Dict[str, float],
+) -> Dict[str, Any]:
+    cells = score_macro_topic_cells(chatbot_view, reference_view)
+    return {
+        "Chatbot": chatbot_view["Chatbot"],
+        "Response": chatbot_view["Response"],
+        "ROUGE Lexical Overlap": _macro_average(cells["ROUGE Lexical Overlap"]),
+        "METEOR Lexical-Semantic Alignment": _macro_average(cells["METEOR Lexical-Semantic Alignment"]),
+        "Negative Sentiment Probability": _macro_average(cells["Negative Sentiment Probability"]),
+        "Reference Negative Sentiment Probability": reference_scores["Reference Negative Sentiment Probability"],
+        "Flesch Reading Ease": _macro_average(cells["Flesch Reading Ease"]),
+        "Reference Flesch Reading Ease": reference_scores["Reference Flesch Reading Ease"],
+        **score_checklist_coverage(chatbot_view["TopicMap"]),
+    }
+
+
+
+def _whole_response_not_hate_probability(chatbot_name: str, text: str) -> float:
+    return checkpointed_cell(
+        chatbot_name,
+        CHECKPOINT_ALL_TOPICS_LABEL,
+        "Non-Hateful Language Probability",
+        (text,),
+        lambda: get_not_hate_probability(text),
+    )
+
+
+
+def score_reference_not_hate_probability(reference_view: Dict[str, Any]) -> float:
+    return round(
+        _whole_response_not_hate_probability(HUMAN_PLATFORM, reference_view["reference_text"]),
+        4,
+    )
+
+
+
+def score_not_hate_row(chatbot_view, reference_not_hate_prob: float) -> Dict[str, Any]:
+    not_hate_prob = _whole_response_not_hate_probability(
+        chatbot_view["Chatbot"],
+        chatbot_view["Response"],
+    )
+    return {
+        "Chatbot": chatbot_view["Chatbot"],
+        "Non-Hateful Language Probability": round(not_hate_prob, 4),
+        "Reference Non-Hateful Language Probability": reference_not_hate_prob,
+    }
+
+
+
+def _topic_alignment_score(
+    chatbot_view,
+    reference_topic_map: Dict[str, str],
+    topics: List[str],
+    anchor_text: str,
+    metric_name: str,
+    score_fn=None,
+) -> float:
+    # score_fn(response_text, reference_text) defaults to the embedding cosine alignment,
+    # which uses the reference library for the topics it covers.
+    chatbot_name = chatbot_view["Chatbot"]
+    response_topic_map = chatbot_view["TopicMap"]
+
+    alignment_scores = []
+    for topic in topics:
+        reference_text = reference_topic_map.get(topic, "")
+        response_text = response_topic_map.get(topic, "")
+        if score_fn is None:
+            score = reference_alignment_cell(chatbot_name, topic, metric_name, response_text, reference_text)
+            if score is not None:
+                alignment_scores.append(score)
+        elif reference_text:
+            alignment_scores.append(
+                checkpointed_cell(
+                    chatbot_name,
+                    topic,
+                    metric_name,
+                    (response_text, reference_text),
+                    lambda: score_fn(response_text, reference_text),
+                )
+            )
+    alignment = _macro_average(alignment_scores)
+    if not alignment_scores:
+        response = chatbot_view["Response"]
+        alignment = checkpointed_cell(
+            chatbot_name,
+            CHECKPOINT_ALL_TOPICS_LABEL,
+            metric_name,
+            (response, anchor_text),
+            lambda: (score_fn or get_reference_alignment_score)(response, anchor_text),
+        )
+    return alignment
+
+
+
+def _batched_coverage_fn(chatbot_view, reference_topic_map: Dict[str, str], topics: List[str]):
+    """
+    Coverage scorer that, on its first call, embeds every sentence of the chatbot's and the
+    reference's texts for topics in one batched pass; later topics then hit the embedding memo.
+    Fully checkpointed chatbots never call it, so no model is loaded on resume.
+    """
+    primed = []
+
+    def score(response_text: str, reference_text: str) -> float:
+        if not primed:
+            texts = [chatbot_view["TopicMap"].get(topic, "") for topic in topics]
+            texts += [reference_topic_map.get(topic, "") for topic in topics]
+            sentences = [sentence for text in texts for sentence in _split_sentences(text)]
+            if sentences:
+                _encode_unique_texts(sentences)
+            primed.append(True)
+        return get_reference_coverage_score(response_text, reference_text)
+
+    return score
+
+
+
+def score_urgency_row(chatbot_view, reference_topic_map: Dict[str, str], urgency_anchor: str) -> Dict[str, Any]:
+    alignment = _topic_alignment_score(
+        chatbot_view,
+        reference_topic_map,
+        URGENCY_REFERENCE_TOPICS,
+        urgency_anchor,
+        metric_name="Crisis-Response Reference Similarity",
+    )
+    coverage = _topic_alignment_score(
+        chatbot_view,
+        reference_topic_map,
+        URGENCY_REFERENCE_TOPICS,
+        urgency_anchor,
+        metric_name="Crisis-Response Reference Coverage",
+        score_fn=_batched_coverage_fn(chatbot_view, reference_topic_map, URGENCY_REFERENCE_TOPICS),
+    )
+    return {
+        "Chatbot": chatbot_view["Chatbot"],
+        "Crisis-Response Reference Similarity": round(alignment, 4),
+        "Crisis-Response Reference Coverage": round(coverage, 4),
+    }
+
+
+
+def score_risk_factor_row(chatbot_view, reference_topic_map: Dict[str, str], risk_factor_anchor: str) -> Dict[str, Any]:
+    risk_factor_alignment = _topic_alignment_score(
+        chatbot_view,
+        reference_topic_map,
+        RISK_FACTOR_REFERENCE_TOPICS,
+        risk_factor_anchor,
+        metric_name="Risk-Assessment Reference Similarity",
+    )
+    coverage = _topic_alignment_score(
+        chatbot_view,
+        reference_topic_map,
+        RISK_FACTOR_REFERENCE_TOPICS,
+        risk_factor_anchor,
+        metric_name="Risk-Assessment Reference Coverage",
+        score_fn=_batched_coverage_fn(chatbot_view, reference_topic_map, RISK_FACTOR_REFERENCE_TOPICS),
+    )
+    return {
+        "Chatbot": chatbot_view["Chatbot"],
+        "Risk-Assessment Reference Similarity": round(risk_factor_alignment, 4),
+        "Risk-Assessment Reference Coverage": round(coverage, 4),
+    }
+
+
+def prepare_reference_context(reference_view: Dict[str, Any]) -> Dict[str, Any]:
+    """Reference view plus the reference-level scores and anchors shared by every combined row."""
+    reference_topic_map = reference_view["reference_topic_map"]
+    return {
+        **reference_view,
+        "reference_scores": score_reference_evaluation_metrics(reference_view),
+        "reference_not_hate_prob": score_reference_not_hate_probability(reference_view),
+        "urgency_anchor": build_urgency_reference_anchor(reference_topic_map),
+        "risk_factor_anchor": build_risk_factor_reference_anchor(reference_topic_map),
+    }
+
+
+
+def score_combined_row(chatbot_view, reference_context: Dict[str, Any]) -> Dict[str, Any]:
+    """One COMBINED_EVALUATION_COLUMNS row: the primary metrics plus the split components."""
+    reference_topic_map = reference_context["reference_topic_map"]
+    row = score_evaluation_row(chatbot_view, reference_context, reference_context["reference_scores"])
+    for component_row in (
+        score_not_hate_row(chatbot_view, reference_context["reference_not_hate_prob"]),
+        score_urgency_row(chatbot_view, reference_topic_map, reference_context["urgency_anchor"]),
+        score_risk_factor_row(chatbot_view, reference_topic_map, reference_context["risk_factor_anchor"]),
+    ):
+        row.update({k: v for k, v in component_row.items() if k != "Chatbot"})
+    return row
+
+
 # =================================
 # MAIN EVALUATION PIPELINE
 # =================================
@@ -639,58 +1513,21 @@ def generate_evaluation_scores(integrated_responses, include_overall_average: bo
         integrated_responses = load_responses(integrated_responses)
 
     views = prepare_aggregated_views(integrated_responses)
-    reference_topic_map = views["reference_topic_map"]
-    reference_topics = views["reference_topics"]
     chatbot_df = views["chatbot_df"]
+    reference_scores = score_reference_evaluation_metrics(views)
 
-    reference_negative_tone = _topic_macro_single_text_metric(
-        reference_topic_map,
-        reference_topics,
-        evaluate_negative_tone_probability,
-    )
-    reference_readability = _topic_macro_single_text_metric(
-        reference_topic_map,
-        reference_topics,
-        evaluate_readability_score,
-    )
+    # ROUGE-1/2 of every (chatbot, topic) pair in one sparse pass; rows then reuse them.
+    reference_topic_map = views["reference_topic_map"]
+    precompute_rouge_ngram_scores([
+        (reference_topic_map.get(topic, ""), row["TopicMap"].get(topic, ""))
+        for _, row in chatbot_df.iterrows()
+        for topic in views["reference_topics"]
+    ])
 
-    evaluation_rows = []
-
-    for _, row in chatbot_df.iterrows():
-        chatbot_name = row["Chatbot"]
-        chatbot_response = row["Response"]
-        response_topic_map = row["TopicMap"]
-
-        evaluation_rows.append(
-            {
-                "Chatbot": chatbot_name,
-                "Response": chatbot_response,
-                "ROUGE Lexical Overlap": _topic_macro_metric(
-                    reference_topic_map,
-                    response_topic_map,
-                    reference_topics,
-                    calculate_average_rouge,
-                ),
-                "METEOR Lexical-Semantic Alignment": _topic_macro_metric(
-                    reference_topic_map,
-                    response_topic_map,
-                    reference_topics,
-                    calculate_meteor,
-                ),
-                "Negative Sentiment Probability": _topic_macro_single_text_metric(
-                    response_topic_map,
-                    reference_topics,
-                    evaluate_negative_tone_probability,
-                ),
-                "Reference Negative Sentiment Probability": reference_negative_tone,
-                "Flesch Reading Ease": _topic_macro_single_text_metric(
-                    response_topic_map,
-                    reference_topics,
-                    evaluate_readability_score,
-                ),
-                "Reference Flesch Reading Ease": reference_readability,
-            }
-        )
+    evaluation_rows = [
+        score_evaluation_row(row, views, reference_scores)
+        for _, row in chatbot_df.iterrows()
+    ]
 
     df = pd.DataFrame(evaluation_rows, columns=EVALUATION_FIELDNAMES)
 
@@ -700,6 +1537,130 @@ def generate_evaluation_scores(integrated_responses, include_overall_average: bo
     return df
 
 
+def generate_macro_topic_scores(integrated_responses) -> pd.DataFrame:
+    """
+    Per-(chatbot, reference topic) cells of the macro-averaged metrics, i.e. the values
+    generate_evaluation_scores() averages. Cells already scored are memo/checkpoint hits.
+    """
+    if not isinstance(integrated_responses, pd.DataFrame):
+        integrated_responses = load_responses(integrated_responses)
+
+    views = prepare_aggregated_views(integrated_responses)
+    rows = [
+        topic_row
+        for _, row in views["chatbot_df"].iterrows()
+        for topic_row in score_macro_topic_rows(row, views)
+    ]
+    return pd.DataFrame(rows, columns=MACRO_TOPIC_COLUMNS)
+
+
+# =================================
+# FAST LEXICAL PREVIEW PROFILE
+# =================================
+# Same topic macro-averaging as the full run, restricted to metrics that need no
+# transformer model, so a preview ranking is available in seconds.
+def score_preview_row(
+    chatbot_view,
+    reference_view: Dict[str, Any],
+    reference_scores: Dict[str, float],
+    include_tone_proxy: bool = False,
+) -> Dict[str, Any]:
+    reference_topic_map = reference_view["reference_topic_map"]
+    reference_topics = reference_view["reference_topics"]
+    response_topic_map = chatbot_view["TopicMap"]
+    chatbot_name = chatbot_view["Chatbot"]
+
+    row = {
+        "Chatbot": chatbot_name,
+        "Response": chatbot_view["Response"],
+        "ROUGE Lexical Overlap": _topic_macro_metric(
+            reference_topic_map,
+            response_topic_map,
+            reference_topics,
+            calculate_average_rouge,
+            chatbot=chatbot_name,
+            metric_name="ROUGE Lexical Overlap",
+        ),
+        "METEOR Lexical-Semantic Alignment": _topic_macro_metric(
+            reference_topic_map,
+            response_topic_map,
+            reference_topics,
+            calculate_meteor,
+            chatbot=chatbot_name,
+            metric_name="METEOR Lexical-Semantic Alignment",
+        ),
+        "Flesch Reading Ease": _topic_macro_single_text_metric(
+            response_topic_map,
+            reference_topics,
+            evaluate_readability_score,
+            chatbot=chatbot_name,
+            metric_name="Flesch Reading Ease",
+        ),
+        "Reference Flesch Reading Ease": reference_scores["Reference Flesch Reading Ease"],
+        **score_checklist_coverage(response_topic_map),
+    }
+    if include_tone_proxy:
+        row[LEXICAL_TONE_PROXY_METRIC] = _topic_macro_single_text_metric(
+            response_topic_map,
+            reference_topics,
+            evaluate_lexical_negative_tone,
+            chatbot=chatbot_name,
+            metric_name=LEXICAL_TONE_PROXY_METRIC,
+        )
+        row[f"Reference {LEXICAL_TONE_PROXY_METRIC}"] = reference_scores[f"Reference {LEXICAL_TONE_PROXY_METRIC}"]
+    row["Profile"] = PREVIEW_PROFILE_LABEL
+    return row
+
+
+
+def generate_preview_scores(
+    integrated_responses,
+    include_tone_proxy: bool = False,
+    include_overall_average: bool = True,
+) -> pd.DataFrame:
+    """
+    Lexical-only preview of evaluation_scores.csv: ROUGE, METEOR and readability (and the
+    lexicon tone proxy when requested). No classifier or embedding model is loaded.
+    """
+    if not isinstance(integrated_responses, pd.DataFrame):
+        integrated_responses = load_responses(integrated_responses)
+
+    views = prepare_aggregated_views(integrated_responses)
+    reference_topic_map = views["reference_topic_map"]
+    reference_topics = views["reference_topics"]
+    reference_scores = {
+        "Reference Flesch Reading Ease": _topic_macro_single_text_metric(
+            reference_topic_map,
+            reference_topics,
+            evaluate_readability_score,
+            chatbot=HUMAN_PLATFORM,
+            metric_name="Flesch Reading Ease",
+        ),
+    }
+    columns = list(PREVIEW_EVALUATION_FIELDNAMES)
+    if include_tone_proxy:
+        reference_scores[f"Reference {LEXICAL_TONE_PROXY_METRIC}"] = _topic_macro_single_text_metric(
+            reference_topic_map,
+            reference_topics,
+            evaluate_lexical_negative_tone,
+            chatbot=HUMAN_PLATFORM,
+            metric_name=LEXICAL_TONE_PROXY_METRIC,
+        )
+        columns += PREVIEW_TONE_PROXY_COLUMNS
+
+    preview_rows = [
+        score_preview_row(row, views, reference_scores, include_tone_proxy=include_tone_proxy)
+        for _, row in views["chatbot_df"].iterrows()
+    ]
+    df = pd.DataFrame(preview_rows, columns=columns + ["Profile"])
+
+    if include_overall_average and not df.empty:
+        df = append_overall_average_row(df)
+        df.loc[df.index[-1], "Profile"] = PREVIEW_PROFILE_LABEL
+
+    return df
+
+
 # =================================
 # COMPONENT 1: NOT-HATE / IDENTITY-HARM FLOOR
 # =================================
@@ -712,22 +1673,14 @@ def generate_not_hate_metric_scores(integrated_responses, include_overall_averag
         integrated_responses = load_responses(integrated_responses)
 
     views = prepare_aggregated_views(integrated_responses)
-    reference_text = views["reference_text"]
     chatbot_df = views["chatbot_df"]
 
-    reference_not_hate_prob = round(get_not_hate_probability(reference_text), 4)
-
-    rows = []
-    for _, row in chatbot_df.iterrows():
-        response = row["Response"]
-        not_hate_prob = get_not_hate_probability(response)
-        rows.append(
-            {
-                "Chatbot": row["Chatbot"],
-                "Non-Hateful Language Probability": round(not_hate_prob, 4),
-                "Reference Non-Hateful Language Probability": reference_not_hate_prob,
-            }
-        )
+    reference_not_hate_prob = score_reference_not_hate_probability(views)
+
+    rows = [
+        score_not_hate_row(row, reference_not_hate_prob)
+        for _, row in chatbot_df.iterrows()
+    ]
 
     df = pd.DataFrame(rows, columns=NOT_HATE_METRIC_COLUMNS)
 
@@ -754,29 +1707,10 @@ def generate_urgency_dimension_scores(integrated_responses, include_overall_aver
     chatbot_df = views["chatbot_df"]
     urgency_anchor = build_urgency_reference_anchor(reference_topic_map)
 
-    rows = []
-    for _, row in chatbot_df.iterrows():
-        response = row["Response"]
-        response_topic_map = row["TopicMap"]
-
-        urgency_alignment_scores = []
-        for topic in URGENCY_REFERENCE_TOPICS:
-            reference_text = reference_topic_map.get(topic, "")
-            response_text = response_topic_map.get(topic, "")
-            if reference_text:
-                urgency_alignment_scores.append(
-                    get_reference_alignment_score(response_text, reference_text)
-                )
-        alignment = _macro_average(urgency_alignment_scores)
-        if not urgency_alignment_scores:
-            alignment = get_reference_alignment_score(response, urgency_anchor)
-
-        rows.append(
-            {
-                "Chatbot": row["Chatbot"],
-                "Crisis-Response Reference Similarity": round(alignment, 4),
-            }
-        )
+    rows = [
+        score_urgency_row(row, reference_topic_map, urgency_anchor)
+        for _, row in chatbot_df.iterrows()
+    ]
 
     df = pd.DataFrame(rows, columns=URGENCY_DIMENSION_COLUMNS)
 
@@ -803,29 +1737,10 @@ def generate_risk_factor_dimension_scores(integrated_responses, include_overall_
     chatbot_df = views["chatbot_df"]
     risk_factor_anchor = build_risk_factor_reference_anchor(reference_topic_map)
 
-    rows = []
-    for _, row in chatbot_df.iterrows():
-        response = row["Response"]
-        response_topic_map = row["TopicMap"]
-
-        risk_factor_alignment_scores = []
-        for topic in RISK_FACTOR_REFERENCE_TOPICS:
-            reference_text = reference_topic_map.get(topic, "")
-            response_text = response_topic_map.get(topic, "")
-            if reference_text:
-                risk_factor_alignment_scores.append(
-                    get_reference_alignment_score(response_text, reference_text)
-                )
-        risk_factor_alignment = _macro_average(risk_factor_alignment_scores)
-        if not risk_factor_alignment_scores:
-            risk_factor_alignment = get_reference_alignment_score(response, risk_factor_anchor)
-
-        rows.append(
-            {
-                "Chatbot": row["Chatbot"],
-                "Risk-Assessment Reference Similarity": round(risk_factor_alignment, 4),
-            }
-        )
+    rows = [
+        score_risk_factor_row(row, reference_topic_map, risk_factor_anchor)
+        for _, row in chatbot_df.iterrows()
+    ]
 
     df = pd.DataFrame(rows, columns=RISK_FACTOR_DIMENSION_COLUMNS)
 
@@ -835,6 +1750,42 @@ def generate_risk_factor_dimension_scores(integrated_responses, include_overall_
     return df
 
 
+# =================================
+# COMBINED OUTPUT
+# =================================
+def append_component_scores_to_evaluation(
+    evaluation_df: pd.DataFrame,
+    not_hate_df: pd.DataFrame,
+    urgency_df: pd.DataFrame,
+    risk_factor_df: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Appends the three split benchmark scores to the main evaluation_scores.csv table.
+    This keeps classifier-based and reference-similarity scores in the same CSV as the
+    primary ROUGE/METEOR/negative sentiment/readability metrics.
+    """
+    merged_df = evaluation_df.copy()
+    component_dfs = [not_hate_df, urgency_df, risk_factor_df]
+
+    for component_df in component_dfs:
+        clean_component_df = component_df.copy()
+        merge_cols = [col for col in clean_component_df.columns if col != "Response"]
+        clean_component_df = clean_component_df[merge_cols]
+
+        # Drop any component columns already present so the final CSV has clean names
+        # instead of pandas-generated _x/_y suffixes.
+        duplicate_cols = [
+            col for col in clean_component_df.columns
+            if col != "Chatbot" and col in merged_df.columns
+        ]
+        if duplicate_cols:
+            merged_df = merged_df.drop(columns=duplicate_cols)
+
+        merged_df = merged_df.merge(clean_component_df, on="Chatbot", how="left")
+
+    return merged_df
+
+
 # backward-compatible wrappers for older imports
 def generate_identity_dimension_scores(integrated_responses, include_overall_average: bool = False):
     return generate_urgency_dimension_scores(integrated_responses, include_overall_average)
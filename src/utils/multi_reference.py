@@ -0,0 +1,202 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Multi-reference evaluation.
+
+Reference answers from several clinicians are given as platforms "Human: <name>". The main
+evaluation pools them into one reference per topic; this module scores every chatbot
+against each reference separately and reports, per metric, one column per reference plus
+the best-match and mean over references.
+
+Each reference topic is prepared once (ROUGE tokens, METEOR tokens and one batched
+embedding pass over all references), and each chatbot topic is prepared once and then
+compared with every reference; the ROUGE-N overlaps of a chatbot against all references
+come from one sparse n-gram matrix pass (see rouge_engine). Text preparation therefore grows
+with references + chatbots rather than references x chatbots.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.commonconst import *
+from src.utils.evaluation_algo import (
+    _build_topic_text_map,
+    _encode_unique_texts,
+    _macro_average,
+    _prepare_working_df,
+    _rouge_ngram_pattern,
+    _topic_sort_key,
+    append_overall_average_row,
+    is_reference_platform,
+    prepare_aggregated_views,
+    prepare_meteor_tokens,
+    prepare_rouge_text,
+    reference_name,
+    save_evaluation_to_csv,
+    score_prepared_meteor,
+    score_prepared_rouge,
+)
+from src.utils.rouge_engine import rouge_n_scores_by_pair
+
+
+# =================================
+# REFERENCE PREPARATION
+# =================================
+def prepare_reference_set(integrated_responses: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns {reference name: {"topic_map", "rouge", "meteor", "embeddings"}} with every
+    reference topic prepared once. Embeddings of all references come from one batched pass.
+    """
+    working_df = _prepare_working_df(integrated_responses)
+    reference_rows = working_df[working_df[PLATFORM_COL].map(is_reference_platform).astype(bool)].copy()
+    if reference_rows.empty:
+        raise ValueError("No human reference rows found in integrated responses file.")
+    reference_rows["ReferenceName"] = reference_rows[PLATFORM_COL].map(reference_name)
+
+    references = {}
+    for name, rows in reference_rows.groupby("ReferenceName", sort=True):
+        topic_map = _build_topic_text_map(rows)
+        if topic_map:
+            references[name] = {"topic_map": topic_map}
+
+    texts = [text for reference in references.values() for text in reference["topic_map"].values()]
+    vectors = iter(_encode_unique_texts(texts))
+    for reference in references.values():
+        topic_map = reference["topic_map"]
+        reference["rouge"] = {topic: prepare_rouge_text(text) for topic, text in topic_map.items()}
+        reference["meteor"] = {topic: prepare_meteor_tokens(text) for topic, text in topic_map.items()}
+        reference["embeddings"] = {topic: next(vectors) for topic in topic_map}
+    return references
+
+
+def multi_reference_columns(reference_names: List[str]) -> List[str]:
+    columns = ["Chatbot"]
+    for metric in MULTI_REFERENCE_METRICS:
+        columns += [f"{metric} [{name}]" for name in reference_names]
+        columns += [f"{metric} [{MULTI_REFERENCE_BEST_LABEL}]", f"{metric} [{MULTI_REFERENCE_MEAN_LABEL}]"]
+    return columns
+
+
+# =================================
+# SCORING
+# =================================
+def _scaled_cosine(response_vector: np.ndarray, reference_vector: np.ndarray) -> float:
+    # Embeddings are unit length, so the dot product is the cosine similarity.
+    sim = float(np.dot(response_vector, reference_vector))
+    return float(max(0.0, min(1.0, (sim + 1.0) / 2.0)))
+
+
+def _rouge_ngram_scores_by_cell(response_rouge, references, cells) -> Dict[Any, Dict[str, Any]]:
+    """
+    rougeN Scores of every (topic, reference) cell from one sparse-matrix pass per n: each
+    prepared response row is paired with the reference rows covering its topic.
+    """
+    topics = list(response_rouge)
+    token_lists = [response_rouge[topic]["tokens"] for topic in topics]
+    token_lists += [references[name]["rouge"][topic]["tokens"] for topic, name in cells]
+    topic_rows = {topic: row for row, topic in enumerate(topics)}
+    pairs = [(len(topics) + offset, topic_rows[topic]) for offset, (topic, _) in enumerate(cells)]
+
+    ngram_scores = {cell: {} for cell in cells}
+    for metric in ROUGE_METRICS:
+        match = _rouge_ngram_pattern.match(metric)
+        if not match:
+            continue
+        for cell, score in zip(cells, rouge_n_scores_by_pair(token_lists, pairs, int(match.group(1)))):
+            ngram_scores[cell][metric] = score
+    return ngram_scores
+
+
+def score_multi_reference_row(chatbot_view, references: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Per-reference macro averages over that reference's topics, plus best-match and mean:
+    per topic the max / mean over the references covering it, macro-averaged over topics.
+    """
+    response_topic_map = chatbot_view["TopicMap"]
+    names = list(references)
+    topics = sorted({topic for reference in references.values() for topic in reference["topic_map"]}, key=_topic_sort_key)
+    cells = [(topic, name) for topic in topics for name in names if topic in references[name]["topic_map"]]
+
+    # Each response topic is prepared once and then compared with every reference.
+    response_rouge = {topic: prepare_rouge_text(response_topic_map.get(topic, "")) for topic in topics}
+    response_meteor = {topic: prepare_meteor_tokens(response_topic_map.get(topic, "")) for topic in topics}
+    ngram_scores = _rouge_ngram_scores_by_cell(response_rouge, references, cells)
+    present = [topic for topic in topics if response_topic_map.get(topic, "")]
+    response_vectors = dict(zip(present, _encode_unique_texts([response_topic_map[t] for t in present])))
+
+    scores = {metric: np.full((len(topics), len(names)), np.nan) for metric in MULTI_REFERENCE_METRICS}
+    topic_index = {topic: index for index, topic in enumerate(topics)}
+    name_index = {name: index for index, name in enumerate(names)}
+    for topic, name in cells:
+        reference = references[name]
+        position = (topic_index[topic], name_index[name])
+        for metric in MULTI_REFERENCE_METRICS:
+            if metric == "ROUGE Lexical Overlap":
+                value = score_prepared_rouge(
+                    reference["rouge"][topic], response_rouge[topic], ngram_scores[(topic, name)]
+                )
+            elif metric == "METEOR Lexical-Semantic Alignment":
+                value = score_prepared_meteor(reference["meteor"][topic], response_meteor[topic])
+            elif metric == "Reference Embedding Similarity":
+                value = 0.0
+                if topic in response_vectors:
+                    value = _scaled_cosine(response_vectors[topic], reference["embeddings"][topic])
+            else:
+                raise ValueError(f"Unsupported metric in MULTI_REFERENCE_METRICS: {metric}")
+            scores[metric][position] = value
+
+    row = {"Chatbot": chatbot_view["Chatbot"]}
+    for metric in MULTI_REFERENCE_METRICS:
+        metric_scores = scores[metric]
+        for index, name in enumerate(names):
+            column = metric_scores[:, index]
+            row[f"{metric} [{name}]"] = _macro_average(column[~np.isnan(column)].tolist())
+        covered = ~np.isnan(metric_scores).all(axis=1)
+        row[f"{metric} [{MULTI_REFERENCE_BEST_LABEL}]"] = _macro_average(np.nanmax(metric_scores[covered], axis=1).tolist())
+        row[f"{metric} [{MULTI_REFERENCE_MEAN_LABEL}]"] = _macro_average(np.nanmean(metric_scores[covered], axis=1).tolist())
+    return row
+
+
+def generate_multi_reference_scores(integrated_responses, include_overall_average: bool = True) -> pd.DataFrame:
+    """One row per chatbot with per-reference, best-match and mean scores for MULTI_REFERENCE_METRICS."""
+    references = prepare_reference_set(integrated_responses)
+    views = prepare_aggregated_views(integrated_responses)
+    rows = [score_multi_reference_row(view, references) for _, view in views["chatbot_df"].iterrows()]
+    df = pd.DataFrame(rows, columns=multi_reference_columns(list(references)))
+    if include_overall_average:
+        df = append_overall_average_row(df)
+    return df
+
+
+def list_reference_names(integrated_responses: pd.DataFrame) -> List[str]:
+    platforms = integrated_responses[PLATFORM_COL].astype(str).str.strip()
+    return sorted(platforms[platforms.map(is_reference_platform).astype(bool)].map(reference_name).unique())
+
+
+def count_reference_platforms(integrated_responses: pd.DataFrame) -> int:
+    return len(list_reference_names(integrated_responses))
+
+
+def generate_multi_reference_scores_for_run(integrated_responses, include_overall_average: bool = True):
+    """The multi-reference table when integrated_responses has several references, else None."""
+    if count_reference_platforms(integrated_responses) < 2:
+        return None
+    return generate_multi_reference_scores(integrated_responses, include_overall_average=include_overall_average)
+
+
+def save_multi_reference_scores(multi_reference_df, output_path: str = MULTI_REFERENCE_SCORES_CSV_PATH):
+    """Writes the table; None (fewer than two references) removes a stale file from an earlier run."""
+    if multi_reference_df is None:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    save_evaluation_to_csv(output_path, multi_reference_df)
@@ -11,6 +11,22 @@ import numpy as np
 import pandas as pd
 from scipy import stats
 from src.commonconst import *
+from src.utils.bootstrap_intervals import (
+    attach_confidence_intervals,
+    bootstrap_ci_columns,
+    generate_bootstrap_confidence_intervals,
+    save_bootstrap_confidence_intervals,
+    save_macro_topic_scores,
+)
+from src.utils.checkpointing import checkpointed_cell
+from src.utils.permutation_tests import permutation_anova_p_values
+from src.utils.posthoc_tests import generate_posthoc_pairwise_comparisons, save_posthoc_pairwise_comparisons
+from src.utils.sensitivity_analysis import (
+    generate_leave_one_topic_out_scores,
+    save_sensitivity_outputs,
+    summarize_rank_stability,
+)
+from src.utils.run_metrics import timed_stage
 
 def _sanitize_filename(name: str) -> str:
     name = str(name).strip().lower()
@@ -67,7 +83,8 @@ def append_overall_average_row(df: pd.DataFrame, label: str = OVERALL_AVERAGE_LA
     return pd.concat([summary_df, pd.DataFrame([overall_row])], ignore_index=True)
 
 
-def plot_metric_bar(df: pd.DataFrame, metric: str, output_dir: str):
+@timed_stage("plotting", describe=lambda df, metric, output_dir, **kwargs: {"figure": metric})
+def plot_metric_bar(df: pd.DataFrame, metric: str, output_dir: str, title_suffix: str = ""):
     if metric not in df.columns:
         print(f"[WARN] Metric '{metric}' not found in dataframe.")
         return
@@ -80,7 +97,11 @@ def plot_metric_bar(df: pd.DataFrame, metric: str, output_dir: str):
         print("[WARN] 'Chatbot' column not found in dataframe.")
         return
 
-    plot_df = plot_df[["Chatbot", metric]].copy()
+    # Bootstrap interval bounds (see bootstrap_intervals) are drawn as error bars when present.
+    ci_cols = [col for col in bootstrap_ci_columns(metric) if col in plot_df.columns]
+    if len(ci_cols) < 2:
+        ci_cols = []
+    plot_df = plot_df[["Chatbot", metric] + ci_cols].copy()
     plot_df = _coerce_metric_column(plot_df, metric)
 
     if plot_df.empty:
@@ -90,6 +111,7 @@ def plot_metric_bar(df: pd.DataFrame, metric: str, output_dir: str):
     reference_metric_map = {
         "Negative Sentiment Probability": "Reference Negative Sentiment Probability",
         "Flesch Reading Ease": "Reference Flesch Reading Ease",
+        LEXICAL_TONE_PROXY_METRIC: f"Reference {LEXICAL_TONE_PROXY_METRIC}",
     }
     reference_value = None
     reference_col = reference_metric_map.get(metric)
@@ -100,6 +122,20 @@ def plot_metric_bar(df: pd.DataFrame, metric: str, output_dir: str):
 
     plt.figure(figsize=PLOT_FIGSIZE)
     plt.bar(plot_df["Chatbot"], plot_df[metric])
+    if ci_cols:
+        # Anchored at the bar (the point estimate); percentile bounds can be asymmetric.
+        point = plot_df[metric].to_numpy(dtype=float)
+        lower = pd.to_numeric(plot_df[ci_cols[0]], errors="coerce").to_numpy(dtype=float)
+        upper = pd.to_numeric(plot_df[ci_cols[1]], errors="coerce").to_numpy(dtype=float)
+        plt.errorbar(
+            np.arange(len(plot_df)),
+            point,
+            yerr=[np.clip(point - lower, 0.0, None), np.clip(upper - point, 0.0, None)],
+            fmt="none",
+            ecolor="black",
+            capsize=4,
+            label=f"{BOOTSTRAP_CONFIDENCE_LEVEL:.0%} bootstrap CI of the topic macro average",
+        )
     if reference_value is not None:
         plt.axhline(
             y=reference_value,
@@ -107,10 +143,11 @@ def plot_metric_bar(df: pd.DataFrame, metric: str, output_dir: str):
             linewidth=1.8,
             label=f"Human reference = {reference_value:.4f}",
         )
+    if reference_value is not None or ci_cols:
         plt.legend()
     plt.xticks(rotation=ROTATION, ha="right")
     plt.ylabel(metric)
-    plt.title(metric)
+    plt.title(f"{metric}{title_suffix}")
     plt.tight_layout()
 
     output_path = os.path.join(output_dir, f"{_sanitize_filename(metric)}.png")
@@ -118,6 +155,7 @@ def plot_metric_bar(df: pd.DataFrame, metric: str, output_dir: str):
     plt.close()
 
 
+@timed_stage("plotting")
 def plot_not_hate_metric(not_hate_df: pd.DataFrame):
     _ensure_dir(PLOTS_DIR)
     clean_df = _remove_overall_average_row(not_hate_df)
@@ -163,6 +201,7 @@ def plot_not_hate_metric(not_hate_df: pd.DataFrame):
         print("[WARN] Non-Hateful Language Probability plot skipped because the dataframe is empty.")
 
 
+@timed_stage("plotting")
 def plot_urgency_dimension(urgency_df: pd.DataFrame):
     _ensure_dir(PLOTS_DIR)
     clean_df = _remove_overall_average_row(urgency_df)
@@ -193,6 +232,7 @@ def plot_urgency_dimension(urgency_df: pd.DataFrame):
     plt.close()
 
 
+@timed_stage("plotting")
 def plot_risk_factor_dimension(risk_factor_df: pd.DataFrame):
     _ensure_dir(PLOTS_DIR)
     clean_df = _remove_overall_average_row(risk_factor_df)
@@ -328,67 +368,146 @@ def generate_topic_level_metric_scores_for_anova(integrated_responses: pd.DataFr
         print("[WARN] ANOVA skipped: integrated responses not provided.")
         return pd.DataFrame()
 
-    from src.utils.evaluation_algo import (
-        calculate_average_rouge,
-        calculate_meteor,
-        evaluate_negative_tone_probability,
-        evaluate_readability_score,
-        get_not_hate_probability,
-        get_reference_alignment_score,
-        prepare_aggregated_views,
-    )
+    from src.utils.evaluation_algo import prepare_aggregated_views
 
     views = prepare_aggregated_views(integrated_responses)
     reference_topic_map = views["reference_topic_map"]
     chatbot_topic_df = views["chatbot_topic_df"]
 
-    target_topics = [
-        topic for topic in ROBUSTNESS_TOPIC_ORDER
-        if topic in reference_topic_map
-    ]
-    target_topics = sorted(target_topics, key=_topic_sort_key_for_robustness)
-
+    target_topics = get_anova_target_topics(reference_topic_map)
     if not target_topics:
         print("[WARN] ANOVA skipped: none of the formal benchmark topics were found.")
         return pd.DataFrame()
 
     rows = []
     for _, row in chatbot_topic_df.iterrows():
-        chatbot = str(row["Chatbot"]).strip()
-        topic = str(row[TOPIC_COL]).strip()
-        response_text = str(row["TopicResponse"]).strip()
+        base_row = score_topic_level_row(
+            chatbot=row["Chatbot"],
+            topic=row[TOPIC_COL],
+            response_text=row["TopicResponse"],
+            reference_topic_map=reference_topic_map,
+            target_topics=target_topics,
+        )
+        if base_row is not None:
+            rows.append(base_row)
 
-        if topic not in target_topics:
-            continue
+    return finalize_topic_level_table(rows, target_topics)
 
-        reference_text = str(reference_topic_map.get(topic, "")).strip()
-        if not reference_text or not response_text:
-            continue
 
-        base_row = {
-            "Chatbot": chatbot,
-            "Topic": topic,
-            "ROUGE Lexical Overlap": calculate_average_rouge(reference_text, response_text),
-            "METEOR Lexical-Semantic Alignment": calculate_meteor(reference_text, response_text),
-            "Negative Sentiment Probability": evaluate_negative_tone_probability(response_text),
-            "Flesch Reading Ease": evaluate_readability_score(response_text),
-            "Non-Hateful Language Probability": round(float(get_not_hate_probability(response_text)), 4),
-            "Crisis-Response Reference Similarity": np.nan,
-            "Risk-Assessment Reference Similarity": np.nan,
-        }
+def get_anova_target_topics(reference_topic_map: dict) -> list[str]:
+    """Formal benchmark topics present in the human reference, in ROBUSTNESS_TOPIC_ORDER."""
+    target_topics = [
+        topic for topic in ROBUSTNESS_TOPIC_ORDER
+        if topic in reference_topic_map
+    ]
+    return sorted(target_topics, key=_topic_sort_key_for_robustness)
 
-        if topic in URGENCY_REFERENCE_TOPICS:
-            base_row["Crisis-Response Reference Similarity"] = round(
-                float(get_reference_alignment_score(response_text, reference_text)), 4
-            )
 
-        if topic in RISK_FACTOR_REFERENCE_TOPICS:
-            base_row["Risk-Assessment Reference Similarity"] = round(
-                float(get_reference_alignment_score(response_text, reference_text)), 4
-            )
+def score_topic_level_row(
+    chatbot: str,
+    topic: str,
+    response_text: str,
+    reference_topic_map: dict,
+    target_topics: list[str],
+) -> dict | None:
+    """Score one (chatbot, topic) cell of the ANOVA table; returns None for skipped cells."""
+    from src.utils.evaluation_algo import (
+        calculate_average_rouge,
+        calculate_meteor,
+        evaluate_negative_tone_probability,
+        evaluate_readability_score,
+        get_not_hate_probability,
+        reference_alignment_cell,
+    )
+
+    chatbot = str(chatbot).strip()
+    topic = str(topic).strip()
+    response_text = str(response_text).strip()
+
+    if topic not in target_topics:
+        return None
+
+    reference_text = str(reference_topic_map.get(topic, "")).strip()
+    if not reference_text or not response_text:
+        return None
+
+    # Cells share (chatbot, topic, metric) keys with the macro-average generators, so a
+    # checkpointed run scores each topic-level value only once.
+    def cell(metric, texts, compute_fn):
+        return checkpointed_cell(chatbot, topic, metric, texts, compute_fn)
+
+    pair = (reference_text, response_text)
+    base_row = {
+        "Chatbot": chatbot,
+        "Topic": topic,
+        "ROUGE Lexical Overlap": cell(
+            "ROUGE Lexical Overlap", pair,
+            lambda: calculate_average_rouge(reference_text, response_text),
+        ),
+        "METEOR Lexical-Semantic Alignment": cell(
+            "METEOR Lexical-Semantic Alignment", pair,
+            lambda: calculate_meteor(reference_text, response_text),
+        ),
+        "Negative Sentiment Probability": cell(
+            "Negative Sentiment Probability", (response_text,),
+            lambda: evaluate_negative_tone_probability(response_text),
+        ),
+        "Flesch Reading Ease": cell(
+            "Flesch Reading Ease", (response_text,),
+            lambda: evaluate_readability_score(response_text),
+        ),
+        "Non-Hateful Language Probability": round(
+            float(cell(
+                "Non-Hateful Language Probability", (response_text,),
+                lambda: get_not_hate_probability(response_text),
+            )),
+            4,
+        ),
+        "Crisis-Response Reference Similarity": np.nan,
+        "Risk-Assessment Reference Similarity": np.nan,
+    }
+
+    if topic in URGENCY_REFERENCE_TOPICS:
+        base_row["Crisis-Response Reference Similarity"] = round(
+            float(reference_alignment_cell(
+                chatbot, topic, "Crisis-Response Reference Similarity", response_text, reference_text,
+            )),
+            4,
+        )
+
+    if topic in RISK_FACTOR_REFERENCE_TOPICS:
+        base_row["Risk-Assessment Reference Similarity"] = round(
+            float(reference_alignment_cell(
+                chatbot, topic, "Risk-Assessment Reference Similarity", response_text, reference_text,
+            )),
+            4,
+        )
 
-        rows.append(base_row)
+    return base_row
 
+
+def score_topic_level_rows_for_chatbot(
+    chatbot_view,
+    reference_topic_map: dict,
+    target_topics: list[str],
+) -> list[dict]:
+    """All topic-level ANOVA rows for one chatbot view (Chatbot, TopicMap)."""
+    rows = []
+    for topic in target_topics:
+        topic_row = score_topic_level_row(
+            chatbot=chatbot_view["Chatbot"],
+            topic=topic,
+            response_text=chatbot_view["TopicMap"].get(topic, ""),
+            reference_topic_map=reference_topic_map,
+            target_topics=target_topics,
+        )
+        if topic_row is not None:
+            rows.append(topic_row)
+    return rows
+
+
+def finalize_topic_level_table(rows: list[dict], target_topics: list[str]) -> pd.DataFrame:
+    """Build the topic-level table with the canonical Chatbot/Topic ordering."""
     topic_level_df = pd.DataFrame(rows)
     if topic_level_df.empty:
         return topic_level_df
@@ -402,12 +521,19 @@ def generate_topic_level_metric_scores_for_anova(integrated_responses: pd.DataFr
     return topic_level_df
 
 
-def generate_oneway_anova_by_metric(topic_level_df: pd.DataFrame) -> pd.DataFrame:
+@timed_stage("anova")
+def generate_oneway_anova_by_metric(
+    topic_level_df: pd.DataFrame,
+    permutations: int = PERMUTATION_TEST_ITERATIONS,
+    workers: int = PERMUTATION_TEST_WORKERS,
+) -> pd.DataFrame:
     """
     Run one-way ANOVA for each benchmark metric.
 
     For each metric, the null hypothesis is that the mean topic-level score is equal
-    across chatbot systems. The grouping variable is Chatbot.
+    across chatbot systems. The grouping variable is Chatbot. Next to the F-test p-value,
+    a permutation p-value over `permutations` chatbot-label shuffles is reported, which
+    does not rely on normality (see permutation_tests).
     """
     if topic_level_df is None or topic_level_df.empty:
         print("[WARN] ANOVA skipped: topic-level metric table is empty.")
@@ -418,6 +544,8 @@ def generate_oneway_anova_by_metric(topic_level_df: pd.DataFrame) -> pd.DataFram
         print("[WARN] ANOVA skipped: no numeric robustness metrics available.")
         return pd.DataFrame()
 
+    permutation_p_values = permutation_anova_p_values(topic_level_df, metric_cols, permutations, workers)
+
     rows = []
     for metric in metric_cols:
         metric_df = topic_level_df[["Chatbot", metric]].copy()
@@ -457,6 +585,11 @@ def generate_oneway_anova_by_metric(topic_level_df: pd.DataFrame) -> pd.DataFram
                 "F Statistic": round(float(f_statistic), 4) if pd.notna(f_statistic) else np.nan,
                 "p-value": round(float(p_value), 6) if pd.notna(p_value) else np.nan,
                 "Eta Squared": round(float(eta_squared), 4) if pd.notna(eta_squared) else np.nan,
+                "Permutation p-value": (
+                    round(float(permutation_p_values[metric]), 6)
+                    if pd.notna(permutation_p_values[metric]) else np.nan
+                ),
+                "Permutations": permutations,
                 "Group Sizes": group_sizes,
                 "Interpretation": (
                     "Statistically significant chatbot differences (p < .05)"
@@ -482,6 +615,7 @@ def save_oneway_anova_outputs(
         anova_df.to_csv(ONEWAY_ANOVA_CSV_PATH, index=False)
 
 
+@timed_stage("plotting")
 def plot_oneway_anova_p_values(anova_df: pd.DataFrame):
     if anova_df is None or anova_df.empty or "p-value" not in anova_df.columns:
         return
@@ -508,27 +642,134 @@ def plot_oneway_anova_p_values(anova_df: pd.DataFrame):
     plt.close()
 
 
+@timed_stage("plotting", describe=lambda posthoc_df: {"figure": "posthoc_pairwise_significance"})
+def plot_posthoc_significance_heatmap(posthoc_df: pd.DataFrame):
+    """One chatbot x chatbot panel per metric, coloured by -log10(Tukey HSD p); significant pairs are marked."""
+    if posthoc_df is None or posthoc_df.empty or "Tukey HSD p-value" not in posthoc_df.columns:
+        return
+
+    metrics = list(dict.fromkeys(posthoc_df["Metric"]))
+    chatbots = sorted(set(posthoc_df["Chatbot A"].astype(str)) | set(posthoc_df["Chatbot B"].astype(str)))
+    position = {chatbot: index for index, chatbot in enumerate(chatbots)}
+
+    columns = min(3, len(metrics))
+    rows = int(np.ceil(len(metrics) / columns))
+    panel_size = max(3.5, len(chatbots) * 0.25)
+    _ensure_dir(PLOTS_DIR)
+    fig, axes = plt.subplots(rows, columns, figsize=(panel_size * columns + 1.5, panel_size * rows), squeeze=False)
+    image = None
+    for ax, metric in zip(axes.ravel(), metrics):
+        metric_df = posthoc_df[posthoc_df["Metric"] == metric]
+        first = metric_df["Chatbot A"].astype(str).map(position).to_numpy()
+        second = metric_df["Chatbot B"].astype(str).map(position).to_numpy()
+        p_values = pd.to_numeric(metric_df["Tukey HSD p-value"], errors="coerce").to_numpy(dtype=float)
+
+        matrix = np.full((len(chatbots), len(chatbots)), np.nan)
+        strength = -np.log10(np.clip(p_values, 1e-300, 1.0))
+        matrix[first, second] = strength
+        matrix[second, first] = strength
+        image = ax.imshow(matrix, vmin=0.0, vmax=POSTHOC_HEATMAP_MAX_LOG10_P, cmap="viridis")
+
+        significant = p_values < POSTHOC_ALPHA
+        ax.scatter(
+            np.concatenate([second[significant], first[significant]]),
+            np.concatenate([first[significant], second[significant]]),
+            marker="s", s=12, facecolors="none", edgecolors="red", linewidths=0.6,
+        )
+
+        ax.set_title(metric, fontsize=9)
+        ax.set_xticks(range(len(chatbots)))
+        ax.set_yticks(range(len(chatbots)))
+        ax.set_xticklabels(chatbots, rotation=90, fontsize=6)
+        ax.set_yticklabels(chatbots, fontsize=6)
+    for ax in axes.ravel()[len(metrics):]:
+        ax.axis("off")
+
+    if image is not None:
+        fig.colorbar(image, ax=axes.ravel().tolist(), label="-log10(Tukey HSD p-value)")
+    fig.suptitle(f"Pairwise Chatbot Differences (marked: Tukey HSD p < {POSTHOC_ALPHA})")
+    fig.savefig(POSTHOC_HEATMAP_PLOT_PATH, dpi=DPI)
+    plt.close(fig)
+
+
 def run_robustness_outputs(
     evaluation_df: pd.DataFrame,
     integrated_responses: pd.DataFrame | None = None,
+    topic_level_df: pd.DataFrame | None = None,
 ):
     """
-    Robustness output is intentionally limited to one-way ANOVA.
+    Robustness output: one-way ANOVA (with permutation p-values), all-pairs post-hoc
+    comparisons (Tukey HSD, Holm-corrected Welch t-tests) with their significance heatmap,
+    and leave-one-topic-out averages with per-chatbot rank stability.
+
+    A precomputed topic_level_df (for example the table written by the streaming
+    evaluator) can be passed instead of integrated_responses to skip rescoring.
 
     Removed from the active pipeline:
     - Spearman metric-correlation matrix
-    - leave-one-topic-out sensitivity checks
     - normalized sensitivity summaries
     """
-    if integrated_responses is None:
-        print("[WARN] ANOVA skipped: integrated_responses is required for topic-level ANOVA.")
-        return
+    if topic_level_df is None:
+        if integrated_responses is None:
+            print("[WARN] ANOVA skipped: integrated_responses is required for topic-level ANOVA.")
+            return
+        topic_level_df = generate_topic_level_metric_scores_for_anova(integrated_responses)
 
-    topic_level_df = generate_topic_level_metric_scores_for_anova(integrated_responses)
     anova_df = generate_oneway_anova_by_metric(topic_level_df)
     save_oneway_anova_outputs(anova_df=anova_df, topic_level_df=topic_level_df)
     plot_oneway_anova_p_values(anova_df)
 
+    posthoc_df = generate_posthoc_pairwise_comparisons(topic_level_df, anova_df)
+    save_posthoc_pairwise_comparisons(posthoc_df)
+    plot_posthoc_significance_heatmap(posthoc_df)
+
+    loo_df = generate_leave_one_topic_out_scores(topic_level_df)
+    save_sensitivity_outputs(loo_df, summarize_rank_stability(loo_df))
+
+
+def plot_all_metrics(
+    evaluation_df: pd.DataFrame,
+    not_hate_df: pd.DataFrame | None = None,
+    urgency_df: pd.DataFrame | None = None,
+    risk_factor_df: pd.DataFrame | None = None,
+    ci_df: pd.DataFrame | None = None,
+):
+    """
+    Figure-only part of process_all_outputs(): metric bars and split component plots.
+    ci_df (bootstrap_confidence_intervals.csv) adds error bars to the metric bars.
+    """
+    _cleanup_plots_directory()
+    bar_df = attach_confidence_intervals(evaluation_df, ci_df)
+    for metric in VISUALIZATION_METRICS:
+        plot_metric_bar(bar_df, metric, PLOTS_DIR)
+
+    if not_hate_df is not None:
+        plot_not_hate_metric(not_hate_df)
+    if urgency_df is not None:
+        plot_urgency_dimension(urgency_df)
+    if risk_factor_df is not None:
+        plot_risk_factor_dimension(risk_factor_df)
+
+
+def plot_preview_metrics(preview_df: pd.DataFrame, output_dir: str = PREVIEW_PLOTS_DIR):
+    """Bar charts for the fast lexical preview, titled as a preview and kept out of PLOTS_DIR."""
+    for metric in preview_df.columns:
+        if metric in ("Chatbot", "Response", "Profile") or metric.startswith("Reference "):
+            continue
+        plot_metric_bar(preview_df, metric, output_dir, title_suffix=f" [{PREVIEW_PROFILE_LABEL}]")
+
+
+def metric_plot_paths() -> list[str]:
+    """Figures written by plot_all_metrics()."""
+    return [
+        os.path.join(PLOTS_DIR, f"{_sanitize_filename(metric)}.png")
+        for metric in VISUALIZATION_METRICS
+    ] + [
+        os.path.join(PLOTS_DIR, "non_hateful_language_probability.png"),
+        os.path.join(PLOTS_DIR, "crisis_response_reference_similarity.png"),
+        os.path.join(PLOTS_DIR, "risk_assessment_reference_similarity.png"),
+    ]
+
 
 def process_all_outputs(
     evaluation_df: pd.DataFrame,
@@ -538,25 +779,36 @@ def process_all_outputs(
     risk_factor_df: pd.DataFrame | None = None,
     identity_df: pd.DataFrame | None = None,
     safety_df: pd.DataFrame | None = None,
+    topic_level_df: pd.DataFrame | None = None,
+    macro_topic_df: pd.DataFrame | None = None,
 ):
-    _cleanup_plots_directory()
-    for metric in VISUALIZATION_METRICS:
-        plot_metric_bar(evaluation_df, metric, PLOTS_DIR)
-
     # Accept both new split arguments and old positional identity/safety calls.
     if urgency_df is None and identity_df is not None:
         urgency_df = identity_df
     if risk_factor_df is None and safety_df is not None:
         risk_factor_df = safety_df
 
-    if not_hate_df is not None:
-        plot_not_hate_metric(not_hate_df)
-    if urgency_df is not None:
-        plot_urgency_dimension(urgency_df)
-    if risk_factor_df is not None:
-        plot_risk_factor_dimension(risk_factor_df)
+    # The macro-topic cells behind the bar heights feed the bootstrap error bars.
+    if macro_topic_df is None and integrated_responses is not None:
+        from src.utils.evaluation_algo import generate_macro_topic_scores
+
+        macro_topic_df = generate_macro_topic_scores(integrated_responses)
+    ci_df = None
+    if macro_topic_df is not None:
+        save_macro_topic_scores(macro_topic_df)
+        ci_df = generate_bootstrap_confidence_intervals(macro_topic_df)
+        save_bootstrap_confidence_intervals(ci_df)
+
+    plot_all_metrics(
+        evaluation_df=evaluation_df,
+        not_hate_df=not_hate_df,
+        urgency_df=urgency_df,
+        risk_factor_df=risk_factor_df,
+        ci_df=ci_df,
+    )
 
     run_robustness_outputs(
         evaluation_df=evaluation_df,
         integrated_responses=integrated_responses,
+        topic_level_df=topic_level_df,
     )
@@ -0,0 +1,99 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Permutation test for chatbot differences in the topic-level score table.
+
+With only a handful of topic-level observations per chatbot, the F distribution behind
+scipy.stats.f_oneway is a rough approximation. Here the chatbot labels are shuffled
+PERMUTATION_TEST_ITERATIONS times and the p-value is the share of shuffles whose between-
+chatbot sum of squares is at least the observed one. SS_total does not change under a
+shuffle, so SS_between orders the shuffles exactly as F and eta-squared do.
+
+Shuffles are processed in blocks as (shuffles x observations) label matrices: one
+np.bincount over offset labels gives every shuffle's group sums at once. Each block has its
+own seed, so the p-values are the same whether blocks run in-process or in a process pool.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.commonconst import *
+
+
+def _between_group_ss(values: np.ndarray, labels: np.ndarray, group_count: int) -> np.ndarray:
+    """SS_between (without the constant grand-mean term) for each row of a label matrix."""
+    rows = labels.shape[0]
+    offsets = labels + group_count * np.arange(rows)[:, None]
+    sums = np.bincount(offsets.ravel(), weights=np.tile(values, rows), minlength=rows * group_count)
+    counts = np.bincount(labels[0], minlength=group_count)
+    return (sums.reshape(rows, group_count) ** 2 / counts).sum(axis=1)
+
+
+def _count_extreme_shuffles(task: Tuple[np.ndarray, np.ndarray, int, float, int, int]) -> int:
+    values, labels, group_count, observed, block_size, seed = task
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permuted(np.tile(labels, (block_size, 1)), axis=1)
+    null_ss = _between_group_ss(values, shuffled, group_count)
+    # Relative tolerance so ties with the observed statistic count despite rounding.
+    return int(np.sum(null_ss >= observed - 1e-12 * max(1.0, abs(observed))))
+
+
+def _shuffle_tasks(values, labels, group_count, observed, permutations, metric_index) -> List[tuple]:
+    tasks = []
+    for block_index, start in enumerate(range(0, permutations, PERMUTATION_TEST_BLOCK_SIZE)):
+        block_size = min(PERMUTATION_TEST_BLOCK_SIZE, permutations - start)
+        seed = [RANDOM_SEED, metric_index, block_index]
+        tasks.append((values, labels, group_count, observed, block_size, seed))
+    return tasks
+
+
+def permutation_anova_p_values(
+    topic_level_df: pd.DataFrame,
+    metrics: List[str],
+    permutations: int = PERMUTATION_TEST_ITERATIONS,
+    workers: int = PERMUTATION_TEST_WORKERS,
+) -> Dict[str, float]:
+    """
+    {metric: permutation p-value} for chatbot differences in each metric, using the
+    (1 + extreme shuffles) / (1 + shuffles) estimate. Metrics with fewer than two chatbots
+    or no within-chatbot degrees of freedom get NaN. workers > 1 spreads the shuffle blocks
+    of all metrics over a process pool.
+    """
+    tasks_by_metric: Dict[str, List[tuple]] = {}
+    p_values = {}
+    for metric_index, metric in enumerate(metrics):
+        metric_df = topic_level_df[["Chatbot", metric]].copy()
+        metric_df[metric] = pd.to_numeric(metric_df[metric], errors="coerce")
+        metric_df = metric_df.dropna(subset=[metric])
+
+        labels, chatbots = pd.factorize(metric_df["Chatbot"].astype(str))
+        values = metric_df[metric].to_numpy(dtype=float)
+        group_count = len(chatbots)
+        if group_count < 2 or len(values) <= group_count or permutations <= 0:
+            p_values[metric] = np.nan
+            continue
+
+        observed = float(_between_group_ss(values, labels[None, :], group_count)[0])
+        tasks_by_metric[metric] = _shuffle_tasks(values, labels, group_count, observed, permutations, metric_index)
+
+    all_tasks = [task for tasks in tasks_by_metric.values() for task in tasks]
+    if workers > 1 and len(all_tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = list(executor.map(_count_extreme_shuffles, all_tasks))
+    else:
+        counts = [_count_extreme_shuffles(task) for task in all_tasks]
+
+    position = 0
+    for metric, tasks in tasks_by_metric.items():
+        extreme = sum(counts[position : position + len(tasks)])
+        position += len(tasks)
+        p_values[metric] = (1 + extreme) / (1 + permutations)
+    return p_values
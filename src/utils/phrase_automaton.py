@@ -0,0 +1,70 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Aho-Corasick multi-phrase matcher over token sequences.
+
+Every phrase of a phrase list is a token sequence with a label. The phrases are compiled
+once into a trie with failure links, and a text is then scanned token by token in a single
+pass that reports the labels of every phrase occurring in it, however many phrases the list
+holds. Matching on tokens rather than characters means phrases only match whole words.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, List, Sequence, Set, Tuple
+
+
+def build_phrase_automaton(phrases: Iterable[Tuple[Hashable, Sequence[str]]]) -> Dict[str, Any]:
+    """Compiles (label, phrase tokens) pairs into {"goto", "fail", "outputs"}; empty phrases are skipped."""
+    goto: List[Dict[str, int]] = [{}]
+    outputs: List[Set[Hashable]] = [set()]
+    for label, tokens in phrases:
+        if not tokens:
+            continue
+        state = 0
+        for token in tokens:
+            next_state = goto[state].get(token)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][token] = next_state
+                goto.append({})
+                outputs.append(set())
+            state = next_state
+        outputs[state].add(label)
+
+    # Breadth-first, so a state's failure target is final before its children use it.
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for token, child in goto[state].items():
+            queue.append(child)
+            fallback = fail[state]
+            while fallback and token not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[child] = goto[fallback].get(token, 0)
+            # A phrase ending here also ends every phrase that is a suffix of it.
+            outputs[child] |= outputs[fail[child]]
+
+    return {"goto": goto, "fail": fail, "outputs": [frozenset(labels) for labels in outputs]}
+
+
+def match_phrase_labels(automaton: Dict[str, Any], tokens: Sequence[str]) -> Set[Hashable]:
+    """Labels of every phrase that occurs in tokens, found in one left-to-right scan."""
+    goto = automaton["goto"]
+    fail = automaton["fail"]
+    outputs = automaton["outputs"]
+
+    labels: Set[Hashable] = set()
+    state = 0
+    for token in tokens:
+        while state and token not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(token, 0)
+        if outputs[state]:
+            labels |= outputs[state]
+    return labels
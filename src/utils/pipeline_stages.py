@@ -0,0 +1,475 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Stage DAG for the batch pipeline in main.py.
+
+Each stage declares its input files, output files, the commonconst settings it reads and
+the source files that implement it. A stage's fingerprint is a SHA-256 over the content
+of all of those, and a stage is skipped when its fingerprint matches the last successful
+run and all of its outputs still exist. Changing DPI therefore reruns only the plotting
+stages, and re-extracting identical docx text leaves every downstream stage up to date.
+
+Stages (in dependency order):
+- extract:      docx files -> processed and integrated CSVs
+- evaluate:     integrated responses -> evaluation_scores.csv, macro_topic_metric_scores.csv
+                (and multi_reference_scores.csv when there are several references)
+- topic_scores: integrated responses -> topic-level ANOVA table
+- anova:        topic-level table -> oneway_anova_by_metric.csv
+- posthoc:      topic-level table + ANOVA table -> posthoc_pairwise_comparisons.csv
+- sensitivity:  topic-level table -> leave_one_topic_out_scores.csv, *_rank_stability.csv
+- bootstrap:    macro_topic_metric_scores.csv -> bootstrap_confidence_intervals.csv
+- plots:        evaluation_scores.csv + bootstrap intervals -> metric figures
+- anova_plot:   oneway_anova_by_metric.csv -> ANOVA p-value figure
+- posthoc_plot: posthoc_pairwise_comparisons.csv -> pairwise significance heatmap
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+import src.commonconst as commonconst
+from src.commonconst import *
+from src.utils.reference_index import active_reference_library_path
+from src.utils.run_metrics import stage_timer
+
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DATA_PROCESSING_SOURCE = os.path.join(_SRC_DIR, "data", "data_processing.py")
+_EVALUATION_SOURCES = [
+    os.path.join(_SRC_DIR, "utils", "evaluation_algo.py"),
+    os.path.join(_SRC_DIR, "utils", "checkpointing.py"),
+    os.path.join(_SRC_DIR, "utils", "reference_index.py"),
+    os.path.join(_SRC_DIR, "utils", "multi_reference.py"),
+    os.path.join(_SRC_DIR, "utils", "phrase_automaton.py"),
+    os.path.join(_SRC_DIR, "utils", "rouge_engine.py"),
+    os.path.join(_SRC_DIR, "utils", "text_store.py"),
+    _DATA_PROCESSING_SOURCE,
+]
+_OUTPUT_SOURCE = os.path.join(_SRC_DIR, "utils", "output_processing.py")
+_PERMUTATION_SOURCE = os.path.join(_SRC_DIR, "utils", "permutation_tests.py")
+_BOOTSTRAP_SOURCE = os.path.join(_SRC_DIR, "utils", "bootstrap_intervals.py")
+_POSTHOC_SOURCE = os.path.join(_SRC_DIR, "utils", "posthoc_tests.py")
+_SENSITIVITY_SOURCE = os.path.join(_SRC_DIR, "utils", "sensitivity_analysis.py")
+
+_SCORING_CONFIG = [
+    "HUMAN_PLATFORM",
+    "MULTI_REFERENCE_SEPARATOR",
+    "MULTI_REFERENCE_METRICS",
+    "TOPIC_ALIAS_MAP",
+    "CANONICAL_TOPIC_ORDER",
+    "ROUGE_METRICS",
+    "ROUGE_USE_STEMMER",
+    "METEOR_ALPHA",
+    "METEOR_BETA",
+    "METEOR_GAMMA",
+    "MODEL_CONFIGS",
+    "URGENCY_REFERENCE_TOPICS",
+    "RISK_FACTOR_REFERENCE_TOPICS",
+    "URGENCY_REFERENCE_FALLBACK",
+    "RISK_FACTOR_REFERENCE_FALLBACK",
+    "REFERENCE_COVERAGE_SIMILARITY_THRESHOLD",
+    "CLINICAL_CHECKLIST",
+    "REFERENCE_INDEX_FLAT_MAX_PASSAGES",
+    "REFERENCE_INDEX_IVF_PROBES",
+    "REFERENCE_INDEX_TOP_K",
+    "REFERENCE_INDEX_AGGREGATION",
+]
+_PLOT_CONFIG = ["PLOT_FIGSIZE", "ROTATION", "DPI"]
+
+
+# =================================
+# STAGE RUNNERS
+# =================================
+def _run_extract(responses_path):
+    from src.data.data_processing import extract_text_from_docx, save_processed_files
+
+    save_processed_files(
+        chatbot_text=extract_text_from_docx(CHATBOT_DOCX_PATH),
+        reference_text=extract_text_from_docx(REFERENCE_DOCX_PATH),
+        chatbot_output_path=CHATBOT_PROCESSED_CSV_PATH,
+        reference_output_path=REFERENCE_PROCESSED_CSV_PATH,
+        integrated_output_path=INTEGRATED_OUTPUT_CSV_PATH,
+    )
+
+
+def _run_evaluate(responses_path):
+    from src.utils.bootstrap_intervals import save_macro_topic_scores
+    from src.utils.evaluation_algo import (
+        append_component_scores_to_evaluation,
+        generate_evaluation_scores,
+        generate_macro_topic_scores,
+        generate_not_hate_metric_scores,
+        generate_risk_factor_dimension_scores,
+        generate_urgency_dimension_scores,
+        load_responses,
+        save_evaluation_to_csv,
+    )
+
+    integrated_responses = load_responses(responses_path)
+    evaluation_df = append_component_scores_to_evaluation(
+        evaluation_df=generate_evaluation_scores(integrated_responses, include_overall_average=True),
+        not_hate_df=generate_not_hate_metric_scores(integrated_responses, include_overall_average=True),
+        urgency_df=generate_urgency_dimension_scores(integrated_responses, include_overall_average=True),
+        risk_factor_df=generate_risk_factor_dimension_scores(integrated_responses, include_overall_average=True),
+    )
+    save_evaluation_to_csv(OUTPUT_CSV_PATH, evaluation_df)
+    # The topic cells behind the macro averages above (memo hits, no rescoring).
+    save_macro_topic_scores(generate_macro_topic_scores(integrated_responses))
+
+    # Several "Human: <name>" references are pooled above and also scored one by one.
+    from src.utils.multi_reference import generate_multi_reference_scores_for_run, save_multi_reference_scores
+
+    save_multi_reference_scores(generate_multi_reference_scores_for_run(integrated_responses))
+
+
+def _run_topic_scores(responses_path):
+    from src.utils.evaluation_algo import load_responses
+    from src.utils.output_processing import (
+        generate_topic_level_metric_scores_for_anova,
+        save_oneway_anova_outputs,
+    )
+
+    topic_level_df = generate_topic_level_metric_scores_for_anova(load_responses(responses_path))
+    save_oneway_anova_outputs(anova_df=None, topic_level_df=topic_level_df)
+
+
+def _run_anova(responses_path):
+    from src.utils.output_processing import generate_oneway_anova_by_metric, save_oneway_anova_outputs
+
+    topic_level_df = pd.read_csv(TOPIC_LEVEL_METRIC_SCORES_CSV_PATH)
+    save_oneway_anova_outputs(anova_df=generate_oneway_anova_by_metric(topic_level_df), topic_level_df=None)
+
+
+def _run_bootstrap(responses_path):
+    from src.utils.bootstrap_intervals import (
+        generate_bootstrap_confidence_intervals,
+        save_bootstrap_confidence_intervals,
+    )
+
+    macro_topic_df = pd.read_csv(MACRO_TOPIC_SCORES_CSV_PATH)
+    save_bootstrap_confidence_intervals(generate_bootstrap_confidence_intervals(macro_topic_df))
+
+
+def _run_posthoc(responses_path):
+    from src.utils.posthoc_tests import generate_posthoc_pairwise_comparisons, save_posthoc_pairwise_comparisons
+
+    topic_level_df = pd.read_csv(TOPIC_LEVEL_METRIC_SCORES_CSV_PATH)
+    anova_df = pd.read_csv(ONEWAY_ANOVA_CSV_PATH)
+    save_posthoc_pairwise_comparisons(generate_posthoc_pairwise_comparisons(topic_level_df, anova_df))
+
+
+def _run_sensitivity(responses_path):
+    from src.utils.sensitivity_analysis import (
+        generate_leave_one_topic_out_scores,
+        save_sensitivity_outputs,
+        summarize_rank_stability,
+    )
+
+    loo_df = generate_leave_one_topic_out_scores(pd.read_csv(TOPIC_LEVEL_METRIC_SCORES_CSV_PATH))
+    save_sensitivity_outputs(loo_df, summarize_rank_stability(loo_df))
+
+
+def _run_plots(responses_path):
+    from src.utils.output_processing import plot_all_metrics
+
+    # evaluation_scores.csv already carries the appended component columns.
+    evaluation_df = pd.read_csv(OUTPUT_CSV_PATH)
+    plot_all_metrics(
+        evaluation_df=evaluation_df,
+        not_hate_df=evaluation_df,
+        urgency_df=evaluation_df,
+        risk_factor_df=evaluation_df,
+        ci_df=pd.read_csv(BOOTSTRAP_CI_CSV_PATH),
+    )
+
+
+def _run_anova_plot(responses_path):
+    from src.utils.output_processing import plot_oneway_anova_p_values
+
+    plot_oneway_anova_p_values(pd.read_csv(ONEWAY_ANOVA_CSV_PATH))
+
+
+def _run_posthoc_plot(responses_path):
+    from src.utils.output_processing import plot_posthoc_significance_heatmap
+
+    plot_posthoc_significance_heatmap(pd.read_csv(POSTHOC_PAIRWISE_CSV_PATH))
+
+
+# =================================
+# STAGE DEFINITIONS
+# =================================
+def build_pipeline_stages(source: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Returns the stage list in dependency order. With source=None the docx files are
+    extracted first; otherwise the evaluation stages read source (CSV or JSONL) directly.
+    """
+    from src.utils.output_processing import metric_plot_paths
+    from src.utils.streaming_evaluation import count_source_reference_platforms
+
+    responses_path = source or INTEGRATED_OUTPUT_CSV_PATH
+    # The multi-reference table is an evaluate output only when there are several references.
+    evaluate_outputs = [OUTPUT_CSV_PATH, MACRO_TOPIC_SCORES_CSV_PATH]
+    if os.path.exists(responses_path) and count_source_reference_platforms(responses_path) > 1:
+        evaluate_outputs.append(MULTI_REFERENCE_SCORES_CSV_PATH)
+    # An active reference library is a scoring input like the responses themselves.
+    library_path = active_reference_library_path()
+    scoring_inputs = [responses_path] + ([library_path] if library_path else [])
+    stages = []
+
+    if source is None:
+        stages.append({
+            "name": "extract",
+            "inputs": [REFERENCE_DOCX_PATH, CHATBOT_DOCX_PATH],
+            "outputs": [CHATBOT_PROCESSED_CSV_PATH, REFERENCE_PROCESSED_CSV_PATH, INTEGRATED_OUTPUT_CSV_PATH],
+            "config": ["HUMAN_PLATFORM", "RESPONSE_PREFIX", "SECTION_SUFFIX"],
+            "code": [_DATA_PROCESSING_SOURCE],
+            "run": _run_extract,
+        })
+
+    stages.extend([
+        {
+            "name": "evaluate",
+            "inputs": scoring_inputs,
+            "outputs": evaluate_outputs,
+            "config": _SCORING_CONFIG,
+            "code": _EVALUATION_SOURCES,
+            "run": _run_evaluate,
+        },
+        {
+            "name": "topic_scores",
+            "inputs": scoring_inputs,
+            "outputs": [TOPIC_LEVEL_METRIC_SCORES_CSV_PATH],
+            "config": _SCORING_CONFIG + ["ROBUSTNESS_TOPIC_ORDER"],
+            "code": _EVALUATION_SOURCES + [_OUTPUT_SOURCE],
+            "run": _run_topic_scores,
+        },
+        {
+            "name": "anova",
+            "inputs": [TOPIC_LEVEL_METRIC_SCORES_CSV_PATH],
+            "outputs": [ONEWAY_ANOVA_CSV_PATH],
+            "config": [
+                "ROBUSTNESS_METRICS",
+                "PERMUTATION_TEST_ITERATIONS",
+                "PERMUTATION_TEST_BLOCK_SIZE",
+                "RANDOM_SEED",
+            ],
+            "code": [_OUTPUT_SOURCE, _PERMUTATION_SOURCE],
+            "run": _run_anova,
+        },
+        {
+            "name": "posthoc",
+            "inputs": [TOPIC_LEVEL_METRIC_SCORES_CSV_PATH, ONEWAY_ANOVA_CSV_PATH],
+            "outputs": [POSTHOC_PAIRWISE_CSV_PATH],
+            "config": ["ROBUSTNESS_METRICS", "POSTHOC_ALPHA"],
+            "code": [_POSTHOC_SOURCE],
+            "run": _run_posthoc,
+        },
+        {
+            "name": "sensitivity",
+            "inputs": [TOPIC_LEVEL_METRIC_SCORES_CSV_PATH],
+            "outputs": [LEAVE_ONE_TOPIC_OUT_CSV_PATH, RANK_STABILITY_CSV_PATH],
+            "config": ["ROBUSTNESS_METRICS", "ROBUSTNESS_TOPIC_ORDER", "SENSITIVITY_LOWER_IS_BETTER_METRICS"],
+            "code": [_SENSITIVITY_SOURCE],
+            "run": _run_sensitivity,
+        },
+        {
+            "name": "bootstrap",
+            "inputs": [MACRO_TOPIC_SCORES_CSV_PATH],
+            "outputs": [BOOTSTRAP_CI_CSV_PATH],
+            "config": [
+                "VISUALIZATION_METRICS",
+                "BOOTSTRAP_RESAMPLES",
+                "BOOTSTRAP_CONFIDENCE_LEVEL",
+                "RANDOM_SEED",
+            ],
+            "code": [_BOOTSTRAP_SOURCE],
+            "run": _run_bootstrap,
+        },
+        {
+            "name": "plots",
+            "inputs": [OUTPUT_CSV_PATH, BOOTSTRAP_CI_CSV_PATH],
+            "outputs": metric_plot_paths(),
+            "config": _PLOT_CONFIG + ["VISUALIZATION_METRICS", "OVERALL_AVERAGE_LABEL"],
+            "code": [_OUTPUT_SOURCE, _BOOTSTRAP_SOURCE],
+            "run": _run_plots,
+        },
+        {
+            "name": "anova_plot",
+            "inputs": [ONEWAY_ANOVA_CSV_PATH],
+            "outputs": [ONEWAY_ANOVA_PLOT_PATH],
+            "config": ["DPI"],
+            "code": [_OUTPUT_SOURCE],
+            "run": _run_anova_plot,
+        },
+        {
+            "name": "posthoc_plot",
+            "inputs": [POSTHOC_PAIRWISE_CSV_PATH],
+            "outputs": [POSTHOC_HEATMAP_PLOT_PATH],
+            "config": ["DPI", "POSTHOC_ALPHA", "POSTHOC_HEATMAP_MAX_LOG10_P"],
+            "code": [_OUTPUT_SOURCE],
+            "run": _run_posthoc_plot,
+        },
+    ])
+
+    for stage in stages:
+        stage["source"] = responses_path
+    return stages
+
+
+def _upstream_stages(stage: Dict[str, Any], stages: List[Dict[str, Any]]) -> List[str]:
+    producers = {path: other["name"] for other in stages for path in other["outputs"]}
+    return sorted({producers[path] for path in stage["inputs"] if path in producers})
+
+
+# =================================
+# FINGERPRINTS
+# =================================
+def _hash_file(hasher, path: str):
+    with open(path, mode="rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            hasher.update(block)
+
+
+def compute_stage_fingerprint(stage: Dict[str, Any]) -> Optional[str]:
+    """Content hash of the stage's inputs, config values and code; None if an input is missing."""
+    hasher = hashlib.sha256()
+    hasher.update(stage["name"].encode("utf-8"))
+
+    for path in list(stage["inputs"]) + list(stage["code"]):
+        if not os.path.exists(path):
+            return None
+        hasher.update(b"\x00" + os.path.normpath(path).encode("utf-8") + b"\x00")
+        _hash_file(hasher, path)
+
+    config_values = {name: getattr(commonconst, name, None) for name in stage["config"]}
+    hasher.update(json.dumps(config_values, sort_keys=True, default=repr).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def scoring_fingerprint() -> str:
+    """
+    Hash of everything a checkpointed score cell depends on besides its input texts: the
+    scoring settings (models, thresholds, metric parameters) and the evaluation code.
+    """
+    return compute_stage_fingerprint({
+        "name": "score_cells",
+        "inputs": [],
+        "config": _SCORING_CONFIG,
+        "code": _EVALUATION_SOURCES + [_OUTPUT_SOURCE],
+    })
+
+
+def load_stage_fingerprints(path: str = STAGE_FINGERPRINTS_JSON_PATH) -> Dict[str, str]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, mode="r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        print(f"[WARN] Ignoring unreadable stage fingerprint file {path}.")
+        return {}
+
+
+def save_stage_fingerprints(fingerprints: Dict[str, str], path: str = STAGE_FINGERPRINTS_JSON_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, mode="w", encoding="utf-8") as file:
+        json.dump(fingerprints, file, indent=2, sort_keys=True)
+
+
+def _stage_status(stage: Dict[str, Any], fingerprints: Dict[str, str], force: bool) -> Optional[str]:
+    """Reason the stage must run, or None when it is up to date."""
+    if force:
+        return "forced"
+    fingerprint = compute_stage_fingerprint(stage)
+    if fingerprint is None:
+        missing = [path for path in stage["inputs"] if not os.path.exists(path)]
+        return f"missing inputs {missing}"
+    missing_outputs = [path for path in stage["outputs"] if not os.path.exists(path)]
+    if missing_outputs:
+        return "missing outputs"
+    if stage["name"] not in fingerprints:
+        return "no previous fingerprint"
+    if fingerprints[stage["name"]] != fingerprint:
+        return "inputs, config or code changed"
+    return None
+
+
+# =================================
+# EXECUTION
+# =================================
+def parse_stage_selection(selection: Optional[str], stages: List[Dict[str, Any]]) -> List[str]:
+    names = [stage["name"] for stage in stages]
+    if not selection:
+        return names
+    selected = [name.strip() for name in str(selection).split(",") if name.strip()]
+    unknown = [name for name in selected if name not in names]
+    if unknown:
+        raise ValueError(f"Unknown stage(s) {unknown}; available stages: {names}")
+    return selected
+
+
+def run_pipeline_stages(
+    source: Optional[str] = None,
+    selection: Optional[str] = None,
+    dry_run: bool = False,
+    force: bool = False,
+) -> List[str]:
+    """
+    Runs the selected stages that are out of date, in dependency order, and returns the
+    names of the stages that ran (or would run, for a dry run). Unselected stages never
+    run; their outputs must already exist for selected stages that read them.
+    """
+    stages = build_pipeline_stages(source)
+    selected = set(parse_stage_selection(selection, stages))
+    fingerprints = load_stage_fingerprints()
+
+    executed: List[str] = []
+    if dry_run:
+        print("Stage plan (dry run):")
+
+    for stage in stages:
+        name = stage["name"]
+        if name not in selected:
+            if dry_run:
+                print(f"  {name:<13} skip (not selected)")
+            continue
+
+        upstream_running = [up for up in _upstream_stages(stage, stages) if up in executed]
+        if dry_run and upstream_running:
+            # Upstream outputs will be rewritten, so the current inputs say nothing yet.
+            reason = f"upstream {upstream_running} will run"
+        else:
+            reason = _stage_status(stage, fingerprints, force)
+
+        if reason is None:
+            print(f"  {name:<13} up to date" if dry_run else f"[SKIP] {name}: up to date")
+            continue
+
+        if dry_run:
+            print(f"  {name:<13} run ({reason})")
+            executed.append(name)
+            continue
+
+        fingerprint = compute_stage_fingerprint(stage)
+        if fingerprint is None:
+            raise ValueError(
+                f"Stage '{name}' cannot run: {reason}. "
+                f"Run the upstream stages {_upstream_stages(stage, stages)} first."
+            )
+
+        print(f"[RUN] {name}: {reason}")
+        with stage_timer(f"pipeline:{name}"):
+            stage["run"](stage["source"])
+        executed.append(name)
+
+        fingerprints[name] = fingerprint
+        save_stage_fingerprints(fingerprints)
+
+    return executed
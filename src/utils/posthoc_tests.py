@@ -0,0 +1,172 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+All-pairs post-hoc comparisons of chatbots after the one-way ANOVA.
+
+For every metric of the topic-level table and every pair of chatbots:
+- Tukey HSD (Tukey-Kramer for unequal topic counts) on the pooled within-chatbot variance;
+- Welch t-tests, with Holm's step-down correction across all pairs of that metric.
+
+Group means, variances and counts are computed once per metric, and every pairwise
+statistic is one broadcast over the upper-triangle pair indices, so hundreds of pairs cost
+no more Python work than one. The studentized range tail probability is integrated
+numerically from a per-group-count table of the range CDF, since evaluating
+scipy.stats.studentized_range per pair takes tens of milliseconds each.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import integrate, special, stats
+
+from src.commonconst import *
+
+_RANGE_CDF_TABLES: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+_RANGE_W_MAX = 16.0  # the range of even thousands of standard normals stays far below this
+_RANGE_W_POINTS = 4001
+_RANGE_Z = np.linspace(-9.0, 9.0, 721)
+_SCALE_NODES = 200
+
+
+# =================================
+# STUDENTIZED RANGE
+# =================================
+def _range_cdf_table(group_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(w grid, P(range of group_count standard normals <= w)) computed once per group count."""
+    if group_count not in _RANGE_CDF_TABLES:
+        w = np.linspace(0.0, _RANGE_W_MAX, _RANGE_W_POINTS)
+        inner = special.ndtr(_RANGE_Z)[None, :] - special.ndtr(_RANGE_Z[None, :] - w[:, None])
+        integrand = stats.norm.pdf(_RANGE_Z) * np.clip(inner, 0.0, 1.0) ** (group_count - 1)
+        cdf = np.clip(group_count * integrate.trapezoid(integrand, _RANGE_Z, axis=1), 0.0, 1.0)
+        _RANGE_CDF_TABLES[group_count] = (w, cdf)
+    return _RANGE_CDF_TABLES[group_count]
+
+
+def studentized_range_sf(q: np.ndarray, group_count: int, df: float) -> np.ndarray:
+    """
+    P(Q >= q) of the studentized range for an array of q, agreeing with
+    scipy.stats.studentized_range.sf to about 1e-6.
+    """
+    w, cdf = _range_cdf_table(group_count)
+    # Q = range / s with s = sqrt(chi2_df / df); integrate over s with Gauss-Legendre nodes.
+    low, high = stats.chi.ppf([1e-12, 1.0 - 1e-12], df) / np.sqrt(df)
+    nodes, node_weights = np.polynomial.legendre.leggauss(_SCALE_NODES)
+    scale = (high - low) / 2.0 * nodes + (high + low) / 2.0
+    weights = node_weights * (high - low) / 2.0 * stats.chi.pdf(scale * np.sqrt(df), df) * np.sqrt(df)
+    range_cdf = np.interp(np.asarray(q, dtype=float)[:, None] * scale[None, :], w, cdf)
+    return np.clip((1.0 - range_cdf) @ weights, 0.0, 1.0)
+
+
+# =================================
+# MULTIPLE COMPARISONS
+# =================================
+def holm_adjust(p_values: np.ndarray) -> np.ndarray:
+    """Holm step-down adjusted p-values; NaN entries are left out of the family and stay NaN."""
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full_like(p_values, np.nan)
+    valid = np.flatnonzero(~np.isnan(p_values))
+    if valid.size == 0:
+        return adjusted
+    order = valid[np.argsort(p_values[valid], kind="stable")]
+    multipliers = valid.size - np.arange(valid.size)
+    adjusted[order] = np.minimum(1.0, np.maximum.accumulate(p_values[order] * multipliers))
+    return adjusted
+
+
+def _group_statistics(topic_level_df: pd.DataFrame, metric: str):
+    values = pd.to_numeric(topic_level_df[metric], errors="coerce")
+    scored = pd.DataFrame({"Chatbot": topic_level_df["Chatbot"].astype(str).str.strip(), "value": values})
+    grouped = scored.dropna(subset=["value"]).groupby("Chatbot")["value"]
+    return (
+        grouped.count().index.to_numpy(),
+        grouped.count().to_numpy(dtype=float),
+        grouped.mean().to_numpy(dtype=float),
+        grouped.var(ddof=1).to_numpy(dtype=float),
+    )
+
+
+def _metric_pairwise_comparisons(topic_level_df: pd.DataFrame, metric: str) -> pd.DataFrame:
+    chatbots, counts, means, variances = _group_statistics(topic_level_df, metric)
+    group_count = len(chatbots)
+    if group_count < 2:
+        return pd.DataFrame()
+    first, second = np.triu_indices(group_count, k=1)
+    difference = means[first] - means[second]
+
+    # Tukey-Kramer on the pooled within-chatbot variance.
+    df_within = counts.sum() - group_count
+    tukey_p = np.full(difference.shape, np.nan)
+    if df_within > 0:
+        mse = np.nansum((counts - 1) * np.nan_to_num(variances)) / df_within
+        if mse > 0:
+            q = np.abs(difference) / np.sqrt(mse / 2.0 * (1.0 / counts[first] + 1.0 / counts[second]))
+            tukey_p = studentized_range_sf(q, group_count, df_within)
+
+    # Welch t-tests (chatbots with a single topic have no variance and get NaN).
+    share_first = variances[first] / counts[first]
+    share_second = variances[second] / counts[second]
+    standard_error = np.sqrt(share_first + share_second)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_statistic = difference / standard_error
+        welch_df = (share_first + share_second) ** 2 / (
+            share_first ** 2 / (counts[first] - 1) + share_second ** 2 / (counts[second] - 1)
+        )
+    usable = np.isfinite(t_statistic) & np.isfinite(welch_df) & (standard_error > 0)
+    welch_p = np.full(difference.shape, np.nan)
+    welch_p[usable] = 2.0 * stats.t.sf(np.abs(t_statistic[usable]), welch_df[usable])
+    holm_p = holm_adjust(welch_p)
+
+    return pd.DataFrame(
+        {
+            "Metric": metric,
+            "Chatbot A": chatbots[first],
+            "Chatbot B": chatbots[second],
+            "Mean Difference (A - B)": np.round(difference, 4),
+            "Tukey HSD p-value": np.round(tukey_p, 6),
+            "Welch t": np.round(t_statistic, 4),
+            "Welch p-value": np.round(welch_p, 6),
+            "Holm-Adjusted p-value": np.round(holm_p, 6),
+            "Significant (Tukey HSD)": tukey_p < POSTHOC_ALPHA,
+            "Significant (Holm)": holm_p < POSTHOC_ALPHA,
+        }
+    )
+
+
+def generate_posthoc_pairwise_comparisons(
+    topic_level_df: pd.DataFrame,
+    anova_df: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    """
+    Long table with one row per (metric, chatbot pair). With anova_df (the one-way ANOVA
+    table), each row also carries its metric's ANOVA p-value, so pairs can be read only for
+    metrics where the ANOVA found a difference.
+    """
+    if topic_level_df is None or topic_level_df.empty:
+        print("[WARN] Post-hoc comparisons skipped: topic-level metric table is empty.")
+        return pd.DataFrame()
+
+    metrics = [metric for metric in ROBUSTNESS_METRICS if metric in topic_level_df.columns]
+    frames = [_metric_pairwise_comparisons(topic_level_df, metric) for metric in metrics]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    posthoc_df = pd.concat(frames, ignore_index=True)
+
+    if anova_df is not None and not anova_df.empty and "p-value" in anova_df.columns:
+        anova_p = dict(zip(anova_df["Metric"], pd.to_numeric(anova_df["p-value"], errors="coerce")))
+        posthoc_df.insert(1, "ANOVA p-value", posthoc_df["Metric"].map(anova_p))
+    return posthoc_df
+
+
+def save_posthoc_pairwise_comparisons(posthoc_df: pd.DataFrame, output_path: str = POSTHOC_PAIRWISE_CSV_PATH):
+    if posthoc_df is None or posthoc_df.empty:
+        return
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    posthoc_df.to_csv(output_path, index=False)
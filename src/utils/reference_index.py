@@ -0,0 +1,260 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Persistent nearest-neighbour index over a library of clinician-written reference passages.
+
+The library is a JSONL file with one {"topic", "passage"} object per line. Passages are
+embedded once with the reference-alignment model and stored per topic under
+REFERENCE_INDEX_DIR as unit-length float32 .npy matrices, which are memory-mapped on load:
+- topics with at most REFERENCE_INDEX_FLAT_MAX_PASSAGES passages use an exact flat index
+  (one matrix-vector product per query);
+- larger topics use an approximate inverted-file (IVF) index: passages are clustered with
+  spherical k-means, stored grouped by cluster, and a query only scans the
+  REFERENCE_INDEX_IVF_PROBES clusters whose centroids are closest to it.
+
+The manifest records a fingerprint of the library content, the embedding model and the
+index settings, so an unchanged library is loaded from disk instead of re-embedded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.commonconst import *
+
+_REFERENCE_INDEX_STATE: Dict[str, Any] = {
+    "index": None,
+}
+
+_MANIFEST_FILENAME = "manifest.json"
+_ASSIGN_BLOCK_ROWS = 65536
+
+
+# =================================
+# LIBRARY INPUT
+# =================================
+def load_reference_library(library_path: str) -> Dict[str, List[str]]:
+    """Reads the library JSONL into {canonical topic: [passage, ...]}, skipping empty passages."""
+    from src.utils.evaluation_algo import _clean_text, standardize_topic
+
+    passages: Dict[str, List[str]] = {}
+    with open(library_path, mode="r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{library_path}, line {line_number}: invalid JSON ({exc.msg})") from exc
+            if not isinstance(record, dict) or REFERENCE_LIBRARY_TOPIC_KEY not in record:
+                raise ValueError(
+                    f"{library_path}, line {line_number}: expected an object with "
+                    f"'{REFERENCE_LIBRARY_TOPIC_KEY}' and '{REFERENCE_LIBRARY_PASSAGE_KEY}'"
+                )
+            passage = _clean_text(record.get(REFERENCE_LIBRARY_PASSAGE_KEY, ""))
+            if passage:
+                topic = standardize_topic(record[REFERENCE_LIBRARY_TOPIC_KEY])
+                passages.setdefault(topic, []).append(passage)
+    return passages
+
+
+def reference_library_fingerprint(library_path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(library_path, mode="rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            hasher.update(block)
+    settings = {
+        "model": MODEL_CONFIGS["reference_alignment"]["hf_name"],
+        "flat_max": REFERENCE_INDEX_FLAT_MAX_PASSAGES,
+        "kmeans_iterations": REFERENCE_INDEX_KMEANS_ITERATIONS,
+        "seed": RANDOM_SEED,
+    }
+    hasher.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+# =================================
+# INDEX CONSTRUCTION
+# =================================
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # Blocked so the (passages x lists) score matrix stays small for very large topics.
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start : start + _ASSIGN_BLOCK_ROWS])
+        assignment[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def _spherical_kmeans(vectors: np.ndarray, list_count: int, iterations: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Clusters unit vectors by cosine similarity; returns (unit centroids, assignment)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=list_count, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignment = _nearest_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=list_count)
+        # An emptied cluster keeps its previous centroid.
+        sums[counts == 0] = centroids[counts == 0]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids, _nearest_centroids(vectors, centroids)
+
+
+def _embed_passages(passages: List[str]) -> np.ndarray:
+    from src.utils.evaluation_algo import _encode_unique_texts
+
+    vectors = []
+    for start in range(0, len(passages), REFERENCE_INDEX_EMBED_BATCH):
+        vectors.extend(_encode_unique_texts(passages[start : start + REFERENCE_INDEX_EMBED_BATCH]))
+    return np.vstack(vectors).astype(np.float32)
+
+
+def _save_topic_index(index_dir: str, slot: int, passages: List[str], vectors: np.ndarray) -> Dict[str, Any]:
+    prefix = f"topic_{slot:03d}"
+    entry: Dict[str, Any] = {"prefix": prefix, "count": len(passages), "kind": "flat"}
+
+    if len(passages) > REFERENCE_INDEX_FLAT_MAX_PASSAGES:
+        list_count = max(1, int(np.sqrt(len(passages))))
+        centroids, assignment = _spherical_kmeans(
+            vectors, list_count, REFERENCE_INDEX_KMEANS_ITERATIONS, RANDOM_SEED + slot
+        )
+        order = np.argsort(assignment, kind="stable")
+        vectors = vectors[order]
+        passages = [passages[i] for i in order]
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=list_count))])
+        np.save(os.path.join(index_dir, f"{prefix}_centroids.npy"), centroids)
+        np.save(os.path.join(index_dir, f"{prefix}_offsets.npy"), offsets.astype(np.int64))
+        entry.update({"kind": "ivf", "lists": list_count})
+
+    np.save(os.path.join(index_dir, f"{prefix}_vectors.npy"), vectors)
+    with open(os.path.join(index_dir, f"{prefix}_passages.json"), mode="w", encoding="utf-8") as file:
+        json.dump(passages, file)
+    return entry
+
+
+def build_reference_index(library_path: str, index_dir: str = REFERENCE_INDEX_DIR) -> Dict[str, Any]:
+    """Embeds every library passage and writes the per-topic indexes and manifest to index_dir."""
+    passages_by_topic = load_reference_library(library_path)
+    if not passages_by_topic:
+        raise ValueError(f"Reference library {library_path} contains no passages.")
+
+    os.makedirs(index_dir, exist_ok=True)
+    topics = {}
+    for slot, (topic, passages) in enumerate(sorted(passages_by_topic.items())):
+        topics[topic] = _save_topic_index(index_dir, slot, passages, _embed_passages(passages))
+
+    manifest = {
+        "fingerprint": reference_library_fingerprint(library_path),
+        "library_path": library_path,
+        "topics": topics,
+    }
+    with open(os.path.join(index_dir, _MANIFEST_FILENAME), mode="w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+# =================================
+# LOADING
+# =================================
+def load_reference_index(index_dir: str = REFERENCE_INDEX_DIR) -> Dict[str, Any]:
+    """Loads the manifest and memory-maps every topic's vectors (and IVF centroids/offsets)."""
+    with open(os.path.join(index_dir, _MANIFEST_FILENAME), mode="r", encoding="utf-8") as file:
+        manifest = json.load(file)
+
+    topics = {}
+    for topic, entry in manifest["topics"].items():
+        prefix = os.path.join(index_dir, entry["prefix"])
+        with open(f"{prefix}_passages.json", mode="r", encoding="utf-8") as file:
+            passages = json.load(file)
+        topic_index = {
+            "kind": entry["kind"],
+            "vectors": np.load(f"{prefix}_vectors.npy", mmap_mode="r"),
+            "passages": passages,
+        }
+        if entry["kind"] == "ivf":
+            topic_index["centroids"] = np.load(f"{prefix}_centroids.npy")
+            topic_index["offsets"] = np.load(f"{prefix}_offsets.npy")
+        topics[topic] = topic_index
+
+    return {
+        "fingerprint": manifest["fingerprint"],
+        "library_path": manifest.get("library_path"),
+        "topics": topics,
+    }
+
+
+def ensure_reference_index(library_path: str, index_dir: str = REFERENCE_INDEX_DIR) -> Dict[str, Any]:
+    """Loads the index from index_dir, rebuilding it first if the library or settings changed."""
+    manifest_path = os.path.join(index_dir, _MANIFEST_FILENAME)
+    fingerprint = reference_library_fingerprint(library_path)
+    current = None
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, mode="r", encoding="utf-8") as file:
+                current = json.load(file).get("fingerprint")
+        except (OSError, ValueError):
+            print(f"[WARN] Unreadable reference index manifest {manifest_path}; rebuilding.")
+    if current != fingerprint:
+        print(f"Building reference index for {library_path} in {index_dir}...")
+        build_reference_index(library_path, index_dir)
+    index = load_reference_index(index_dir)
+    index["library_path"] = library_path
+    return index
+
+
+# =================================
+# ACTIVE INDEX
+# =================================
+def enable_reference_index(index: Dict[str, Any]):
+    _REFERENCE_INDEX_STATE["index"] = index
+
+
+def disable_reference_index():
+    _REFERENCE_INDEX_STATE["index"] = None
+
+
+def active_reference_index() -> Optional[Dict[str, Any]]:
+    return _REFERENCE_INDEX_STATE["index"]
+
+
+def active_reference_library_path() -> Optional[str]:
+    index = _REFERENCE_INDEX_STATE["index"]
+    return index["library_path"] if index is not None else None
+
+
+# =================================
+# SEARCH
+# =================================
+def search_reference_index(topic_index: Dict[str, Any], query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k passages for a unit-length query as (passage positions, cosine similarities),
+    most similar first. Flat indexes are exact; IVF indexes scan only the probed clusters.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    vectors = topic_index["vectors"]
+
+    if topic_index["kind"] == "ivf":
+        offsets = topic_index["offsets"]
+        probes = np.argsort(-(topic_index["centroids"] @ query))[:REFERENCE_INDEX_IVF_PROBES]
+        ranges = [(int(offsets[p]), int(offsets[p + 1])) for p in probes if offsets[p + 1] > offsets[p]]
+        positions = np.concatenate([np.arange(start, end) for start, end in ranges])
+        scores = np.concatenate([np.asarray(vectors[start:end]) @ query for start, end in ranges])
+    else:
+        positions = np.arange(len(vectors))
+        scores = np.asarray(vectors) @ query
+
+    k = max(1, min(int(k), len(scores)))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return positions[top], scores[top]
@@ -0,0 +1,170 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Per-stage performance counters written to run_metrics.json after every run.
+
+Instrumented code wraps its work in `stage_timer(name)` and bumps counters with
+`increment_counter` / `record_cache_lookup`. Stage names are plain strings:
+- leaf stages ("document_parse", "model_load", "tokenization", "classifier_inference",
+  "embedding", "rouge", "meteor", "readability", "anova", "plotting") do not overlap;
+- "pipeline:<stage>" entries time a whole pipeline step and include the leaf stages
+  that ran inside it.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from src.commonconst import *
+from src.utils.tracing import trace_span, tracing_enabled
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_RUN_METRICS: Dict[str, Any] = {
+    "started_at": time.time(),
+    "wall_start": time.perf_counter(),
+    "cpu_start": time.process_time(),
+    "stages": {},
+    "counters": {},
+    "caches": {},
+    "model_loads": {},
+}
+
+
+def reset_run_metrics():
+    _RUN_METRICS["started_at"] = time.time()
+    _RUN_METRICS["wall_start"] = time.perf_counter()
+    _RUN_METRICS["cpu_start"] = time.process_time()
+    _RUN_METRICS["stages"] = {}
+    _RUN_METRICS["counters"] = {}
+    _RUN_METRICS["caches"] = {}
+    _RUN_METRICS["model_loads"] = {}
+
+
+# =================================
+# RECORDING
+# =================================
+@contextmanager
+def stage_timer(name: str, trace_args: Optional[Dict[str, Any]] = None):
+    """
+    Adds the wall-clock and CPU time of the wrapped block to stage `name`; with --trace
+    the block is also recorded as a timeline span carrying trace_args.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        with trace_span(name, "stage", trace_args):
+            yield
+    finally:
+        stage = _RUN_METRICS["stages"].setdefault(
+            name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+        )
+        stage["calls"] += 1
+        stage["wall_seconds"] += time.perf_counter() - wall_start
+        stage["cpu_seconds"] += time.process_time() - cpu_start
+
+
+def timed_stage(name: str, describe: Optional[Callable[..., Dict[str, Any]]] = None):
+    """
+    Decorator form of stage_timer for functions that are a stage on their own. describe
+    receives the call arguments and returns the span args shown in the trace timeline.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace_args = None
+            if tracing_enabled():
+                trace_args = describe(*args, **kwargs) if describe else {"function": func.__name__}
+            with stage_timer(name, trace_args):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def model_load_timer(model_key: str):
+    """Times a model load both as the "model_load" stage and per model key."""
+    start = time.perf_counter()
+    with stage_timer("model_load", {"model": model_key}):
+        yield
+    _RUN_METRICS["model_loads"][model_key] = (
+        _RUN_METRICS["model_loads"].get(model_key, 0.0) + time.perf_counter() - start
+    )
+
+
+def increment_counter(name: str, amount: int = 1):
+    _RUN_METRICS["counters"][name] = _RUN_METRICS["counters"].get(name, 0) + amount
+
+
+def record_cache_lookup(cache_name: str, hit: bool):
+    cache = _RUN_METRICS["caches"].setdefault(cache_name, {"hits": 0, "misses": 0})
+    cache["hits" if hit else "misses"] += 1
+
+
+# =================================
+# REPORT
+# =================================
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None where the platform cannot report it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux.
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+def build_run_metrics_report() -> Dict[str, Any]:
+    stages = {
+        name: {
+            "calls": stage["calls"],
+            "wall_seconds": round(stage["wall_seconds"], 6),
+            "cpu_seconds": round(stage["cpu_seconds"], 6),
+        }
+        for name, stage in _RUN_METRICS["stages"].items()
+    }
+    caches = {}
+    for name, cache in _RUN_METRICS["caches"].items():
+        lookups = cache["hits"] + cache["misses"]
+        caches[name] = {
+            **cache,
+            "hit_rate": round(cache["hits"] / lookups, 6) if lookups else None,
+        }
+
+    # Share of score requests answered from an identical, already scored text.
+    dedup = [cache for name, cache in _RUN_METRICS["caches"].items() if name.startswith("dedup:")]
+    dedup_lookups = sum(cache["hits"] + cache["misses"] for cache in dedup)
+    dedup_ratio = round(sum(cache["hits"] for cache in dedup) / dedup_lookups, 6) if dedup_lookups else None
+
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_RUN_METRICS["started_at"])),
+        "total_wall_seconds": round(time.perf_counter() - _RUN_METRICS["wall_start"], 6),
+        "total_cpu_seconds": round(time.process_time() - _RUN_METRICS["cpu_start"], 6),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "stages": stages,
+        "model_load_seconds": {
+            name: round(seconds, 6) for name, seconds in _RUN_METRICS["model_loads"].items()
+        },
+        "counters": dict(sorted(_RUN_METRICS["counters"].items())),
+        "caches": caches,
+        "dedup_ratio": dedup_ratio,
+    }
+
+
+def write_run_metrics(path: str = RUN_METRICS_JSON_PATH) -> Dict[str, Any]:
+    report = build_run_metrics_report()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, mode="w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    return report
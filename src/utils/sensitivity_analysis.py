@@ -0,0 +1,152 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Leave-one-topic-out sensitivity of the chatbot rankings.
+
+For every metric, every chatbot and every omitted topic, the chatbot's average over its
+remaining scored topics is read off running sums of the topic-level score table:
+(total - omitted topic score) / (count - 1). A chatbot that did not score the omitted topic
+keeps its robustness-topic average. No metric is rescored, so the whole analysis costs a
+few array operations per metric, and the chatbots are then re-ranked once per omitted topic.
+
+The baseline is the average over the ROBUSTNESS topics a chatbot actually scored, so the
+"Robustness-Topic Average" and "Robustness-Topic Rank" columns can differ from the
+all-topic macro averages and ranking in evaluation_scores.csv.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from src.commonconst import *
+
+
+def _topic_score_matrix(topic_level_df: pd.DataFrame, metric: str, chatbots: List[str], topics: List[str]) -> np.ndarray:
+    """(chatbots x topics) scores of one metric, NaN where a topic was not scored."""
+    values = pd.to_numeric(topic_level_df[metric], errors="coerce")
+    matrix = (
+        topic_level_df.assign(_value=values)
+        .pivot_table(index="Chatbot", columns="Topic", values="_value", aggfunc="mean", observed=False)
+        .reindex(index=chatbots, columns=topics)
+    )
+    return matrix.to_numpy(dtype=float)
+
+
+def _rank_chatbots(scores: np.ndarray, metric: str) -> np.ndarray:
+    """Column-wise ranks (1 = best, ties share the best rank); NaN scores stay unranked."""
+    ascending = metric in SENSITIVITY_LOWER_IS_BETTER_METRICS
+    # Running-sum averages can differ from a direct mean in the last bits; round so exact
+    # ties stay ties.
+    return pd.DataFrame(np.round(scores, 12)).rank(axis=0, method="min", ascending=ascending).to_numpy()
+
+
+def generate_leave_one_topic_out_scores(topic_level_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Long table with one row per (metric, omitted topic, chatbot): robustness-topic and
+    leave-one-out averages, their ranks among chatbots and the rank shift (positive = moved down).
+    """
+    if topic_level_df is None or topic_level_df.empty:
+        print("[WARN] Sensitivity analysis skipped: topic-level metric table is empty.")
+        return pd.DataFrame()
+
+    from src.utils.output_processing import _topic_sort_key_for_robustness
+
+    table = topic_level_df.assign(
+        Chatbot=topic_level_df["Chatbot"].astype(str).str.strip(),
+        Topic=topic_level_df["Topic"].astype(str).str.strip(),
+    )
+    chatbots = sorted(table["Chatbot"].unique())
+    topics = sorted(table["Topic"].unique(), key=_topic_sort_key_for_robustness)
+    if len(topics) < 2:
+        print("[WARN] Sensitivity analysis skipped: fewer than two topics to leave out.")
+        return pd.DataFrame()
+
+    metrics = [metric for metric in ROBUSTNESS_METRICS if metric in table.columns]
+    frames = []
+    for metric in metrics:
+        scores = _topic_score_matrix(table, metric, chatbots, topics)
+        scored = ~np.isnan(scores)
+        totals = np.where(scored, scores, 0.0).sum(axis=1)
+        counts = scored.sum(axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            full_average = np.where(counts > 0, totals / counts, np.nan)
+            dropped_average = (totals[:, None] - np.where(scored, scores, 0.0)) / (counts[:, None] - 1)
+        leave_one_out = np.where(scored, dropped_average, full_average[:, None])
+        leave_one_out[(counts[:, None] - scored) == 0] = np.nan
+
+        full_rank = _rank_chatbots(full_average[:, None], metric)[:, 0]
+        leave_one_out_rank = _rank_chatbots(leave_one_out, metric)
+
+        # Rows are omitted-topic major, chatbots in sorted order within each topic.
+        topic_count, chatbot_count = len(topics), len(chatbots)
+        frames.append(pd.DataFrame({
+            "Metric": metric,
+            "Omitted Topic": np.repeat(topics, chatbot_count),
+            "Chatbot": np.tile(chatbots, topic_count),
+            "Robustness-Topic Average": np.tile(np.round(full_average, 4), topic_count),
+            "Leave-One-Out Average": np.round(leave_one_out.T.ravel(), 4),
+            "Average Change": np.round((leave_one_out - full_average[:, None]).T.ravel(), 4),
+            "Robustness-Topic Rank": np.tile(full_rank, topic_count),
+            "Leave-One-Out Rank": leave_one_out_rank.T.ravel(),
+            "Rank Shift": (leave_one_out_rank - full_rank[:, None]).T.ravel(),
+        }))
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarize_rank_stability(loo_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (metric, chatbot): robustness-topic rank, the range and mean of its leave-one-out ranks,
+    the largest rank shift, the share of omissions that leave the rank unchanged and the
+    topic whose omission moves the average the most.
+    """
+    if loo_df is None or loo_df.empty:
+        return pd.DataFrame()
+
+    ranked = loo_df.dropna(subset=["Leave-One-Out Rank"]).assign(
+        _abs_shift=lambda df: df["Rank Shift"].abs(),
+        _abs_change=lambda df: df["Average Change"].abs(),
+        _unchanged=lambda df: df["Rank Shift"] == 0,
+    )
+    if ranked.empty:
+        return pd.DataFrame()
+    grouped = ranked.groupby(["Metric", "Chatbot"], sort=False)
+    summary = grouped.agg(**{
+        "Robustness-Topic Rank": ("Robustness-Topic Rank", "first"),
+        "Best Leave-One-Out Rank": ("Leave-One-Out Rank", "min"),
+        "Worst Leave-One-Out Rank": ("Leave-One-Out Rank", "max"),
+        "Mean Leave-One-Out Rank": ("Leave-One-Out Rank", "mean"),
+        "Max Absolute Rank Shift": ("_abs_shift", "max"),
+        "Share of Omissions Rank Unchanged": ("_unchanged", "mean"),
+        "Max Absolute Average Change": ("_abs_change", "max"),
+    })
+    most_influential = ranked.loc[grouped["_abs_change"].idxmax(), ["Metric", "Chatbot", "Omitted Topic"]]
+    summary = summary.join(
+        most_influential.set_index(["Metric", "Chatbot"])["Omitted Topic"].rename("Most Influential Topic")
+    ).reset_index()
+    summary["Mean Leave-One-Out Rank"] = summary["Mean Leave-One-Out Rank"].round(4)
+    summary["Share of Omissions Rank Unchanged"] = summary["Share of Omissions Rank Unchanged"].round(4)
+    return summary
+
+
+def save_sensitivity_outputs(
+    loo_df: pd.DataFrame,
+    stability_df: pd.DataFrame,
+    scores_path: str = LEAVE_ONE_TOPIC_OUT_CSV_PATH,
+    stability_path: str = RANK_STABILITY_CSV_PATH,
+):
+    for frame, output_path in ((loo_df, scores_path), (stability_df, stability_path)):
+        if frame is None or frame.empty:
+            continue
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        frame.to_csv(output_path, index=False)
@@ -0,0 +1,236 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Sharded multi-node evaluation with a deterministic merge.
+
+Every chatbot is scored independently against the shared human reference, so the
+chatbot set can be split across nodes:
+1. `main.py --shard i/N` keeps the human rows plus the chatbots assigned to shard i and
+   writes partial per-chatbot, per-topic and macro-topic score files to SHARDS_DIR.
+2. `main.py merge` checks that all N shards are present, concatenates them in the same
+   order as a single-node run and recomputes the Overall Average row.
+
+Shard assignment hashes the chatbot name, so it does not depend on row order, on which
+node runs the shard or on the Python hash seed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from typing import Tuple
+
+import pandas as pd
+
+from src.commonconst import *
+from src.utils.evaluation_algo import (
+    append_component_scores_to_evaluation,
+    append_overall_average_row,
+    generate_evaluation_scores,
+    generate_macro_topic_scores,
+    generate_not_hate_metric_scores,
+    generate_risk_factor_dimension_scores,
+    generate_urgency_dimension_scores,
+    is_reference_platform,
+)
+from src.utils.multi_reference import (
+    generate_multi_reference_scores_for_run,
+    list_reference_names,
+    multi_reference_columns,
+    save_multi_reference_scores,
+)
+from src.utils.output_processing import (
+    finalize_topic_level_table,
+    generate_topic_level_metric_scores_for_anova,
+    get_anova_target_topics,
+)
+
+_SHARD_SPEC_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+
+# =================================
+# SHARD ASSIGNMENT
+# =================================
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """Parses 'i/N' into (i, N); i is zero-based, so valid shards are 0/N .. (N-1)/N."""
+    match = _SHARD_SPEC_PATTERN.match(str(spec))
+    if not match:
+        raise ValueError(f"Invalid shard spec '{spec}'; expected 'i/N', for example 0/4.")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count <= 0 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec '{spec}'; shard index must be in [0, {max(count, 1) - 1}].")
+    return index, count
+
+
+def shard_index_for_chatbot(chatbot_name: str, count: int) -> int:
+    digest = hashlib.sha256(str(chatbot_name).strip().encode("utf-8")).hexdigest()
+    return int(digest, 16) % count
+
+
+def make_shard_filter(index: int, count: int):
+    return lambda chatbot_name: shard_index_for_chatbot(chatbot_name, count) == index
+
+
+def select_shard_responses(integrated_responses: pd.DataFrame, index: int, count: int) -> pd.DataFrame:
+    """Keeps every human reference row plus the chatbot rows assigned to this shard."""
+    platforms = integrated_responses[PLATFORM_COL].astype(str).str.strip()
+    is_reference = platforms.map(is_reference_platform).astype(bool)
+    in_shard = platforms.map(make_shard_filter(index, count))
+    return integrated_responses[is_reference | in_shard].reset_index(drop=True)
+
+
+def shard_output_paths(index: int, count: int) -> Tuple[str, str, str]:
+    return (
+        os.path.join(SHARDS_DIR, SHARD_EVALUATION_CSV_TEMPLATE.format(index=index, count=count)),
+        os.path.join(SHARDS_DIR, SHARD_TOPIC_LEVEL_CSV_TEMPLATE.format(index=index, count=count)),
+        os.path.join(SHARDS_DIR, SHARD_MACRO_TOPIC_CSV_TEMPLATE.format(index=index, count=count)),
+    )
+
+
+def shard_multi_reference_path(index: int, count: int) -> str:
+    return os.path.join(SHARDS_DIR, SHARD_MULTI_REFERENCE_CSV_TEMPLATE.format(index=index, count=count))
+
+
+# =================================
+# SHARD RUN
+# =================================
+def run_shard(integrated_responses: pd.DataFrame, index: int, count: int) -> Tuple[str, str, str]:
+    """
+    Scores one shard and writes its partial files. No Overall Average row is written;
+    merge_shard_outputs() recomputes it over all chatbots.
+    """
+    os.makedirs(SHARDS_DIR, exist_ok=True)
+    evaluation_path, topic_level_path, macro_topic_path = shard_output_paths(index, count)
+
+    shard_df = select_shard_responses(integrated_responses, index, count)
+    has_chatbots = not shard_df[PLATFORM_COL].map(is_reference_platform).all()
+
+    if not has_chatbots:
+        print(f"[WARN] Shard {index}/{count} has no chatbots; writing empty partial files.")
+        pd.DataFrame(columns=COMBINED_EVALUATION_COLUMNS).to_csv(evaluation_path, index=False)
+        pd.DataFrame(columns=TOPIC_LEVEL_COLUMNS).to_csv(topic_level_path, index=False)
+        pd.DataFrame(columns=MACRO_TOPIC_COLUMNS).to_csv(macro_topic_path, index=False)
+        # merge expects a multi-reference partial from every shard when there are several references.
+        reference_names = list_reference_names(shard_df)
+        empty_multi_reference_df = None
+        if len(reference_names) > 1:
+            empty_multi_reference_df = pd.DataFrame(columns=multi_reference_columns(reference_names))
+        save_multi_reference_scores(empty_multi_reference_df, shard_multi_reference_path(index, count))
+        return evaluation_path, topic_level_path, macro_topic_path
+
+    evaluation_df = append_component_scores_to_evaluation(
+        evaluation_df=generate_evaluation_scores(shard_df),
+        not_hate_df=generate_not_hate_metric_scores(shard_df),
+        urgency_df=generate_urgency_dimension_scores(shard_df),
+        risk_factor_df=generate_risk_factor_dimension_scores(shard_df),
+    )
+    evaluation_df.to_csv(evaluation_path, index=False)
+
+    topic_level_df = generate_topic_level_metric_scores_for_anova(shard_df)
+    if topic_level_df.empty:
+        topic_level_df = pd.DataFrame(columns=TOPIC_LEVEL_COLUMNS)
+    topic_level_df.to_csv(topic_level_path, index=False)
+    generate_macro_topic_scores(shard_df).to_csv(macro_topic_path, index=False)
+    save_multi_reference_scores(
+        generate_multi_reference_scores_for_run(shard_df, include_overall_average=False),
+        shard_multi_reference_path(index, count),
+    )
+
+    return evaluation_path, topic_level_path, macro_topic_path
+
+
+# =================================
+# MERGE
+# =================================
+def discover_shard_count() -> int:
+    """Infers N from the partial evaluation files present in SHARDS_DIR."""
+    pattern = re.compile(
+        re.escape(SHARD_EVALUATION_CSV_TEMPLATE).replace(r"\{index\}", r"\d+").replace(r"\{count\}", r"(\d+)")
+    )
+    counts = set()
+    if os.path.isdir(SHARDS_DIR):
+        for filename in os.listdir(SHARDS_DIR):
+            match = pattern.fullmatch(filename)
+            if match:
+                counts.add(int(match.group(1)))
+
+    if not counts:
+        raise ValueError(f"No shard outputs found in {SHARDS_DIR}.")
+    if len(counts) > 1:
+        raise ValueError(
+            f"Shard outputs for several shard counts {sorted(counts)} found in {SHARDS_DIR}; "
+            "pass the shard count explicitly."
+        )
+    return counts.pop()
+
+
+def merge_shard_outputs(count: int | None = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Combines all N partial files into the single-node evaluation, topic-level and
+    macro-topic tables.
+    Raises ValueError if a shard is missing or a chatbot appears in more than one shard.
+    """
+    if count is None:
+        count = discover_shard_count()
+
+    evaluation_parts = []
+    topic_level_parts = []
+    macro_topic_parts = []
+    missing = []
+    for index in range(count):
+        paths = shard_output_paths(index, count)
+        if not all(os.path.exists(path) for path in paths):
+            missing.append(f"{index}/{count}")
+            continue
+        evaluation_path, topic_level_path, macro_topic_path = paths
+        evaluation_parts.append(pd.read_csv(evaluation_path, keep_default_na=False, na_values=[""]))
+        topic_level_parts.append(pd.read_csv(topic_level_path))
+        macro_topic_parts.append(pd.read_csv(macro_topic_path))
+
+    if missing:
+        raise ValueError(f"Cannot merge: missing shard outputs {missing} in {SHARDS_DIR}.")
+
+    evaluation_df = pd.concat(evaluation_parts, ignore_index=True)
+    duplicated = evaluation_df["Chatbot"][evaluation_df["Chatbot"].duplicated()].tolist()
+    if duplicated:
+        raise ValueError(f"Cannot merge: chatbots scored in more than one shard: {duplicated}")
+
+    # Same ordering and summary row as the single-node generators.
+    evaluation_df = evaluation_df.sort_values("Chatbot").reset_index(drop=True)
+    evaluation_df = append_overall_average_row(evaluation_df)
+
+    topic_level_df = pd.concat(topic_level_parts, ignore_index=True)
+    if not topic_level_df.empty:
+        target_topics = get_anova_target_topics(dict.fromkeys(topic_level_df["Topic"].astype(str)))
+        topic_level_df = finalize_topic_level_table(topic_level_df.to_dict("records"), target_topics)
+
+    # Chatbot order as in a single-node run; topics keep their reference order within a chatbot.
+    macro_topic_df = pd.concat(macro_topic_parts, ignore_index=True)
+    macro_topic_df = macro_topic_df.sort_values("Chatbot", kind="stable").reset_index(drop=True)
+
+    return evaluation_df, topic_level_df, macro_topic_df
+
+
+def merge_multi_reference_outputs(count: int | None = None) -> pd.DataFrame | None:
+    """
+    Combines the partial multi-reference files, or returns None when the shards were run
+    with a single reference (no partial files). Raises ValueError if only some shards have one.
+    """
+    if count is None:
+        count = discover_shard_count()
+
+    paths = [shard_multi_reference_path(index, count) for index in range(count)]
+    present = [path for path in paths if os.path.exists(path)]
+    if not present:
+        return None
+    if len(present) != len(paths):
+        missing = [f"{index}/{count}" for index, path in enumerate(paths) if not os.path.exists(path)]
+        raise ValueError(f"Cannot merge: missing multi-reference shard outputs {missing} in {SHARDS_DIR}.")
+
+    multi_reference_df = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    multi_reference_df = multi_reference_df.sort_values("Chatbot").reset_index(drop=True)
+    return append_overall_average_row(multi_reference_df)
@@ -0,0 +1,265 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Bounded-memory streaming evaluation for very large response corpora.
+
+The batch generators build the full working DataFrame and every chatbot's topic map
+at once. The streaming path reads the input twice instead:
+1. The first pass keeps only the human reference rows and prepares the reference view.
+2. The second pass groups contiguous chatbot rows, scores one chatbot at a time with
+   the same row builders as the batch generators, and appends the finished rows to
+   evaluation_scores.csv, the topic-level ANOVA table and the macro-topic cells behind
+   the bootstrap intervals.
+
+Only the reference view, the chatbot currently being scored and running column sums
+for the Overall Average row are kept in memory.
+"""
+
+from __future__ import annotations
+
+import csv
+import math
+import os
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from src.commonconst import *
+from src.data.data_processing import is_jsonl_path, iter_jsonl_responses
+from src.utils.evaluation_algo import (
+    _clean_text,
+    _concat_text_list,
+    build_chatbot_view,
+    is_reference_platform,
+    prepare_reference_context,
+    prepare_reference_view,
+    score_combined_row,
+    score_macro_topic_rows,
+    standardize_topic,
+)
+from src.utils.multi_reference import (
+    count_reference_platforms,
+    multi_reference_columns,
+    prepare_reference_set,
+    save_multi_reference_scores,
+    score_multi_reference_row,
+)
+from src.utils.output_processing import (
+    get_anova_target_topics,
+    score_topic_level_rows_for_chatbot,
+)
+from src.utils.text_store import reset_text_store
+
+
+# =================================
+# INPUT ITERATION
+# =================================
+def iter_response_records(source, chunksize: int = STREAM_CSV_CHUNKSIZE) -> Iterator[Dict[str, Any]]:
+    """Yields Platform/Topics/Response dicts from a DataFrame, a JSONL file or a CSV file read in chunks."""
+    if isinstance(source, pd.DataFrame):
+        columns = [col for col in FIELDNAMES if col in source.columns]
+        for values in source[columns].itertuples(index=False, name=None):
+            yield dict(zip(columns, values))
+        return
+
+    if is_jsonl_path(source):
+        yield from iter_jsonl_responses(source)
+        return
+
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        if not {PLATFORM_COL, RESPONSE_COL}.issubset(chunk.columns):
+            raise ValueError(
+                f"Expected columns '{PLATFORM_COL}' and '{RESPONSE_COL}' in {source}"
+            )
+        columns = [col for col in FIELDNAMES if col in chunk.columns]
+        for values in chunk[columns].itertuples(index=False, name=None):
+            yield dict(zip(columns, values))
+
+
+def _normalize_record(record: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+    """Applies the same cleaning as _prepare_working_df() to a single row."""
+    response = _clean_text(record.get(RESPONSE_COL, ""))
+    if not response:
+        return None
+    platform = str(record.get(PLATFORM_COL, "")).strip()
+    topic = standardize_topic(record.get(TOPIC_COL, ""))
+    return platform, topic, response
+
+
+def load_streaming_reference_rows(source) -> pd.DataFrame:
+    """First pass: keeps only the (cleaned) human reference rows."""
+    reference_rows = []
+    for record in iter_response_records(source):
+        normalized = _normalize_record(record)
+        if normalized is not None and is_reference_platform(normalized[0]):
+            reference_rows.append(dict(zip(FIELDNAMES, normalized)))
+    return pd.DataFrame(reference_rows, columns=FIELDNAMES)
+
+
+def load_streaming_reference_view(source) -> Dict[str, Any]:
+    """First pass: keeps only the human reference rows and prepares the reference view."""
+    return prepare_reference_view(load_streaming_reference_rows(source))
+
+
+def count_source_reference_platforms(source) -> int:
+    """Distinct human references in a CSV/JSONL source, read without loading the chatbot rows."""
+    return count_reference_platforms(load_streaming_reference_rows(source))
+
+
+def _flush_chatbot(chatbot_name: str, topic_texts: Dict[str, List[str]]) -> Optional[Dict[str, Any]]:
+    topic_map = {}
+    for topic, texts in topic_texts.items():
+        topic_text = _concat_text_list(texts)
+        if topic_text:
+            topic_map[topic.strip()] = topic_text
+    if not topic_map:
+        return None
+    return build_chatbot_view(chatbot_name, topic_map)
+
+
+def iter_chatbot_views(source, chatbot_filter: Optional[Callable[[str], bool]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Second pass: yields one chatbot view (Chatbot, Response, TopicMap) at a time.
+
+    Rows belonging to one chatbot must be contiguous, which holds for the docx-derived
+    integrated CSV and for JSONL exports written chatbot by chatbot. Chatbots rejected
+    by chatbot_filter are skipped without buffering their text.
+    """
+    finished = set()
+    current_name = None
+    keep_current = False
+    topic_texts: Dict[str, List[str]] = {}
+
+    for record in iter_response_records(source):
+        normalized = _normalize_record(record)
+        if normalized is None:
+            continue
+        platform, topic, response = normalized
+        if is_reference_platform(platform):
+            continue
+
+        if platform != current_name:
+            if current_name is not None and keep_current:
+                view = _flush_chatbot(current_name, topic_texts)
+                if view is not None:
+                    yield view
+            if current_name is not None:
+                finished.add(current_name)
+            if platform in finished:
+                raise ValueError(
+                    f"Rows for chatbot '{platform}' are not contiguous in {source}; "
+                    "streaming evaluation needs rows grouped by chatbot."
+                )
+            current_name = platform
+            keep_current = chatbot_filter is None or chatbot_filter(platform)
+            topic_texts = {}
+
+        if keep_current:
+            topic_texts.setdefault(topic, []).append(response)
+
+    if current_name is not None and keep_current:
+        view = _flush_chatbot(current_name, topic_texts)
+        if view is not None:
+            yield view
+
+
+# =================================
+# STREAMING SCORING
+# =================================
+def _csv_value(value):
+    if isinstance(value, float) and math.isnan(value):
+        return ""
+    return value
+
+
+def stream_evaluation_scores(
+    source,
+    output_path: str = OUTPUT_CSV_PATH,
+    topic_level_output_path: str = TOPIC_LEVEL_METRIC_SCORES_CSV_PATH,
+    macro_topic_output_path: str = MACRO_TOPIC_SCORES_CSV_PATH,
+    multi_reference_output_path: str = MULTI_REFERENCE_SCORES_CSV_PATH,
+    include_overall_average: bool = True,
+    chatbot_filter: Optional[Callable[[str], bool]] = None,
+) -> int:
+    """
+    Scores chatbots one at a time and writes evaluation rows, topic-level ANOVA rows,
+    macro-topic cells and (with several references) multi-reference rows as soon as each
+    chatbot finishes. Rows are written in input order.
+    chatbot_filter restricts scoring to a subset of chatbots (used by sharded runs).
+    Returns the number of chatbots scored.
+    """
+    reference_rows = load_streaming_reference_rows(source)
+    reference_context = prepare_reference_context(prepare_reference_view(reference_rows))
+    reference_topic_map = reference_context["reference_topic_map"]
+    target_topics = get_anova_target_topics(reference_topic_map)
+
+    references = None
+    if count_reference_platforms(reference_rows) > 1:
+        references = prepare_reference_set(reference_rows)
+    else:
+        save_multi_reference_scores(None, multi_reference_output_path)
+
+    numeric_columns = [col for col in COMBINED_EVALUATION_COLUMNS if col not in ("Chatbot", "Response")]
+    running_sums = {col: 0.0 for col in numeric_columns}
+    chatbot_count = 0
+    multi_columns = multi_reference_columns(list(references)) if references else []
+    multi_sums = {col: 0.0 for col in multi_columns if col != "Chatbot"}
+
+    os.makedirs(os.path.dirname(macro_topic_output_path) or ".", exist_ok=True)
+    with ExitStack() as files:
+        evaluation_file = files.enter_context(open(output_path, mode="w", newline="", encoding="utf-8"))
+        topic_file = files.enter_context(open(topic_level_output_path, mode="w", newline="", encoding="utf-8"))
+        macro_file = files.enter_context(open(macro_topic_output_path, mode="w", newline="", encoding="utf-8"))
+        multi_file = multi_writer = None
+        if references:
+            multi_file = files.enter_context(open(multi_reference_output_path, mode="w", newline="", encoding="utf-8"))
+            multi_writer = csv.DictWriter(multi_file, fieldnames=multi_columns)
+            multi_writer.writeheader()
+
+        evaluation_writer = csv.DictWriter(evaluation_file, fieldnames=COMBINED_EVALUATION_COLUMNS)
+        topic_writer = csv.DictWriter(topic_file, fieldnames=TOPIC_LEVEL_COLUMNS)
+        macro_writer = csv.DictWriter(macro_file, fieldnames=MACRO_TOPIC_COLUMNS)
+        evaluation_writer.writeheader()
+        topic_writer.writeheader()
+        macro_writer.writeheader()
+
+        for chatbot_view in iter_chatbot_views(source, chatbot_filter=chatbot_filter):
+            row = score_combined_row(chatbot_view, reference_context)
+            evaluation_writer.writerow(row)
+            evaluation_file.flush()
+
+            for col in numeric_columns:
+                running_sums[col] += float(row[col])
+            chatbot_count += 1
+
+            for topic_row in score_topic_level_rows_for_chatbot(chatbot_view, reference_topic_map, target_topics):
+                topic_writer.writerow({k: _csv_value(v) for k, v in topic_row.items()})
+            topic_file.flush()
+            # Same checkpointed/memoized cells as the evaluation row above, so no rescoring.
+            macro_writer.writerows(score_macro_topic_rows(chatbot_view, reference_context))
+            macro_file.flush()
+            if multi_writer is not None:
+                multi_row = score_multi_reference_row(chatbot_view, references)
+                multi_writer.writerow(multi_row)
+                multi_file.flush()
+                for col in multi_sums:
+                    multi_sums[col] += float(multi_row[col])
+            # Interned texts of a finished chatbot are never looked up again.
+            reset_text_store()
+
+        if include_overall_average and chatbot_count:
+            overall_row = {"Chatbot": OVERALL_AVERAGE_LABEL, "Response": ""}
+            for col in numeric_columns:
+                overall_row[col] = round(running_sums[col] / chatbot_count, 4)
+            evaluation_writer.writerow(overall_row)
+            if multi_writer is not None:
+                multi_writer.writerow({
+                    "Chatbot": OVERALL_AVERAGE_LABEL,
+                    **{col: round(total / chatbot_count, 4) for col, total in multi_sums.items()},
+                })
+
+    return chatbot_count
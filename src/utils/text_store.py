@@ -0,0 +1,95 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Interned text store.
+
+Response text passes through whitespace normalization many times on its way to a metric
+(working DataFrame, topic maps, chatbot views, every metric wrapper, the chunker). The
+store normalizes each distinct input string once, gives the normalized text an integer id
+and computes its SHA-256 content hash at most once. Raw and normalized spellings of the
+same text map to the same id, so repeated cleaning becomes a dictionary lookup and caches
+(checkpoint digests, deduplicated scoring) can key on ids and hashes instead of rehashing
+long strings.
+
+Ids are only meaningful within one process and until reset_text_store(); content hashes
+are stable across runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any, Dict, List
+
+from src.utils.run_metrics import record_cache_lookup
+
+_whitespace_pattern = re.compile(r"\s+")
+
+
+class TextRecord:
+    """One distinct normalized text; the content hash is filled in on first use."""
+
+    __slots__ = ("text", "digest")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.digest = None
+
+
+_TEXT_STORE: Dict[str, Any] = {
+    "ids": {},      # raw or normalized string -> text id
+    "records": [],  # text id -> TextRecord
+}
+
+
+def reset_text_store():
+    """Drops every interned text (used by bounded-memory runs between chatbots)."""
+    _TEXT_STORE["ids"] = {}
+    _TEXT_STORE["records"] = []
+
+
+def normalize_text(text: str) -> str:
+    return _whitespace_pattern.sub(" ", text.strip())
+
+
+def intern_text(text: str) -> int:
+    """Returns the id of the normalized form of text, normalizing it only on first sight."""
+    ids = _TEXT_STORE["ids"]
+    text_id = ids.get(text)
+    record_cache_lookup("text_store", text_id is not None)
+    if text_id is not None:
+        return text_id
+
+    normalized = normalize_text(text)
+    text_id = ids.get(normalized)
+    if text_id is None:
+        records: List[TextRecord] = _TEXT_STORE["records"]
+        text_id = len(records)
+        records.append(TextRecord(normalized))
+        ids[normalized] = text_id
+    ids[text] = text_id
+    return text_id
+
+
+def get_text(text_id: int) -> str:
+    return _TEXT_STORE["records"][text_id].text
+
+
+def get_text_digest(text_id: int) -> str:
+    """SHA-256 hex digest of the normalized text, computed once per distinct text."""
+    record = _TEXT_STORE["records"][text_id]
+    if record.digest is None:
+        record.digest = hashlib.sha256(record.text.encode("utf-8")).hexdigest()
+    return record.digest
+
+
+def clean_text(text: str) -> str:
+    """Whitespace-normalized text, memoized through the store."""
+    return get_text(intern_text(text))
+
+
+def text_store_size() -> int:
+    return len(_TEXT_STORE["records"])
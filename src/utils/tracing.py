@@ -0,0 +1,109 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Opt-in timeline tracing in Chrome trace-event format (`main.py --trace out.json`).
+
+Every run_metrics stage (document parse, model load, tokenization, classifier forward pass,
+embedding batch, ROUGE/METEOR/readability call, ANOVA, each plot, each pipeline stage) and
+every (chatbot, topic, metric) cell becomes a complete ("X") event with the process and
+thread id, so the file opens directly in chrome://tracing or Perfetto. While tracing is
+disabled, trace_span() does nothing beyond one dictionary lookup.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+_TRACE_STATE: Dict[str, Any] = {
+    "path": None,
+    "events": None,
+    "origin_ns": 0,
+    "named_threads": set(),
+}
+
+
+def tracing_enabled() -> bool:
+    return _TRACE_STATE["events"] is not None
+
+
+def enable_tracing(path: str):
+    """Starts collecting trace events; they are written to path by write_trace()."""
+    _TRACE_STATE["path"] = path
+    _TRACE_STATE["events"] = [
+        {
+            "name": "process_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "tid": 0,
+            "args": {"name": "benchmark pipeline"},
+        }
+    ]
+    _TRACE_STATE["origin_ns"] = time.perf_counter_ns()
+    _TRACE_STATE["named_threads"] = set()
+
+
+def _thread_metadata(pid: int, tid: int):
+    if tid in _TRACE_STATE["named_threads"]:
+        return
+    _TRACE_STATE["named_threads"].add(tid)
+    _TRACE_STATE["events"].append(
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": tid,
+            "args": {"name": threading.current_thread().name},
+        }
+    )
+
+
+@contextmanager
+def trace_span(name: str, category: str, args: Optional[Dict[str, Any]] = None):
+    """Records the wrapped block as one complete event when tracing is enabled."""
+    events = _TRACE_STATE["events"]
+    if events is None:
+        yield
+        return
+
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end_ns = time.perf_counter_ns()
+        pid = os.getpid()
+        tid = threading.get_ident()
+        _thread_metadata(pid, tid)
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - _TRACE_STATE["origin_ns"]) / 1000.0,
+            "dur": (end_ns - start_ns) / 1000.0,
+            "pid": pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = {key: str(value) for key, value in args.items()}
+        events.append(event)
+
+
+def write_trace() -> Optional[str]:
+    """Writes the collected events, stops tracing and returns the trace path."""
+    path, events = _TRACE_STATE["path"], _TRACE_STATE["events"]
+    _TRACE_STATE["path"] = None
+    _TRACE_STATE["events"] = None
+    if path is None or events is None:
+        return None
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, mode="w", encoding="utf-8") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+    return path
@@ -0,0 +1,325 @@
+# Copyright (c) 2025 Zichen Zhao
+# Columbia University School of Social Work
+# Licensed under the MIT Academic Research License
+# See LICENSE file in the project root for details.
+
+"""
+Watch mode: incremental re-evaluation while annotators edit the input documents.
+
+The process stays alive, so loaded models and the prepared reference stay warm. Every
+WATCH_POLL_SECONDS the two docx files are checked; when one changes:
+1. Only the changed document is re-parsed; the other keeps its cached paragraphs.
+2. The per-(platform, topic) texts are diffed against the previous state.
+3. Only chatbots whose texts changed are rescored (all chatbots if the reference changed).
+   Checkpoint cells are digest-keyed, so unchanged topics inside a rescored chatbot are
+   reused rather than sent through the models again. The checkpoint is compacted after
+   every refresh, and cells scored under other models or settings are never reused.
+4. evaluation_scores.csv and the ANOVA outputs are rewritten, and only the figures whose
+   plotted columns changed are re-rendered. run_metrics.json accumulates over the session.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from src.commonconst import *
+from src.data.data_processing import extract_text_from_docx, save_processed_files
+from src.utils.bootstrap_intervals import (
+    attach_confidence_intervals,
+    bootstrap_ci_columns,
+    generate_bootstrap_confidence_intervals,
+    save_bootstrap_confidence_intervals,
+    save_macro_topic_scores,
+)
+from src.utils.checkpointing import compact_checkpoint, disable_checkpointing, enable_checkpointing
+from src.utils.multi_reference import generate_multi_reference_scores_for_run, save_multi_reference_scores
+from src.utils.posthoc_tests import generate_posthoc_pairwise_comparisons, save_posthoc_pairwise_comparisons
+from src.utils.run_metrics import write_run_metrics
+from src.utils.sensitivity_analysis import (
+    generate_leave_one_topic_out_scores,
+    save_sensitivity_outputs,
+    summarize_rank_stability,
+)
+from src.utils.evaluation_algo import (
+    append_overall_average_row,
+    load_responses,
+    prepare_aggregated_views,
+    prepare_reference_context,
+    save_evaluation_to_csv,
+    score_combined_row,
+    score_macro_topic_rows,
+)
+from src.utils.output_processing import (
+    finalize_topic_level_table,
+    generate_oneway_anova_by_metric,
+    get_anova_target_topics,
+    plot_all_metrics,
+    plot_metric_bar,
+    plot_not_hate_metric,
+    plot_oneway_anova_p_values,
+    plot_posthoc_significance_heatmap,
+    plot_risk_factor_dimension,
+    plot_urgency_dimension,
+    save_oneway_anova_outputs,
+    score_topic_level_rows_for_chatbot,
+)
+
+_WATCHED_DOCUMENTS = {
+    "reference": REFERENCE_DOCX_PATH,
+    "chatbot": CHATBOT_DOCX_PATH,
+}
+
+
+# =================================
+# FIGURE DEPENDENCIES
+# =================================
+def _figure_plotters() -> Dict[str, Tuple[List[str], Any]]:
+    """Maps each figure to the evaluation columns it draws and the function that draws it."""
+    plotters = {}
+    for metric in VISUALIZATION_METRICS:
+        columns = [metric] + bootstrap_ci_columns(metric)
+        if f"Reference {metric}" in COMBINED_EVALUATION_COLUMNS:
+            columns.append(f"Reference {metric}")
+        plotters[metric] = (columns, lambda df, m=metric: plot_metric_bar(df, m, PLOTS_DIR))
+
+    plotters["Non-Hateful Language Probability"] = (
+        NOT_HATE_METRIC_COLUMNS[1:],
+        plot_not_hate_metric,
+    )
+    plotters["Crisis-Response Reference Similarity"] = (
+        URGENCY_DIMENSION_COLUMNS[1:],
+        plot_urgency_dimension,
+    )
+    plotters["Risk-Assessment Reference Similarity"] = (
+        RISK_FACTOR_DIMENSION_COLUMNS[1:],
+        plot_risk_factor_dimension,
+    )
+    return plotters
+
+
+def _changed_figures(old_df: Optional[pd.DataFrame], new_df: pd.DataFrame) -> List[str]:
+    plotters = _figure_plotters()
+    if old_df is None or old_df["Chatbot"].tolist() != new_df["Chatbot"].tolist():
+        return list(plotters)
+
+    changed = []
+    for figure, (columns, _) in plotters.items():
+        # Interval columns are absent when the topic-level table was empty.
+        if any((col in old_df.columns) != (col in new_df.columns) for col in columns):
+            changed.append(figure)
+            continue
+        columns = [col for col in columns if col in new_df.columns]
+        if not old_df[columns].equals(new_df[columns]):
+            changed.append(figure)
+    return changed
+
+
+# =================================
+# DOCUMENT STATE
+# =================================
+def _file_digest(path: str) -> str:
+    with open(path, mode="rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _detect_changed_documents(state: Dict[str, Any]) -> List[str]:
+    """Re-parses documents whose content changed; returns their keys."""
+    changed = []
+    for key, path in _WATCHED_DOCUMENTS.items():
+        cached = state["documents"].get(key)
+        try:
+            stamp = _file_stamp(path)
+            if cached is not None and cached["stamp"] == stamp:
+                continue
+            digest = _file_digest(path)
+            if cached is not None and cached["digest"] == digest:
+                cached["stamp"] = stamp
+                continue
+            paragraphs = extract_text_from_docx(path)
+        except Exception as exc:
+            # Editors often save in several steps; try again on the next poll.
+            print(f"[WARN] Could not read {path} ({exc}); retrying on the next poll.")
+            continue
+
+        state["documents"][key] = {"stamp": stamp, "digest": digest, "paragraphs": paragraphs}
+        changed.append(key)
+    return changed
+
+
+def _diff_topic_texts(
+    old_maps: Dict[str, Dict[str, str]],
+    new_maps: Dict[str, Dict[str, str]],
+) -> Set[Tuple[str, str]]:
+    changed_pairs = set()
+    for platform in set(old_maps) | set(new_maps):
+        old_map = old_maps.get(platform, {})
+        new_map = new_maps.get(platform, {})
+        for topic in set(old_map) | set(new_map):
+            if old_map.get(topic) != new_map.get(topic):
+                changed_pairs.add((platform, topic))
+    return changed_pairs
+
+
+# =================================
+# INCREMENTAL REFRESH
+# =================================
+def _refresh(state: Dict[str, Any], changed_documents: List[str]):
+    documents = state["documents"]
+    save_processed_files(
+        chatbot_text=documents["chatbot"]["paragraphs"],
+        reference_text=documents["reference"]["paragraphs"],
+        chatbot_output_path=CHATBOT_PROCESSED_CSV_PATH,
+        reference_output_path=REFERENCE_PROCESSED_CSV_PATH,
+        integrated_output_path=INTEGRATED_OUTPUT_CSV_PATH,
+    )
+    integrated_responses = load_responses(INTEGRATED_OUTPUT_CSV_PATH)
+    views = prepare_aggregated_views(integrated_responses)
+
+    new_maps = {HUMAN_PLATFORM: views["reference_topic_map"]}
+    chatbot_views = {}
+    for _, row in views["chatbot_df"].iterrows():
+        chatbot_views[row["Chatbot"]] = row
+        new_maps[row["Chatbot"]] = row["TopicMap"]
+
+    changed_pairs = _diff_topic_texts(state["topic_maps"], new_maps)
+    state["topic_maps"] = new_maps
+    if not changed_pairs:
+        print(f"[WATCH] {', '.join(changed_documents)} document changed, but no topic text changed.")
+        return
+
+    reference_changed = any(platform == HUMAN_PLATFORM for platform, _ in changed_pairs)
+    if reference_changed or state["reference_context"] is None:
+        state["reference_context"] = prepare_reference_context(views)
+        state["target_topics"] = get_anova_target_topics(views["reference_topic_map"])
+        affected = set(chatbot_views)
+    else:
+        affected = {platform for platform, _ in changed_pairs if platform in chatbot_views}
+
+    removed = set(state["rows"]) - set(chatbot_views)
+    for chatbot in removed:
+        state["rows"].pop(chatbot, None)
+        state["topic_rows"].pop(chatbot, None)
+        state["macro_rows"].pop(chatbot, None)
+
+    print(
+        f"[WATCH] {len(changed_pairs)} (platform, topic) texts changed; "
+        f"rescoring {len(affected)} chatbot(s): {', '.join(sorted(affected)) or '-'}"
+    )
+    reference_context = state["reference_context"]
+    for chatbot in sorted(affected):
+        chatbot_view = chatbot_views[chatbot]
+        state["rows"][chatbot] = score_combined_row(chatbot_view, reference_context)
+        state["topic_rows"][chatbot] = score_topic_level_rows_for_chatbot(
+            chatbot_view,
+            reference_context["reference_topic_map"],
+            state["target_topics"],
+        )
+        state["macro_rows"][chatbot] = score_macro_topic_rows(chatbot_view, reference_context)
+
+    # Per-reference scores of every chatbot; unchanged texts are embedding/score memo hits.
+    save_multi_reference_scores(generate_multi_reference_scores_for_run(integrated_responses))
+    _write_outputs(state)
+    # Rescored cells were appended; keep one record per cell however long the session runs.
+    compact_checkpoint()
+
+
+def _write_outputs(state: Dict[str, Any]):
+    chatbots = sorted(state["rows"])
+    evaluation_df = pd.DataFrame(
+        [state["rows"][chatbot] for chatbot in chatbots],
+        columns=COMBINED_EVALUATION_COLUMNS,
+    )
+    evaluation_df = append_overall_average_row(evaluation_df)
+    save_evaluation_to_csv(OUTPUT_CSV_PATH, evaluation_df)
+
+    topic_level_df = finalize_topic_level_table(
+        [row for chatbot in chatbots for row in state["topic_rows"][chatbot]],
+        state["target_topics"],
+    )
+    anova_df = generate_oneway_anova_by_metric(topic_level_df)
+    save_oneway_anova_outputs(anova_df=anova_df, topic_level_df=topic_level_df)
+    macro_topic_df = pd.DataFrame(
+        [row for chatbot in chatbots for row in state["macro_rows"][chatbot]],
+        columns=MACRO_TOPIC_COLUMNS,
+    )
+    save_macro_topic_scores(macro_topic_df)
+    ci_df = generate_bootstrap_confidence_intervals(macro_topic_df)
+    save_bootstrap_confidence_intervals(ci_df)
+    loo_df = generate_leave_one_topic_out_scores(topic_level_df)
+    save_sensitivity_outputs(loo_df, summarize_rank_stability(loo_df))
+
+    # Figures are compared and drawn with the bootstrap interval columns attached.
+    evaluation_df = attach_confidence_intervals(evaluation_df, ci_df)
+    plotters = _figure_plotters()
+    changed_figures = _changed_figures(state["evaluation_df"], evaluation_df)
+    if state["evaluation_df"] is None:
+        # First pass: same plot directory cleanup and figures as a batch run.
+        plot_all_metrics(evaluation_df, evaluation_df, evaluation_df, evaluation_df)
+    else:
+        for figure in changed_figures:
+            plotters[figure][1](evaluation_df)
+    if state["anova_df"] is None or not state["anova_df"].equals(anova_df):
+        plot_oneway_anova_p_values(anova_df)
+        changed_figures.append("One-Way ANOVA")
+        posthoc_df = generate_posthoc_pairwise_comparisons(topic_level_df, anova_df)
+        save_posthoc_pairwise_comparisons(posthoc_df)
+        plot_posthoc_significance_heatmap(posthoc_df)
+        changed_figures.append("Post-Hoc Pairwise Significance")
+
+    state["evaluation_df"] = evaluation_df
+    state["anova_df"] = anova_df
+    write_run_metrics()
+    print(f"[WATCH] Updated {OUTPUT_CSV_PATH}; re-plotted: {', '.join(changed_figures) or 'nothing'}")
+
+
+# =================================
+# WATCH LOOP
+# =================================
+def watch_and_evaluate(poll_seconds: float = WATCH_POLL_SECONDS, max_polls: Optional[int] = None):
+    """
+    Evaluates once, then polls the input documents and re-evaluates incrementally until
+    interrupted (or until max_polls polls have run).
+    """
+    state: Dict[str, Any] = {
+        "documents": {},
+        "topic_maps": {},
+        "reference_context": None,
+        "target_topics": [],
+        "rows": {},
+        "topic_rows": {},
+        "macro_rows": {},
+        "evaluation_df": None,
+        "anova_df": None,
+    }
+
+    # Cells from earlier runs are reused as long as their input text is unchanged and they
+    # were scored under the current models, settings and code (see checkpointing).
+    enable_checkpointing(CHECKPOINT_JSONL_PATH, resume=True)
+    try:
+        changed = _detect_changed_documents(state)
+        if len(state["documents"]) < len(_WATCHED_DOCUMENTS):
+            raise ValueError(f"Watch mode needs readable input documents: {list(_WATCHED_DOCUMENTS.values())}")
+        _refresh(state, changed)
+        print(f"[WATCH] Watching {', '.join(_WATCHED_DOCUMENTS.values())} for changes. Press Ctrl+C to stop.")
+
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            time.sleep(poll_seconds)
+            polls += 1
+            changed = _detect_changed_documents(state)
+            if changed:
+                _refresh(state, changed)
+    except KeyboardInterrupt:
+        print("[WATCH] Stopped.")
+    finally:
+        disable_checkpointing()